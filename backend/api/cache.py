@@ -0,0 +1,171 @@
+"""Redis response cache for the KPI endpoints.
+
+Endpoints opt in with :func:`cached`, naming the tables their response is
+built from; routers opt in with ``APIRouter(route_class=CachedRoute)``.
+Responses are stored as the exact bytes FastAPI serialised, keyed on the
+route path, the normalised query string and the response ETag, which
+:mod:`conditional` derives from the trigger-maintained ``table_versions`` of
+every table involved. A write bumps those versions, which orphans every key
+built from the old ones; orphans expire through their TTL. Responses whose
+tables are untracked are not cached.
+
+A miss takes a short Redis lock so that, under load, only one request per key
+runs the database query while the others wait for its result.
+
+Every tagged endpoint (:func:`cached` or :func:`conditional`) also gets HTTP
+validators from :mod:`conditional`: matching ``If-None-Match`` /
+``If-Modified-Since`` requests are answered ``304`` before the handler runs.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Callable, Optional
+
+import redis.asyncio as redis
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+
+from conditional import resolve_validators
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_KEY = "cache:resp:{digest}"
+LOCK_KEY = "cache:lock:{digest}"
+_POLL_INTERVAL_SECS = 0.05
+
+
+def cached(*tables: str, ttl: Optional[int] = None) -> Callable:
+    """Mark an endpoint as cacheable; ``tables`` drive its invalidation."""
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__cache_tables__ = tuple(tables)
+        endpoint.__cache_ttl__ = ttl
+        endpoint.__cache_store__ = True
+        return endpoint
+
+    return decorator
+
+
+def conditional(*tables: str) -> Callable:
+    """Emit ETag / Last-Modified for an endpoint without storing its body.
+
+    Used for the streamed GeoJSON routes, whose bodies are too large to keep
+    in Redis but are cheap to revalidate.
+    """
+
+    def decorator(endpoint: Callable) -> Callable:
+        endpoint.__cache_tables__ = tuple(tables)
+        endpoint.__cache_store__ = False
+        return endpoint
+
+    return decorator
+
+
+class ResponseCache:
+    def __init__(self, url: str) -> None:
+        self._url = url
+        self._redis: Optional[redis.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.from_url(self._url, socket_connect_timeout=1)
+        return self._redis
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.aclose()
+            self._redis = None
+
+    @staticmethod
+    def _digest(request: Request, variant: str) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return hashlib.sha256("\x1f".join([request.url.path, query, variant]).encode()).hexdigest()
+
+    async def fetch(self, request: Request, ttl: int, handler: Callable, variant: str) -> Response:
+        """Serve ``request`` from the cache, or run ``handler`` and store its body.
+
+        ``variant`` is the response ETag: it changes with the versions of the
+        tables the response is built from.
+        """
+        lock = None
+        try:
+            digest = self._digest(request, variant)
+            key = RESPONSE_KEY.format(digest=digest)
+            body = await self.redis.get(key)
+            if body is None:
+                lock_ms = settings.RESPONSE_CACHE_LOCK_MS
+                lock = LOCK_KEY.format(digest=digest)
+                if not await self.redis.set(lock, b"1", nx=True, px=lock_ms):
+                    body = await self._wait_for(key, lock, lock_ms / 1000)
+                    lock = None
+        except redis.RedisError as exc:
+            logger.warning("Response cache unavailable, serving uncached: %s", exc)
+            return await handler(request)
+
+        if body is not None:
+            return Response(content=body, media_type="application/json", headers={"X-Cache": "HIT"})
+
+        response = None
+        try:
+            response = await handler(request)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        finally:
+            if lock is not None:
+                await self._store(key, lock, response, ttl)
+
+    async def _store(self, key: str, lock: str, response: Optional[Response], ttl: int) -> None:
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if response is not None and response.status_code == 200 and hasattr(response, "body"):
+                    pipe.set(key, response.body, ex=ttl)
+                pipe.delete(lock)
+                await pipe.execute()
+        except redis.RedisError as exc:
+            logger.warning("Could not store cached response: %s", exc)
+
+    async def _wait_for(self, key: str, lock: str, timeout: float) -> Optional[bytes]:
+        """Wait for the request holding ``lock`` to publish ``key``."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            await asyncio.sleep(_POLL_INTERVAL_SECS)
+            body = await self.redis.get(key)
+            if body is not None:
+                return body
+            if not await self.redis.exists(lock):
+                return None
+        return None
+
+
+response_cache = ResponseCache(settings.REDIS_URL)
+
+
+class CachedRoute(APIRoute):
+    """Route class for endpoints marked with :func:`cached` or :func:`conditional`."""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        tables = getattr(self.endpoint, "__cache_tables__", None)
+        if not tables:
+            return handler
+        store = getattr(self.endpoint, "__cache_store__", False)
+        ttl = getattr(self.endpoint, "__cache_ttl__", None) or settings.RESPONSE_CACHE_TTL_SECONDS
+
+        async def cached_handler(request: Request) -> Response:
+            if request.method != "GET":
+                return await handler(request)
+            validators = await resolve_validators(request, tables, response_cache.redis)
+            if validators is not None and validators.not_modified(request):
+                return Response(status_code=304, headers=validators.headers)
+            if store and validators is not None:
+                response = await response_cache.fetch(request, ttl, handler, validators.etag)
+            else:
+                response = await handler(request)
+            if validators is not None and response.status_code == 200:
+                response.headers.update(validators.headers)
+            return response
+
+        return cached_handler
@@ -0,0 +1,153 @@
+"""Conditional GET (ETag / Last-Modified) driven by per-table version counters.
+
+Migration 004 keeps one row per data table in ``table_versions``; a statement
+trigger bumps ``version`` and ``updated_at`` on every INSERT/UPDATE/DELETE/
+TRUNCATE. A response's validators are derived from the versions of the tables
+it reads plus the request URL, so a ``304 Not Modified`` never touches the
+main query.
+
+The versions are the single invalidation signal of the API: they key the
+response cache too (:mod:`cache`). Given a Redis client they are read from a
+mirror in Redis, one ``MGET`` per request; a table missing there is looked up
+in Postgres and mirrored for ``TABLE_VERSION_CACHE_SECONDS``. Writers delete
+the mirror of the tables they changed (``backend/common/api_cache.py``), so
+that TTL only bounds how long a write that skipped that goes unnoticed.
+"""
+import hashlib
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence
+
+import redis.asyncio as redis
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from config import settings
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Mirror of a table_versions row, "<version>|<updated_at ISO>"; deleted by the writers.
+VERSION_KEY = "cache:version:{table}"
+
+_VERSIONS_SQL = text(
+    "SELECT table_name, version, updated_at FROM table_versions WHERE table_name = ANY(:tables)"
+)
+
+
+@dataclass(frozen=True)
+class Validators:
+    etag: str
+    last_modified: Optional[datetime]
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": f"public, max-age={settings.HTTP_CACHE_MAX_AGE_SECONDS}",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def not_modified(self, request: Request) -> bool:
+        """Evaluate If-None-Match (preferred) or If-Modified-Since per RFC 9110."""
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            if if_none_match.strip() == "*":
+                return True
+            candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return self.etag in candidates
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified.replace(microsecond=0) <= since
+        return False
+
+
+async def _stored_versions(tables: Sequence[str]) -> Dict[str, tuple]:
+    async with AsyncSessionLocal() as session:
+        rows = (await session.execute(_VERSIONS_SQL, {"tables": list(tables)})).all()
+    return {row.table_name: (row.version, row.updated_at) for row in rows}
+
+
+def _encode(version: tuple) -> str:
+    number, updated_at = version
+    return f"{number}|{updated_at.isoformat() if updated_at is not None else ''}"
+
+
+def _decode(raw: bytes | str) -> tuple:
+    number, _, updated_at = (raw.decode() if isinstance(raw, bytes) else raw).partition("|")
+    return int(number), datetime.fromisoformat(updated_at) if updated_at else None
+
+
+async def table_versions(
+    tables: Sequence[str], client: Optional[redis.Redis] = None
+) -> Optional[Dict[str, tuple]]:
+    """Return ``{table: (version, updated_at)}``, or None if any table is untracked.
+
+    With a Redis ``client`` the mirrored versions are used where present;
+    Redis errors fall back to Postgres.
+    """
+    tables = sorted(set(tables))
+    versions: Dict[str, tuple] = {}
+    if client is not None:
+        try:
+            mirrored = await client.mget([VERSION_KEY.format(table=table) for table in tables])
+        except redis.RedisError as exc:
+            logger.warning("Version mirror unavailable, reading table_versions: %s", exc)
+            client, mirrored = None, []
+        versions.update((table, _decode(raw)) for table, raw in zip(tables, mirrored) if raw)
+
+    missing = [table for table in tables if table not in versions]
+    if missing:
+        stored = await _stored_versions(missing)
+        versions.update(stored)
+        if client is not None and stored:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for table, version in stored.items():
+                        pipe.set(
+                            VERSION_KEY.format(table=table),
+                            _encode(version),
+                            ex=settings.TABLE_VERSION_CACHE_SECONDS,
+                        )
+                    await pipe.execute()
+            except redis.RedisError as exc:
+                logger.warning("Could not mirror table versions: %s", exc)
+
+    if len(versions) != len(tables):
+        return None
+    return versions
+
+
+def validators_for(request: Request, versions: Dict[str, tuple]) -> Validators:
+    query = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+    parts = [request.url.path, query] + [f"{t}:{versions[t][0]}" for t in sorted(versions)]
+    digest = hashlib.sha256("\x1f".join(parts).encode()).hexdigest()[:32]
+    modified = [updated_at for _, updated_at in versions.values() if updated_at is not None]
+    return Validators(etag=f'"{digest}"', last_modified=max(modified) if modified else None)
+
+
+async def resolve_validators(
+    request: Request, tables: Sequence[str], client: Optional[redis.Redis] = None
+) -> Optional[Validators]:
+    """Validators for ``request``, or None when they cannot be derived.
+
+    Failures are not fatal: the request is served without validators and the
+    handler reports any real database problem itself.
+    """
+    try:
+        versions = await table_versions(tables, client)
+    except (SQLAlchemyError, OSError) as exc:
+        logger.warning("Table versions unavailable, skipping validators: %s", exc)
+        return None
+    if versions is None:
+        return None
+    return validators_for(request, versions)
@@ -14,6 +14,10 @@ class Settings(BaseSettings):
 
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
+    RESPONSE_CACHE_TTL_SECONDS: int = 60 * 60 * 24
+    RESPONSE_CACHE_LOCK_MS: int = 10_000
+    HTTP_CACHE_MAX_AGE_SECONDS: int = 300
+    TABLE_VERSION_CACHE_SECONDS: int = 30
 
     # JWT
     JWT_SECRET_KEY: str  # required – no default; must be set in .env
@@ -28,6 +32,12 @@ class Settings(BaseSettings):
     # Frontend
     NEXT_PUBLIC_API_URL: str = "http://localhost:8000/api/v1"
 
+    # Vector tiles
+    TILE_EXTENT: int = 4096
+    TILE_BUFFER: int = 64
+    TILE_CACHE_MAX_ENTRIES: int = 2048
+    TILE_CACHE_TTL_SECONDS: int = 3600
+
     # Scraper
     SCRAPER_USER_AGENT: str = "BoliviaKPIs/1.0"
 
@@ -0,0 +1,43 @@
+import sys
+from pathlib import Path
+
+# backend/, home of the ``common`` package shared with the ETL (the image copies it to /app/common).
+_BACKEND = str(Path(__file__).resolve().parents[2])
+if _BACKEND not in sys.path:
+    sys.path.append(_BACKEND)
+
+from geo.filters import MAX_FEATURE_LIMIT, SpatialFilter, spatial_filter
+from geo.simplify import (
+    SIMPLIFICATION_LEVELS,
+    GeometryDetail,
+    SimplificationLevel,
+    geometry_detail,
+    level_for,
+    simplified_geometry,
+)
+from geo.streaming import (
+    GEOJSON_MEDIA_TYPE,
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    feature_query,
+    geometry_column,
+    stream_feature_collection,
+)
+
+__all__ = [
+    "MAX_FEATURE_LIMIT",
+    "SpatialFilter",
+    "spatial_filter",
+    "SIMPLIFICATION_LEVELS",
+    "GeometryDetail",
+    "SimplificationLevel",
+    "geometry_detail",
+    "level_for",
+    "simplified_geometry",
+    "GEOJSON_MEDIA_TYPE",
+    "GEOJSON_RESPONSES",
+    "GeoJSONStreamingResponse",
+    "feature_query",
+    "geometry_column",
+    "stream_feature_collection",
+]
@@ -0,0 +1,112 @@
+"""Viewport filters shared by every GeoJSON route.
+
+``bbox`` and ``intersects`` are applied as an ``&&`` bounding-box test followed
+by an exact ``ST_Intersects``, both in planar lon/lat coordinates (served by
+the GiST index on ``geometry::geometry``): a bbox means "inside this lon/lat
+rectangle", which as a geography would get geodesic edges and be degenerate
+for the whole world. ``limit`` / ``cursor`` page through the result in id
+order.
+"""
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Query, status
+from geoalchemy2 import Geometry
+from shapely.errors import GEOSException
+from shapely.geometry import shape
+from shapely.validation import explain_validity
+from sqlalchemy import cast, func
+from sqlalchemy.sql import Select
+
+from schemas.common import decode_cursor
+
+MAX_FEATURE_LIMIT = 10_000
+
+_GEOMETRY_TYPES = {
+    "Point", "MultiPoint", "LineString", "MultiLineString",
+    "Polygon", "MultiPolygon", "GeometryCollection",
+}
+
+
+@dataclass(frozen=True)
+class SpatialFilter:
+    bbox: Optional[Tuple[float, float, float, float]] = None
+    intersects: Optional[str] = None  # serialised GeoJSON geometry
+    limit: Optional[int] = None
+    after_id: Optional[int] = None
+
+    def apply(self, stmt: Select, model) -> Select:
+        """Restrict ``stmt`` (selecting from ``model``) to the requested area and page."""
+        # Plain ``::geometry`` so the expression matches the planar index (migration 007).
+        geometry = cast(model.geometry, Geometry(geometry_type=None, srid=-1))
+        if self.bbox is not None:
+            envelope = func.ST_MakeEnvelope(*self.bbox, 4326)
+            stmt = stmt.where(geometry.op("&&")(envelope), func.ST_Intersects(geometry, envelope))
+        if self.intersects is not None:
+            area = func.ST_SetSRID(func.ST_GeomFromGeoJSON(self.intersects), 4326)
+            stmt = stmt.where(geometry.op("&&")(area), func.ST_Intersects(geometry, area))
+        if self.after_id is not None:
+            stmt = stmt.where(model.id > self.after_id)
+        if self.limit is not None:
+            # One extra row tells the response whether another page exists.
+            stmt = stmt.order_by(model.id).limit(self.limit + 1)
+        return stmt
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def parse_bbox(value: str) -> Tuple[float, float, float, float]:
+    try:
+        minx, miny, maxx, maxy = (float(v) for v in value.split(","))
+    except ValueError:
+        raise _bad_request("bbox must be minx,miny,maxx,maxy") from None
+    if not (-180 <= minx < maxx <= 180 and -90 <= miny < maxy <= 90):
+        raise _bad_request("bbox is outside WGS84 bounds or has min >= max")
+    return minx, miny, maxx, maxy
+
+
+def parse_intersects(value: str) -> str:
+    try:
+        geometry = json.loads(value)
+    except ValueError:
+        raise _bad_request("intersects must be a GeoJSON geometry") from None
+    if isinstance(geometry, dict) and geometry.get("type") == "Feature":
+        geometry = geometry.get("geometry")
+    if not isinstance(geometry, dict) or geometry.get("type") not in _GEOMETRY_TYPES:
+        raise _bad_request("intersects must be a GeoJSON geometry")
+    # Reject what PostGIS would fail on here: the query only runs once the
+    # streaming response has started, when an error can no longer be a 400.
+    try:
+        parsed = shape(geometry)
+    except (GEOSException, ValueError, TypeError, KeyError, IndexError, AttributeError):
+        raise _bad_request("intersects has malformed coordinates") from None
+    if parsed.is_empty:
+        raise _bad_request("intersects geometry is empty")
+    if not parsed.is_valid:
+        raise _bad_request(f"intersects geometry is invalid: {explain_validity(parsed)}")
+    return json.dumps(geometry, separators=(",", ":"))
+
+
+def spatial_filter(
+    bbox: Optional[str] = Query(None, description="minx,miny,maxx,maxy in WGS84 degrees"),
+    intersects: Optional[str] = Query(None, description="GeoJSON geometry the features must intersect"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_FEATURE_LIMIT, description="Maximum features per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+) -> SpatialFilter:
+    """FastAPI dependency reading the viewport / paging query parameters."""
+    after_id = None
+    if cursor is not None:
+        try:
+            (after_id,) = decode_cursor(cursor)
+            after_id = int(after_id)
+        except (ValueError, TypeError):
+            raise _bad_request("Invalid cursor") from None
+    return SpatialFilter(
+        bbox=parse_bbox(bbox) if bbox else None,
+        intersects=parse_intersects(intersects) if intersects else None,
+        limit=limit,
+        after_id=after_id,
+    )
@@ -0,0 +1,68 @@
+"""Zoom-dependent choice between full and pre-simplified geometry columns.
+
+The ETL (``backend/etl/simplification.py``) fills the ``geom_*`` columns of
+every model using :class:`models.base.SimplifiedGeometryMixin`; both take the
+levels from ``backend/common/simplification.py``.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Query
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func
+
+from common.simplification import SIMPLIFICATION_LEVELS, SimplificationLevel
+
+
+def level_for(
+    zoom: Optional[int] = None, tolerance: Optional[float] = None
+) -> Optional[SimplificationLevel]:
+    """Pick the coarsest level that is still fine enough for the request.
+
+    An explicit ``tolerance`` wins over ``zoom``; ``None`` means full resolution.
+    """
+    if tolerance is not None:
+        for level in SIMPLIFICATION_LEVELS:
+            if level.tolerance <= tolerance:
+                return level
+        return None
+    if zoom is not None:
+        for level in SIMPLIFICATION_LEVELS:
+            if zoom <= level.max_zoom:
+                return level
+    return None
+
+
+def simplified_geometry(model, level: Optional[SimplificationLevel]):
+    """Geometry expression for ``model`` at ``level``.
+
+    Models with precomputed levels fall back to the full geometry until the
+    ETL has filled them; other models are simplified on the fly.
+    """
+    if level is None:
+        return model.geometry
+    stored = getattr(model, level.column, None)
+    if stored is not None:
+        return func.coalesce(stored, model.geometry)
+    return func.ST_SimplifyPreserveTopology(cast(model.geometry, Geometry(srid=4326)), level.tolerance)
+
+
+@dataclass(frozen=True)
+class GeometryDetail:
+    zoom: Optional[int] = None
+    tolerance: Optional[float] = None
+
+    @property
+    def level(self) -> Optional[SimplificationLevel]:
+        return level_for(self.zoom, self.tolerance)
+
+    def geometry(self, model):
+        return simplified_geometry(model, self.level)
+
+
+def geometry_detail(
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Map zoom the geometry will be drawn at"),
+    tolerance: Optional[float] = Query(None, gt=0, description="Maximum simplification error in degrees"),
+) -> GeometryDetail:
+    """FastAPI dependency reading the ``zoom`` / ``tolerance`` query parameters."""
+    return GeometryDetail(zoom=zoom, tolerance=tolerance)
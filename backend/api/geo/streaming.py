@@ -0,0 +1,119 @@
+"""Streaming GeoJSON responses assembled entirely inside PostGIS.
+
+Each feature is serialised by ``ST_AsGeoJSON(record)`` and read through a
+server-side cursor, so Python never decodes geometry and memory use does not
+grow with the size of the layer.
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+from fastapi.responses import StreamingResponse
+from geoalchemy2 import Geometry
+from sqlalchemy import cast, func, select
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import Label
+
+from database import AsyncSessionLocal
+from schemas.common import encode_cursor
+
+logger = logging.getLogger(__name__)
+
+GEOJSON_MEDIA_TYPE = "application/geo+json"
+GEOJSON_MAX_DECIMALS = 6  # ~0.1 m, well below what any map zoom can show
+FETCH_SIZE = 500
+CHUNK_BYTES = 64 * 1024
+
+# OpenAPI declaration of the streamed body, for ``responses=`` next to
+# ``response_class=GeoJSONStreamingResponse`` (the body has no response_model).
+GEOJSON_RESPONSES: Dict[int, Dict[str, Any]] = {
+    200: {"description": "GeoJSON FeatureCollection", "content": {GEOJSON_MEDIA_TYPE: {}}},
+}
+
+
+def geometry_column(geometry) -> Label:
+    """Select a geography column as the ``geometry`` member of a streamed feature."""
+    return cast(geometry, Geometry(srid=4326)).label("geometry")
+
+
+def feature_query(stmt: Select, paged: bool = False) -> Select:
+    """Wrap ``stmt`` so each row comes back as one serialised GeoJSON Feature.
+
+    Every column of ``stmt`` other than the one labelled ``geometry`` becomes a
+    feature property. ``paged`` also returns the feature id, in id order.
+    """
+    features = stmt.subquery("f")
+    feature = func.ST_AsGeoJSON(features.table_valued(), "geometry", GEOJSON_MAX_DECIMALS)
+    if not paged:
+        return select(feature)
+    return select(features.c.id, feature).order_by(features.c.id)
+
+
+async def stream_feature_collection(stmt: Select, limit: Optional[int] = None) -> AsyncIterator[bytes]:
+    """Yield a GeoJSON FeatureCollection for ``stmt`` in ~CHUNK_BYTES pieces.
+
+    With ``limit``, ``stmt`` is expected to fetch ``limit + 1`` rows (see
+    ``geo.filters.SpatialFilter``); if the extra row is present the collection
+    ends with a ``next_cursor`` member for the following page.
+
+    Uses its own session: FastAPI closes request-scoped dependencies before a
+    streaming body is sent.
+    """
+    buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+    separator = b""
+    next_cursor = None
+    async with AsyncSessionLocal() as session:
+        try:
+            result = await session.stream(
+                feature_query(stmt, paged=limit is not None).execution_options(yield_per=FETCH_SIZE)
+            )
+            count = 0
+            last_id = None
+            async for row in result:
+                if limit is not None:
+                    if count == limit:
+                        next_cursor = encode_cursor(last_id)
+                        break
+                    count += 1
+                    last_id = row[0]
+                buffer += separator
+                buffer += row[-1].encode()
+                separator = b","
+                if len(buffer) >= CHUNK_BYTES:
+                    yield bytes(buffer)
+                    buffer.clear()
+            await result.close()
+        except Exception:
+            logger.exception("GeoJSON stream aborted")
+            raise
+    buffer += b"]"
+    if next_cursor is not None:
+        buffer += b',"next_cursor":' + json.dumps(next_cursor).encode()
+    buffer += b"}"
+    yield bytes(buffer)
+
+
+async def _prepend(first: bytes, rest: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    yield first
+    async for chunk in rest:
+        yield chunk
+
+
+class GeoJSONStreamingResponse(StreamingResponse):
+    """A FeatureCollection streamed straight from the database.
+
+    Created with :meth:`start`, which runs the query and reads the first
+    chunk before the status line is sent: a failing query becomes an error
+    response instead of a 200, and collections under CHUNK_BYTES are
+    complete before anything is sent. An error after that aborts the
+    connection without ending the chunked body, so clients see a failed
+    transfer rather than a truncated document.
+    """
+
+    media_type = GEOJSON_MEDIA_TYPE
+
+    @classmethod
+    async def start(cls, stmt: Select, limit: Optional[int] = None, **kwargs) -> "GeoJSONStreamingResponse":
+        chunks = stream_feature_collection(stmt, limit)
+        first = await chunks.__anext__()
+        return cls(_prepend(first, chunks), **kwargs)
@@ -2,6 +2,7 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from cache import response_cache
 from config import settings
 from database import init_db
 from routes import (
@@ -12,6 +13,7 @@ from routes import (
     society as society_router,
     environment as environment_router,
     security as security_router,
+    tiles as tiles_router,
 )
 
 
@@ -19,6 +21,7 @@ from routes import (
 async def lifespan(app: FastAPI):
     await init_db()
     yield
+    await response_cache.close()
 
 
 app = FastAPI(
@@ -52,6 +55,7 @@ app.include_router(technology_router.router, prefix=f"{PREFIX}/technology", tags
 app.include_router(society_router.router, prefix=f"{PREFIX}/society", tags=["Society"])
 app.include_router(environment_router.router, prefix=f"{PREFIX}/environment", tags=["Environment"])
 app.include_router(security_router.router, prefix=f"{PREFIX}/security", tags=["Security"])
+app.include_router(tiles_router.router, prefix=f"{PREFIX}/tiles", tags=["Tiles"])
 
 
 @app.get("/health", tags=["Health"])
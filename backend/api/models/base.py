@@ -1,4 +1,5 @@
 from sqlalchemy import Column, DateTime, String, func
+from geoalchemy2 import Geography
 from database import Base
 
 
@@ -18,5 +19,16 @@ class TimestampMixin:
     last_updated = Column(DateTime(timezone=True), nullable=True)
 
 
-__all__ = ["Base", "TimestampMixin"]
+class SimplifiedGeometryMixin:
+    """Pre-simplified copies of ``geometry`` for low zoom levels.
+
+    Filled by the ETL; see ``common.simplification.SIMPLIFICATION_LEVELS`` for the
+    tolerance and zoom range of each column.
+    """
+
+    geom_overview = Column(Geography(geometry_type="GEOMETRY", srid=4326, spatial_index=False), nullable=True)
+    geom_simplified = Column(Geography(geometry_type="GEOMETRY", srid=4326, spatial_index=False), nullable=True)
+
+
+__all__ = ["Base", "TimestampMixin", "SimplifiedGeometryMixin"]
 
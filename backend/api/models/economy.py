@@ -2,10 +2,10 @@ from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, BigInte
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography
 from database import Base
-from models.base import TimestampMixin
+from models.base import TimestampMixin, SimplifiedGeometryMixin
 
 
-class Department(Base, TimestampMixin):
+class Department(Base, TimestampMixin, SimplifiedGeometryMixin):
     __tablename__ = "departments"
 
     id = Column(Integer, primary_key=True)
@@ -1,10 +1,10 @@
 from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text
 from geoalchemy2 import Geography
 from database import Base
-from models.base import TimestampMixin
+from models.base import TimestampMixin, SimplifiedGeometryMixin
 
 
-class DeforestationZone(Base, TimestampMixin):
+class DeforestationZone(Base, TimestampMixin, SimplifiedGeometryMixin):
     __tablename__ = "deforestation_zones"
 
     id = Column(Integer, primary_key=True)
@@ -14,7 +14,7 @@ class DeforestationZone(Base, TimestampMixin):
     geometry = Column(Geography(geometry_type="MULTIPOLYGON", srid=4326), nullable=True)
 
 
-class ProtectedArea(Base, TimestampMixin):
+class ProtectedArea(Base, TimestampMixin, SimplifiedGeometryMixin):
     __tablename__ = "protected_areas"
 
     id = Column(Integer, primary_key=True)
@@ -2,7 +2,7 @@ from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, Text
 from sqlalchemy.orm import relationship
 from geoalchemy2 import Geography
 from database import Base
-from models.base import TimestampMixin
+from models.base import TimestampMixin, SimplifiedGeometryMixin
 
 
 class ElectionResult(Base, TimestampMixin):
@@ -50,7 +50,7 @@ class SocialConflict(Base, TimestampMixin):
     description = Column(Text, nullable=True)
 
 
-class TIOCTerritory(Base, TimestampMixin):
+class TIOCTerritory(Base, TimestampMixin, SimplifiedGeometryMixin):
     __tablename__ = "tioc_territories"
 
     id = Column(Integer, primary_key=True)
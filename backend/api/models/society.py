@@ -1,10 +1,10 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from geoalchemy2 import Geography
 from database import Base
-from models.base import TimestampMixin
+from models.base import TimestampMixin, SimplifiedGeometryMixin
 
 
-class HDIIndex(Base, TimestampMixin):
+class HDIIndex(Base, TimestampMixin, SimplifiedGeometryMixin):
     __tablename__ = "hdi_index"
 
     id = Column(Integer, primary_key=True)
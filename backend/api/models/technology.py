@@ -1,7 +1,7 @@
 from sqlalchemy import Column, Integer, String, Float, ForeignKey
 from geoalchemy2 import Geography
 from database import Base
-from models.base import TimestampMixin
+from models.base import TimestampMixin, SimplifiedGeometryMixin
 
 
 class InternetPenetration(Base, TimestampMixin):
@@ -15,7 +15,7 @@ class InternetPenetration(Base, TimestampMixin):
     mobile_per_100 = Column(Float, nullable=True)
 
 
-class CoverageZone(Base, TimestampMixin):
+class CoverageZone(Base, TimestampMixin, SimplifiedGeometryMixin):
     """4G/5G coverage polygon."""
 
     __tablename__ = "coverage_zones"
@@ -1,23 +1,34 @@
 from typing import Optional, List
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from geoalchemy2.functions import ST_AsGeoJSON
-import json
+from sqlalchemy import select
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.economy import GDPPerCapita, Inflation, Export, PublicContract, Department
-from schemas.common import PaginatedResponse, GeoJSONFeatureCollection
+from schemas.common import PaginatedResponse, count_rows, keyset_page
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/gdp", response_model=PaginatedResponse)
+@cached("gdp_per_capita")
 async def list_gdp(
     department_id: Optional[int] = None,
     year: Optional[int] = None,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: Optional[int] = Query(None, ge=1, deprecated=True, description="Offset page number; use cursor instead"),
     page_size: int = Query(20, ge=1, le=100),
+    exact_total: bool = Query(False, description="Count rows exactly instead of using the planner estimate"),
     db: AsyncSession = Depends(get_db),
 ):
     stmt = select(GDPPerCapita)
@@ -26,13 +37,17 @@ async def list_gdp(
     if year:
         stmt = stmt.where(GDPPerCapita.year == year)
 
-    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
-    items = (await db.execute(stmt.offset((page - 1) * page_size).limit(page_size))).scalars().all()
+    items, next_cursor = await keyset_page(
+        db, stmt, (GDPPerCapita.year, GDPPerCapita.id), cursor, page_size, descending=True, page=page
+    )
+    total, total_is_estimate = await count_rows(db, stmt, exact=exact_total)
 
     return {
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "items": [
             {
                 "id": r.id,
@@ -47,6 +62,7 @@ async def list_gdp(
 
 
 @router.get("/gdp/{department_id}")
+@cached("gdp_per_capita")
 async def get_gdp_by_department(department_id: int, db: AsyncSession = Depends(get_db)):
     result = await db.execute(
         select(GDPPerCapita).where(GDPPerCapita.department_id == department_id).order_by(GDPPerCapita.year)
@@ -56,6 +72,7 @@ async def get_gdp_by_department(department_id: int, db: AsyncSession = Depends(g
 
 
 @router.get("/inflation")
+@cached("inflation")
 async def list_inflation(
     year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
@@ -72,6 +89,7 @@ async def list_inflation(
 
 
 @router.get("/exports")
+@cached("exports")
 async def list_exports(
     year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
@@ -94,23 +112,30 @@ async def list_exports(
     ]
 
 
-@router.get("/contracts")
+@router.get("/contracts", response_model=PaginatedResponse)
+@cached("public_contracts")
 async def list_contracts(
     department_id: Optional[int] = None,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: Optional[int] = Query(None, ge=1, deprecated=True, description="Offset page number; use cursor instead"),
     page_size: int = Query(20, ge=1, le=100),
+    exact_total: bool = Query(False, description="Count rows exactly instead of using the planner estimate"),
     db: AsyncSession = Depends(get_db),
 ):
     stmt = select(PublicContract)
     if department_id:
         stmt = stmt.where(PublicContract.department_id == department_id)
 
-    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
-    items = (await db.execute(stmt.offset((page - 1) * page_size).limit(page_size))).scalars().all()
+    items, next_cursor = await keyset_page(
+        db, stmt, (PublicContract.id,), cursor, page_size, descending=True, page=page
+    )
+    total, total_is_estimate = await count_rows(db, stmt, exact=exact_total)
     return {
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "items": [
             {
                 "id": r.id,
@@ -127,10 +152,11 @@ async def list_contracts(
     }
 
 
-@router.get("/contracts/geojson", response_model=GeoJSONFeatureCollection)
+@router.get("/contracts/geojson", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("public_contracts")
 async def contracts_geojson(
     department_id: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         PublicContract.id,
@@ -138,24 +164,23 @@ async def contracts_geojson(
         PublicContract.amount,
         PublicContract.contractor,
         PublicContract.department_id,
-        ST_AsGeoJSON(PublicContract.geometry).label("geom"),
+        geometry_column(PublicContract.geometry),
     ).where(PublicContract.geometry.isnot(None))
     if department_id:
         stmt = stmt.where(PublicContract.department_id == department_id)
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, PublicContract), limit=spatial.limit)
 
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "title": r.title,
-                "amount": r.amount,
-                "contractor": r.contractor,
-                "department_id": r.department_id,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+
+@router.get("/departments/geojson", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("departments")
+async def departments_geojson(
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
+):
+    stmt = select(
+        Department.id,
+        Department.name,
+        Department.code,
+        geometry_column(detail.geometry(Department)),
+    ).where(Department.geometry.isnot(None))
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, Department), limit=spatial.limit)
@@ -1,11 +1,19 @@
 from typing import Optional
-import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from geoalchemy2.functions import ST_AsGeoJSON
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.environment import (
     DeforestationZone,
     ProtectedArea,
@@ -14,121 +22,79 @@ from models.environment import (
     CO2Emission,
     ForestFire,
 )
-from schemas.common import GeoJSONFeatureCollection
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
-@router.get("/deforestation", response_model=GeoJSONFeatureCollection)
+@router.get("/deforestation", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("deforestation_zones")
 async def deforestation_geojson(
     year: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         DeforestationZone.id,
         DeforestationZone.year,
         DeforestationZone.area_ha,
         DeforestationZone.department_id,
-        ST_AsGeoJSON(DeforestationZone.geometry).label("geom"),
+        geometry_column(detail.geometry(DeforestationZone)),
     ).where(DeforestationZone.geometry.isnot(None))
     if year:
         stmt = stmt.where(DeforestationZone.year == year)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "year": r.year,
-                "area_ha": r.area_ha,
-                "department_id": r.department_id,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, DeforestationZone), limit=spatial.limit)
 
 
-@router.get("/protected-areas", response_model=GeoJSONFeatureCollection)
-async def protected_areas_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/protected-areas", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("protected_areas")
+async def protected_areas_geojson(
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
+):
     stmt = select(
         ProtectedArea.id,
         ProtectedArea.name,
         ProtectedArea.category,
         ProtectedArea.area_ha,
-        ST_AsGeoJSON(ProtectedArea.geometry).label("geom"),
+        geometry_column(detail.geometry(ProtectedArea)),
     ).where(ProtectedArea.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "category": r.category,
-                "area_ha": r.area_ha,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, ProtectedArea), limit=spatial.limit)
 
 
-@router.get("/mining", response_model=GeoJSONFeatureCollection)
-async def mining_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/mining", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("mining_concessions")
+async def mining_geojson(
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
+):
     stmt = select(
         MiningConcession.id,
         MiningConcession.name,
         MiningConcession.mineral,
         MiningConcession.company,
         MiningConcession.area_ha,
-        ST_AsGeoJSON(MiningConcession.geometry).label("geom"),
+        geometry_column(detail.geometry(MiningConcession)),
     ).where(MiningConcession.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "mineral": r.mineral,
-                "company": r.company,
-                "area_ha": r.area_ha,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, MiningConcession), limit=spatial.limit)
 
 
-@router.get("/lithium", response_model=GeoJSONFeatureCollection)
-async def lithium_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/lithium", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("lithium_salt_flats")
+async def lithium_geojson(
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
+):
     stmt = select(
         LithiumSaltFlat.id,
         LithiumSaltFlat.name,
         LithiumSaltFlat.estimated_reserves_mt,
-        ST_AsGeoJSON(LithiumSaltFlat.geometry).label("geom"),
+        geometry_column(detail.geometry(LithiumSaltFlat)),
     ).where(LithiumSaltFlat.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "estimated_reserves_mt": r.estimated_reserves_mt,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, LithiumSaltFlat), limit=spatial.limit)
 
 
 @router.get("/co2")
+@cached("co2_emissions")
 async def co2_emissions(
     year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
@@ -144,11 +110,12 @@ async def co2_emissions(
     ]
 
 
-@router.get("/fires", response_model=GeoJSONFeatureCollection)
+@router.get("/fires", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("forest_fires")
 async def forest_fires_geojson(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         ForestFire.id,
@@ -156,21 +123,6 @@ async def forest_fires_geojson(
         ForestFire.confidence,
         ForestFire.frp,
         ForestFire.satellite,
-        ST_AsGeoJSON(ForestFire.geometry).label("geom"),
+        geometry_column(ForestFire.geometry),
     ).where(ForestFire.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "detected_date": str(r.detected_date),
-                "confidence": r.confidence,
-                "frp": r.frp,
-                "satellite": r.satellite,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, ForestFire), limit=spatial.limit)
@@ -1,24 +1,35 @@
 from typing import Optional
-import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from geoalchemy2.functions import ST_AsGeoJSON
+from sqlalchemy import select
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.politics import ElectionResult, SocialConflict, TIOCTerritory, DemocracyIndex, CorruptionIndex
-from schemas.common import PaginatedResponse, GeoJSONFeatureCollection
+from schemas.common import PaginatedResponse, count_rows, keyset_page
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/elections", response_model=PaginatedResponse)
+@cached("election_results")
 async def list_elections(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
     election_type: Optional[str] = None,
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    page: Optional[int] = Query(None, ge=1, deprecated=True, description="Offset page number; use cursor instead"),
     page_size: int = Query(20, ge=1, le=100),
+    exact_total: bool = Query(False, description="Count rows exactly instead of using the planner estimate"),
     db: AsyncSession = Depends(get_db),
 ):
     stmt = select(ElectionResult)
@@ -29,12 +40,16 @@ async def list_elections(
     if election_type:
         stmt = stmt.where(ElectionResult.election_type == election_type)
 
-    total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
-    items = (await db.execute(stmt.offset((page - 1) * page_size).limit(page_size))).scalars().all()
+    items, next_cursor = await keyset_page(
+        db, stmt, (ElectionResult.year, ElectionResult.id), cursor, page_size, descending=True, page=page
+    )
+    total, total_is_estimate = await count_rows(db, stmt, exact=exact_total)
     return {
         "total": total,
+        "total_is_estimate": total_is_estimate,
         "page": page,
         "page_size": page_size,
+        "next_cursor": next_cursor,
         "items": [
             {
                 "id": r.id,
@@ -51,10 +66,12 @@ async def list_elections(
     }
 
 
-@router.get("/elections/geojson", response_model=GeoJSONFeatureCollection)
+@router.get("/elections/geojson", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("election_results")
 async def elections_geojson(
     year: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         ElectionResult.id,
@@ -63,31 +80,15 @@ async def elections_geojson(
         ElectionResult.candidate,
         ElectionResult.votes,
         ElectionResult.percentage,
-        ST_AsGeoJSON(ElectionResult.geometry).label("geom"),
+        geometry_column(detail.geometry(ElectionResult)),
     ).where(ElectionResult.geometry.isnot(None))
     if year:
         stmt = stmt.where(ElectionResult.year == year)
-
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "year": r.year,
-                "party": r.party,
-                "candidate": r.candidate,
-                "votes": r.votes,
-                "percentage": r.percentage,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, ElectionResult), limit=spatial.limit)
 
 
 @router.get("/conflicts")
+@cached("social_conflicts")
 async def list_conflicts(
     department_id: Optional[int] = None,
     conflict_type: Optional[str] = None,
@@ -115,53 +116,36 @@ async def list_conflicts(
     ]
 
 
-@router.get("/conflicts/geojson", response_model=GeoJSONFeatureCollection)
-async def conflicts_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/conflicts/geojson", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("social_conflicts")
+async def conflicts_geojson(spatial: SpatialFilter = Depends(spatial_filter)):
     stmt = select(
         SocialConflict.id,
         SocialConflict.title,
         SocialConflict.type,
-        ST_AsGeoJSON(SocialConflict.geometry).label("geom"),
+        geometry_column(SocialConflict.geometry),
     ).where(SocialConflict.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {"id": r.id, "title": r.title, "type": r.type},
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, SocialConflict), limit=spatial.limit)
 
 
-@router.get("/tioc", response_model=GeoJSONFeatureCollection)
-async def tioc_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/tioc", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("tioc_territories")
+async def tioc_geojson(
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
+):
     stmt = select(
         TIOCTerritory.id,
         TIOCTerritory.name,
         TIOCTerritory.ethnicity,
         TIOCTerritory.area_ha,
-        ST_AsGeoJSON(TIOCTerritory.geometry).label("geom"),
+        geometry_column(detail.geometry(TIOCTerritory)),
     ).where(TIOCTerritory.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "ethnicity": r.ethnicity,
-                "area_ha": r.area_ha,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, TIOCTerritory), limit=spatial.limit)
 
 
 @router.get("/democracy-index")
+@cached("democracy_index")
 async def democracy_index(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(DemocracyIndex).order_by(DemocracyIndex.year))
     records = result.scalars().all()
@@ -169,6 +153,7 @@ async def democracy_index(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/corruption-index")
+@cached("corruption_index")
 async def corruption_index(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(CorruptionIndex).order_by(CorruptionIndex.year))
     records = result.scalars().all()
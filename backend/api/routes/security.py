@@ -1,18 +1,26 @@
 from typing import Optional
-import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from geoalchemy2.functions import ST_AsGeoJSON
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.security import CrimeRate, DrugSeizure, RoadSegment, Prison, HealthcareFacility
-from schemas.common import GeoJSONFeatureCollection
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/crime")
+@cached("crime_rates")
 async def crime_rates(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
@@ -39,10 +47,11 @@ async def crime_rates(
     ]
 
 
-@router.get("/drug-seizures", response_model=GeoJSONFeatureCollection)
+@router.get("/drug-seizures", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("drug_seizures")
 async def drug_seizures_geojson(
     drug_type: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         DrugSeizure.id,
@@ -50,32 +59,19 @@ async def drug_seizures_geojson(
         DrugSeizure.drug_type,
         DrugSeizure.quantity_kg,
         DrugSeizure.department_id,
-        ST_AsGeoJSON(DrugSeizure.geometry).label("geom"),
+        geometry_column(DrugSeizure.geometry),
     ).where(DrugSeizure.geometry.isnot(None))
     if drug_type:
         stmt = stmt.where(DrugSeizure.drug_type == drug_type)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "date": str(r.date) if r.date else None,
-                "drug_type": r.drug_type,
-                "quantity_kg": r.quantity_kg,
-                "department_id": r.department_id,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, DrugSeizure), limit=spatial.limit)
 
 
-@router.get("/roads", response_model=GeoJSONFeatureCollection)
+@router.get("/roads", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("road_segments")
 async def roads_geojson(
     road_type: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         RoadSegment.id,
@@ -83,60 +79,32 @@ async def roads_geojson(
         RoadSegment.road_type,
         RoadSegment.condition,
         RoadSegment.length_km,
-        ST_AsGeoJSON(RoadSegment.geometry).label("geom"),
+        geometry_column(detail.geometry(RoadSegment)),
     ).where(RoadSegment.geometry.isnot(None))
     if road_type:
         stmt = stmt.where(RoadSegment.road_type == road_type)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "road_type": r.road_type,
-                "condition": r.condition,
-                "length_km": r.length_km,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, RoadSegment), limit=spatial.limit)
 
 
-@router.get("/prisons", response_model=GeoJSONFeatureCollection)
-async def prisons_geojson(db: AsyncSession = Depends(get_db)):
+@router.get("/prisons", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("prisons")
+async def prisons_geojson(spatial: SpatialFilter = Depends(spatial_filter)):
     stmt = select(
         Prison.id,
         Prison.name,
         Prison.department_id,
         Prison.capacity,
         Prison.population,
-        ST_AsGeoJSON(Prison.geometry).label("geom"),
+        geometry_column(Prison.geometry),
     ).where(Prison.geometry.isnot(None))
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "department_id": r.department_id,
-                "capacity": r.capacity,
-                "population": r.population,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, Prison), limit=spatial.limit)
 
 
-@router.get("/healthcare", response_model=GeoJSONFeatureCollection)
+@router.get("/healthcare", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("healthcare_facilities")
 async def healthcare_geojson(
     facility_type: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         HealthcareFacility.id,
@@ -144,23 +112,8 @@ async def healthcare_geojson(
         HealthcareFacility.facility_type,
         HealthcareFacility.department_id,
         HealthcareFacility.beds,
-        ST_AsGeoJSON(HealthcareFacility.geometry).label("geom"),
+        geometry_column(HealthcareFacility.geometry),
     ).where(HealthcareFacility.geometry.isnot(None))
     if facility_type:
         stmt = stmt.where(HealthcareFacility.facility_type == facility_type)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "name": r.name,
-                "facility_type": r.facility_type,
-                "department_id": r.department_id,
-                "beds": r.beds,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, HealthcareFacility), limit=spatial.limit)
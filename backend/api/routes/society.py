@@ -1,18 +1,26 @@
 from typing import Optional
-import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from geoalchemy2.functions import ST_AsGeoJSON
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.society import HDIIndex, LifeExpectancy, NutritionIndicator, CensusData, GenderGapIndex, BasicServices
-from schemas.common import GeoJSONFeatureCollection
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/hdi")
+@cached("hdi_index")
 async def hdi(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
@@ -38,38 +46,27 @@ async def hdi(
     ]
 
 
-@router.get("/hdi/geojson", response_model=GeoJSONFeatureCollection)
+@router.get("/hdi/geojson", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("hdi_index")
 async def hdi_geojson(
     year: Optional[int] = None,
-    db: AsyncSession = Depends(get_db),
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         HDIIndex.id,
         HDIIndex.year,
         HDIIndex.municipality,
         HDIIndex.hdi_score,
-        ST_AsGeoJSON(HDIIndex.geometry).label("geom"),
+        geometry_column(detail.geometry(HDIIndex)),
     ).where(HDIIndex.geometry.isnot(None))
     if year:
         stmt = stmt.where(HDIIndex.year == year)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {
-                "id": r.id,
-                "year": r.year,
-                "municipality": r.municipality,
-                "hdi_score": r.hdi_score,
-            },
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, HDIIndex), limit=spatial.limit)
 
 
 @router.get("/life-expectancy")
+@cached("life_expectancy")
 async def life_expectancy(
     year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
@@ -92,6 +89,7 @@ async def life_expectancy(
 
 
 @router.get("/census")
+@cached("census_data")
 async def census(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
@@ -119,6 +117,7 @@ async def census(
 
 
 @router.get("/gender-gap")
+@cached("gender_gap_index")
 async def gender_gap(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(GenderGapIndex).order_by(GenderGapIndex.year))
     records = result.scalars().all()
@@ -137,6 +136,7 @@ async def gender_gap(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/basic-services")
+@cached("basic_services")
 async def basic_services(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
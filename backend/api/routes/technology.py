@@ -1,18 +1,26 @@
 from typing import Optional
-import json
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from geoalchemy2.functions import ST_AsGeoJSON
 
+from cache import CachedRoute, cached, conditional
 from database import get_db
+from geo import (
+    GEOJSON_RESPONSES,
+    GeoJSONStreamingResponse,
+    GeometryDetail,
+    SpatialFilter,
+    geometry_column,
+    geometry_detail,
+    spatial_filter,
+)
 from models.technology import InternetPenetration, CoverageZone, RDSpending, DigitalLiteracy
-from schemas.common import GeoJSONFeatureCollection
 
-router = APIRouter()
+router = APIRouter(route_class=CachedRoute)
 
 
 @router.get("/internet-penetration")
+@cached("internet_penetration")
 async def internet_penetration(
     year: Optional[int] = None,
     department_id: Optional[int] = None,
@@ -39,32 +47,26 @@ async def internet_penetration(
     ]
 
 
-@router.get("/coverage", response_model=GeoJSONFeatureCollection)
+@router.get("/coverage", response_class=GeoJSONStreamingResponse, responses=GEOJSON_RESPONSES)
+@conditional("coverage_zones")
 async def coverage_geojson(
     technology: Optional[str] = Query(None, description="4G or 5G"),
-    db: AsyncSession = Depends(get_db),
+    detail: GeometryDetail = Depends(geometry_detail),
+    spatial: SpatialFilter = Depends(spatial_filter),
 ):
     stmt = select(
         CoverageZone.id,
         CoverageZone.operator,
         CoverageZone.technology,
-        ST_AsGeoJSON(CoverageZone.geometry).label("geom"),
+        geometry_column(detail.geometry(CoverageZone)),
     ).where(CoverageZone.geometry.isnot(None))
     if technology:
         stmt = stmt.where(CoverageZone.technology == technology)
-    rows = (await db.execute(stmt)).all()
-    features = [
-        {
-            "type": "Feature",
-            "geometry": json.loads(r.geom),
-            "properties": {"id": r.id, "operator": r.operator, "technology": r.technology},
-        }
-        for r in rows
-    ]
-    return {"type": "FeatureCollection", "features": features}
+    return await GeoJSONStreamingResponse.start(spatial.apply(stmt, CoverageZone), limit=spatial.limit)
 
 
 @router.get("/rd-spending")
+@cached("rd_spending")
 async def rd_spending(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(RDSpending).order_by(RDSpending.year))
     records = result.scalars().all()
@@ -80,6 +82,7 @@ async def rd_spending(db: AsyncSession = Depends(get_db)):
 
 
 @router.get("/digital-literacy")
+@cached("digital_literacy")
 async def digital_literacy(
     year: Optional[int] = None,
     db: AsyncSession = Depends(get_db),
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from cache import response_cache
+from conditional import resolve_validators
+from config import settings
+from database import get_db
+from tiles import MVT_MEDIA_TYPE, TILE_LAYERS, TileCache, get_layer, render_tile, tile_in_range
+
+router = APIRouter()
+
+tile_cache = TileCache(settings.TILE_CACHE_MAX_ENTRIES, settings.TILE_CACHE_TTL_SECONDS)
+
+
+@router.get("")
+async def list_tile_layers():
+    return [
+        {
+            "name": layer.name,
+            "table": layer.table,
+            "properties": list(layer.properties),
+            "min_zoom": layer.min_zoom,
+            "max_zoom": layer.max_zoom,
+            "tiles": f"/tiles/{layer.name}/{{z}}/{{x}}/{{y}}.mvt",
+        }
+        for layer in TILE_LAYERS.values()
+    ]
+
+
+@router.get(
+    "/{layer}/{z}/{x}/{y}.mvt",
+    response_class=Response,
+    responses={200: {"content": {MVT_MEDIA_TYPE: {}}}, 204: {"description": "Empty tile"}},
+)
+async def get_tile(
+    request: Request,
+    layer: str,
+    z: int = Path(..., ge=0, le=22),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    db: AsyncSession = Depends(get_db),
+):
+    tile_layer = get_layer(layer)
+    if tile_layer is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Unknown tile layer: {layer}")
+    if not tile_in_range(z, x, y):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Tile coordinates out of range")
+
+    headers = {"Cache-Control": f"public, max-age={settings.TILE_CACHE_TTL_SECONDS}"}
+    if not tile_layer.min_zoom <= z <= tile_layer.max_zoom:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+
+    validators = await resolve_validators(request, [tile_layer.table], response_cache.redis)
+    if validators is not None:
+        if validators.not_modified(request):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=validators.headers)
+        headers = {**validators.headers, **headers}
+
+    # The ETag changes with the table version, so edited layers never hit stale tiles.
+    key = (tile_layer.name, z, x, y, validators.etag if validators else None)
+    tile = tile_cache.get(key)
+    if tile is None:
+        tile = await render_tile(db, tile_layer, z, x, y)
+        tile_cache.set(key, tile)
+
+    if not tile:
+        return Response(status_code=status.HTTP_204_NO_CONTENT, headers=headers)
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers=headers)
@@ -1,6 +1,13 @@
+import base64
+import json
 from enum import Enum
-from typing import Any, Dict, List, Optional
-from pydantic import BaseModel
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from fastapi import HTTPException, status
+from pydantic import BaseModel, Field
+from sqlalchemy import bindparam, func, literal, select, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
 
 
 class ExportFormat(str, Enum):
@@ -10,9 +17,19 @@ class ExportFormat(str, Enum):
 
 
 class PaginatedResponse(BaseModel):
-    total: int
-    page: int
+    total: Optional[int] = Field(
+        None,
+        description="Number of matching rows: the query planner's estimate unless exact_total=true "
+        "was requested (see total_is_estimate)",
+    )
+    total_is_estimate: bool = False
+    page: Optional[int] = Field(
+        None,
+        description="Deprecated: offset page number, set when the page was requested with ?page=",
+        json_schema_extra={"deprecated": True},
+    )
     page_size: int
+    next_cursor: Optional[str] = None
     items: List[Any]
 
 
@@ -30,3 +47,83 @@ class GeoJSONFeature(BaseModel):
 class GeoJSONFeatureCollection(BaseModel):
     type: str = "FeatureCollection"
     features: List[Dict[str, Any]]
+
+
+def encode_cursor(*values: Any) -> str:
+    """Encode keyset values as an opaque, URL-safe continuation token."""
+    raw = json.dumps(list(values), separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> List[Any]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Malformed cursor") from exc
+    if not isinstance(values, list):
+        raise ValueError("Malformed cursor")
+    return values
+
+
+async def keyset_page(
+    db: AsyncSession,
+    stmt: Select,
+    keys: Sequence[Any],
+    cursor: Optional[str],
+    page_size: int,
+    descending: bool = False,
+    page: Optional[int] = None,
+) -> Tuple[List[Any], Optional[str]]:
+    """Fetch one page of ``stmt`` ordered by ``keys`` (non-null columns ending in a unique id).
+
+    The cursor stores the key values of the last row, so every page is a
+    ``(keys) > (cursor)`` index range scan regardless of its depth.
+    Returns the rows and the cursor for the following page (None on the last).
+    The deprecated 1-based offset ``page`` still works for old clients but
+    scans every row before it.
+    """
+    if cursor is not None and page is not None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Use either cursor or page")
+    if page is not None:
+        stmt = stmt.offset((page - 1) * page_size)
+    if cursor is not None:
+        try:
+            values = decode_cursor(cursor)
+            if len(values) != len(keys):
+                raise ValueError("Cursor does not match the sort keys")
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from None
+        row = tuple_(*keys)
+        after = tuple_(*(literal(value, key.type) for key, value in zip(keys, values)))
+        stmt = stmt.where(row < after if descending else row > after)
+    order = [key.desc() if descending else key for key in keys]
+    rows = (await db.execute(stmt.order_by(*order).limit(page_size + 1))).scalars().all()
+    if len(rows) <= page_size:
+        return list(rows), None
+    last = rows[page_size - 1]
+    return list(rows[:page_size]), encode_cursor(*(getattr(last, key.key) for key in keys))
+
+
+# Compiles statements with :name placeholders, which text() binds again.
+_EXPLAIN_DIALECT = postgresql.dialect(paramstyle="named")
+
+
+async def count_rows(db: AsyncSession, stmt: Select, exact: bool = False) -> Tuple[int, bool]:
+    """Row count of ``stmt`` as ``(total, is_estimate)``.
+
+    By default the planner's estimate is returned (derived from
+    ``pg_class.reltuples`` and column statistics), which costs an EXPLAIN
+    rather than a scan; ``exact=True`` runs ``count(*)``.
+    """
+    if exact:
+        total = (await db.execute(select(func.count()).select_from(stmt.subquery()))).scalar_one()
+        return total, False
+    compiled = stmt.compile(dialect=_EXPLAIN_DIALECT)
+    params = [bindparam(name, compiled.params[name], type_=bind.type) for bind, name in compiled.bind_names.items()]
+    explain = text(f"EXPLAIN (FORMAT JSON) {compiled}").bindparams(*params)
+    plan = (await db.execute(explain)).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"]), True
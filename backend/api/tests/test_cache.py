@@ -0,0 +1,176 @@
+"""Tests for the Redis response cache and the table-version mirror, against fakeredis."""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import APIRouter, FastAPI, Request, Response
+from httpx import ASGITransport, AsyncClient
+
+fakeredis = pytest.importorskip("fakeredis")
+
+UPDATED = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def _request(query=b""):
+    return Request({"type": "http", "method": "GET", "path": "/api/v1/economy/gdp", "query_string": query, "headers": []})
+
+
+@pytest.fixture
+def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def stored(monkeypatch):
+    """table_versions in Postgres, counting lookups."""
+    import conditional
+
+    versions = {"gdp_per_capita": (3, UPDATED)}
+    lookups: list = []
+
+    async def stored_versions(tables):
+        lookups.append(sorted(tables))
+        return {t: versions[t] for t in tables if t in versions}
+
+    monkeypatch.setattr(conditional, "_stored_versions", stored_versions)
+    return versions, lookups
+
+
+@pytest.fixture
+def response_cache(monkeypatch, server):
+    import cache
+
+    monkeypatch.setattr(cache.response_cache, "_redis", fakeredis.FakeAsyncRedis(server=server))
+    return cache.response_cache
+
+
+@pytest.fixture
+async def client(response_cache):
+    from cache import CachedRoute, cached
+
+    calls: list = []
+    router = APIRouter(route_class=CachedRoute)
+
+    @router.get("/gdp")
+    @cached("gdp_per_capita")
+    async def gdp(year: int = 2020):
+        calls.append(year)
+        return {"year": year, "calls": len(calls)}
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api/v1/economy")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        ac.calls = calls
+        yield ac
+
+
+def test_cache_key_normalises_the_query_string():
+    from cache import ResponseCache
+
+    key = ResponseCache._digest(_request(b"year=2020&department=1"), '"v1"')
+    assert key == ResponseCache._digest(_request(b"department=1&year=2020"), '"v1"')
+    assert key != ResponseCache._digest(_request(b"department=1&year=2021"), '"v1"')
+    assert key != ResponseCache._digest(_request(b"year=2020&department=1"), '"v2"')
+
+
+@pytest.mark.anyio
+async def test_cached_route_serves_hits_until_a_write(client, stored, server, monkeypatch):
+    import geo  # noqa: F401 – puts backend/ (the ``common`` package) on sys.path
+    from common import api_cache
+
+    versions, lookups = stored
+    first = await client.get("/api/v1/economy/gdp", params={"year": 2020})
+    second = await client.get("/api/v1/economy/gdp", params={"year": 2020})
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.json() == first.json() and client.calls == [2020]
+    # The second request read the version from its Redis mirror.
+    assert lookups == [["gdp_per_capita"]]
+
+    not_modified = await client.get("/api/v1/economy/gdp?year=2020", headers={"If-None-Match": first.headers["ETag"]})
+    assert not_modified.status_code == 304
+
+    versions["gdp_per_capita"] = (4, UPDATED)  # the trigger of migration 004
+    monkeypatch.setitem(api_cache._clients, "redis://fake", fakeredis.FakeRedis(server=server))
+    api_cache.invalidate_api_cache(["gdp_per_capita"], "redis://fake")
+
+    third = await client.get("/api/v1/economy/gdp", params={"year": 2020})
+    assert third.headers["X-Cache"] == "MISS"
+    assert third.headers["ETag"] != first.headers["ETag"]
+    assert client.calls == [2020, 2020]
+
+
+@pytest.mark.anyio
+async def test_untracked_tables_are_not_cached(client, stored):
+    versions, _ = stored
+    versions.clear()
+    first = await client.get("/api/v1/economy/gdp")
+    second = await client.get("/api/v1/economy/gdp")
+    assert "X-Cache" not in first.headers and "ETag" not in second.headers
+    assert client.calls == [2020, 2020]
+
+
+@pytest.mark.anyio
+async def test_waiter_gets_the_lock_holders_response(response_cache):
+    from cache import LOCK_KEY, RESPONSE_KEY
+
+    request = _request(b"year=2020")
+    digest = response_cache._digest(request, '"v1"')
+    await response_cache.redis.set(LOCK_KEY.format(digest=digest), b"1", px=5000)
+
+    async def handler(request):
+        raise AssertionError("a waiter must not query the database")
+
+    async def publish():
+        await asyncio.sleep(0.1)
+        await response_cache.redis.set(RESPONSE_KEY.format(digest=digest), b'{"year": 2020}')
+
+    response, _ = await asyncio.gather(response_cache.fetch(request, 60, handler, '"v1"'), publish())
+    assert response.headers["X-Cache"] == "HIT"
+    assert response.body == b'{"year": 2020}'
+
+
+@pytest.mark.anyio
+async def test_waiter_runs_the_handler_when_the_lock_times_out(response_cache, monkeypatch):
+    import cache
+    from cache import LOCK_KEY, RESPONSE_KEY
+
+    monkeypatch.setattr(cache.settings, "RESPONSE_CACHE_LOCK_MS", 200)
+    request = _request(b"year=2020")
+    digest = response_cache._digest(request, '"v1"')
+    await response_cache.redis.set(LOCK_KEY.format(digest=digest), b"1", px=5000)
+
+    async def handler(request):
+        return Response(content=b"{}", media_type="application/json")
+
+    response = await response_cache.fetch(request, 60, handler, '"v1"')
+    assert response.headers["X-Cache"] == "MISS"
+    # Only the lock holder stores the body.
+    assert await response_cache.redis.get(RESPONSE_KEY.format(digest=digest)) is None
+
+
+@pytest.mark.anyio
+async def test_redis_down_serves_uncached(response_cache, stored, monkeypatch):
+    import redis.asyncio as redis
+
+    from conditional import table_versions
+
+    class DownRedis:
+        def __getattr__(self, name):
+            async def fail(*args, **kwargs):
+                raise redis.ConnectionError("Redis is down")
+
+            return fail
+
+    monkeypatch.setattr(response_cache, "_redis", DownRedis())
+
+    async def handler(request):
+        return Response(content=b"{}", media_type="application/json")
+
+    response = await response_cache.fetch(_request(), 60, handler, '"v1"')
+    assert response.status_code == 200 and "X-Cache" not in response.headers
+    assert await table_versions(["gdp_per_capita"], response_cache.redis) == {"gdp_per_capita": (3, UPDATED)}
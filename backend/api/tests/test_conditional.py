@@ -0,0 +1,39 @@
+"""Unit tests for the ETag / Last-Modified helpers in conditional.py."""
+from datetime import datetime, timezone
+
+
+def _request(path="/api/v1/politics/tioc", query=b"", headers=()):
+    from starlette.requests import Request
+
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+    })
+
+
+def test_etag_changes_with_table_version_and_query():
+    from conditional import validators_for
+
+    updated = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+    base = validators_for(_request(query=b"zoom=5"), {"tioc_territories": (3, updated)})
+    assert base.etag == validators_for(_request(query=b"zoom=5"), {"tioc_territories": (3, updated)}).etag
+    assert base.etag != validators_for(_request(query=b"zoom=5"), {"tioc_territories": (4, updated)}).etag
+    assert base.etag != validators_for(_request(query=b"zoom=9"), {"tioc_territories": (3, updated)}).etag
+    assert base.headers["Last-Modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+
+
+def test_not_modified_prefers_if_none_match():
+    from conditional import validators_for
+
+    updated = datetime(2024, 5, 1, 12, 0, 30, 250, tzinfo=timezone.utc)
+    validators = validators_for(_request(), {"tioc_territories": (3, updated)})
+    since = ("If-Modified-Since", "Wed, 01 May 2024 12:00:30 GMT")
+
+    assert validators.not_modified(_request(headers=[("If-None-Match", f'"x", W/{validators.etag}')]))
+    assert not validators.not_modified(_request(headers=[("If-None-Match", '"stale"'), since]))
+    assert validators.not_modified(_request(headers=[since]))
+    assert not validators.not_modified(_request(headers=[("If-Modified-Since", "Wed, 01 May 2024 11:00:00 GMT")]))
+    assert not validators.not_modified(_request())
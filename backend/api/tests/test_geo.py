@@ -0,0 +1,111 @@
+"""Unit tests for the shared GeoJSON helpers in geo/."""
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_level_for_zoom():
+    from geo import level_for
+
+    assert level_for(zoom=3).column == "geom_overview"
+    assert level_for(zoom=8).column == "geom_simplified"
+    assert level_for(zoom=12) is None
+    assert level_for() is None
+
+
+def test_level_for_tolerance_wins_over_zoom():
+    from geo import level_for
+
+    assert level_for(zoom=3, tolerance=0.005).column == "geom_simplified"
+    assert level_for(zoom=12, tolerance=0.5).column == "geom_overview"
+    assert level_for(tolerance=0.0001) is None
+
+
+def test_simplified_geometry_falls_back_to_full_resolution():
+    from geo import level_for, simplified_geometry
+    from models.politics import TIOCTerritory
+    from models.security import RoadSegment
+
+    sql = str(simplified_geometry(TIOCTerritory, level_for(zoom=3)))
+    assert "coalesce(tioc_territories.geom_overview, tioc_territories.geometry)" in sql
+    sql = str(simplified_geometry(RoadSegment, level_for(zoom=3)))
+    assert "ST_SimplifyPreserveTopology" in sql
+
+
+def test_parse_bbox_rejects_inverted_box():
+    import pytest
+    from fastapi import HTTPException
+    from geo.filters import parse_bbox
+
+    assert parse_bbox("-69.6,-22.9,-57.4,-9.6") == (-69.6, -22.9, -57.4, -9.6)
+    with pytest.raises(HTTPException):
+        parse_bbox("-57.4,-22.9,-69.6,-9.6")
+    with pytest.raises(HTTPException):
+        parse_bbox("1,2,3")
+
+
+def test_parse_intersects_rejects_malformed_geometries():
+    import pytest
+    from fastapi import HTTPException
+    from geo.filters import parse_intersects
+
+    square = '{"type":"Polygon","coordinates":[[[-66,-17],[-65,-17],[-65,-16],[-66,-16],[-66,-17]]]}'
+    assert parse_intersects(square) == square
+    assert parse_intersects('{"type":"Feature","geometry":%s}' % square) == square
+    for value in (
+        '{"type":"Polygon","coordinates":[[[-66,-17],[-65,-17]]]}',  # ring too short
+        '{"type":"Point","coordinates":"nope"}',
+        '{"type":"LineString"}',
+        '{"type":"Polygon","coordinates":[]}',  # empty
+        '{"type":"Polygon","coordinates":[[[0,0],[1,1],[1,0],[0,1],[0,0]]]}',  # self-intersecting
+    ):
+        with pytest.raises(HTTPException) as exc:
+            parse_intersects(value)
+        assert exc.value.status_code == 400, value
+
+
+def test_spatial_filter_uses_index_operator():
+    from sqlalchemy import select
+    from geo import SpatialFilter
+    from models.environment import ForestFire
+
+    spatial = SpatialFilter(bbox=(-69.6, -22.9, -57.4, -9.6), limit=100, after_id=42)
+    sql = str(spatial.apply(select(ForestFire.id), ForestFire))
+    assert "CAST(forest_fires.geometry AS geometry) && ST_MakeEnvelope" in sql
+    assert "ST_Intersects(CAST(forest_fires.geometry AS geometry), ST_MakeEnvelope" in sql
+    assert "geography" not in sql
+    assert "forest_fires.id >" in sql
+    assert "ORDER BY forest_fires.id" in sql
+
+
+@pytest.mark.anyio
+async def test_geojson_response_reads_first_chunk_before_status(monkeypatch):
+    from geo import streaming
+
+    async def failing(stmt, limit=None):
+        raise RuntimeError("relation does not exist")
+        yield b""
+
+    monkeypatch.setattr(streaming, "stream_feature_collection", failing)
+    with pytest.raises(RuntimeError):
+        await streaming.GeoJSONStreamingResponse.start(None)
+
+    async def chunks(stmt, limit=None):
+        yield b'{"type":"FeatureCollection","features":['
+        yield b"]}"
+
+    monkeypatch.setattr(streaming, "stream_feature_collection", chunks)
+    response = await streaming.GeoJSONStreamingResponse.start(None)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    assert body == b'{"type":"FeatureCollection","features":[]}'
+    assert response.media_type == "application/geo+json"
+
+
+def test_geojson_routes_document_geojson_body():
+    from main import app
+
+    operation = app.openapi()["paths"]["/api/v1/environment/fires"]["get"]
+    assert list(operation["responses"]["200"]["content"]) == ["application/geo+json"]
@@ -0,0 +1,85 @@
+"""Unit tests for the keyset pagination helpers in schemas/common.py."""
+import pytest
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_cursor_round_trip():
+    from schemas.common import decode_cursor, encode_cursor
+
+    token = encode_cursor(2019, 4512)
+    assert "=" not in token
+    assert decode_cursor(token) == [2019, 4512]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor!")
+
+
+@pytest.mark.anyio
+async def test_keyset_page_rejects_mismatched_cursor():
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from models.economy import GDPPerCapita
+    from schemas.common import encode_cursor, keyset_page
+
+    keys = (GDPPerCapita.year, GDPPerCapita.id)
+    for cursor in ("not-a-cursor", encode_cursor(4512)):
+        with pytest.raises(HTTPException) as exc:
+            await keyset_page(None, select(GDPPerCapita), keys, cursor, 20)
+        assert exc.value.status_code == 400
+
+
+class _RecordingSession:
+    """Stands in for AsyncSession; records statements and returns ``result``."""
+
+    def __init__(self, result):
+        self.result = result
+        self.statements = []
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return self
+
+    def scalar_one(self):
+        return self.result
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self.result
+
+
+@pytest.mark.anyio
+async def test_count_rows_explains_with_bound_parameters():
+    from sqlalchemy import select
+    from models.economy import GDPPerCapita
+    from schemas.common import count_rows
+
+    db = _RecordingSession([{"Plan": {"Plan Rows": 42}}])
+    stmt = select(GDPPerCapita).where(GDPPerCapita.source == "x'); DROP TABLE gdp_per_capita; --")
+    assert await count_rows(db, stmt) == (42, True)
+
+    (explain,) = db.statements
+    compiled = explain.compile()
+    assert "DROP TABLE" not in str(compiled)
+    assert "DROP TABLE" in next(iter(compiled.params.values()))
+
+
+@pytest.mark.anyio
+async def test_keyset_page_keeps_deprecated_offset_pages():
+    from fastapi import HTTPException
+    from sqlalchemy import select
+    from models.economy import GDPPerCapita
+    from schemas.common import encode_cursor, keyset_page
+
+    keys = (GDPPerCapita.year, GDPPerCapita.id)
+    db = _RecordingSession([])
+    assert await keyset_page(db, select(GDPPerCapita), keys, None, 20, page=3) == ([], None)
+    assert db.statements[0]._offset == 40
+
+    with pytest.raises(HTTPException) as exc:
+        await keyset_page(db, select(GDPPerCapita), keys, encode_cursor(2019, 1), 20, page=3)
+    assert exc.value.status_code == 400
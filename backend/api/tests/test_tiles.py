@@ -0,0 +1,96 @@
+"""Tests for the vector tile subsystem that do not need a database."""
+import pytest
+from httpx import AsyncClient, ASGITransport
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    from main import app
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        yield ac
+
+
+def test_tile_in_range():
+    from tiles import tile_in_range
+
+    assert tile_in_range(0, 0, 0)
+    assert tile_in_range(3, 7, 7)
+    assert not tile_in_range(3, 8, 0)
+    assert not tile_in_range(0, 0, 1)
+
+
+def test_tile_cache_evicts_least_recently_used():
+    from tiles import TileCache
+
+    cache = TileCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert len(cache) == 2
+
+
+def test_tile_query_uses_index_predicate():
+    from tiles import get_layer, tile_query
+
+    sql = str(tile_query(get_layer("fires")))
+    assert "FROM forest_fires t" in sql
+    assert "t.geometry::geometry && bounds.filter_geom" in sql
+    assert "t.detected_date::text AS detected_date" in sql
+
+
+class _RecordingSession:
+    """Stands in for AsyncSession: records the tile query instead of running it."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def execute(self, statement, params):
+        self.calls.append((str(statement), params))
+        return self
+
+    def scalar_one_or_none(self):
+        return None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("z,x,y", [(0, 0, 0), (1, 0, 1)])
+async def test_low_zoom_tiles_filter_in_planar_coordinates(z, x, y):
+    # The z0 envelope spans -180..180 and the z1 ones 180 degrees of longitude:
+    # as geographies they are degenerate or get geodesic edges, so the
+    # bounding-box test must stay in planar 4326 coordinates.
+    from tiles import get_layer, render_tile
+
+    session = _RecordingSession()
+    assert await render_tile(session, get_layer("departments"), z, x, y) == b""
+    (sql, params), = session.calls
+    assert "t.geometry::geometry && bounds.filter_geom" in sql
+    assert "::geography" not in sql
+    assert (params["z"], params["x"], params["y"]) == (z, x, y)
+
+
+@pytest.mark.anyio
+async def test_list_tile_layers(client: AsyncClient):
+    response = await client.get("/api/v1/tiles")
+    assert response.status_code == 200
+    names = {layer["name"] for layer in response.json()}
+    assert {"deforestation", "roads", "coverage", "tioc"} <= names
+
+
+@pytest.mark.anyio
+async def test_unknown_tile_layer(client: AsyncClient):
+    response = await client.get("/api/v1/tiles/nope/0/0/0.mvt")
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_tile_out_of_range(client: AsyncClient):
+    response = await client.get("/api/v1/tiles/roads/2/4/0.mvt")
+    assert response.status_code == 400
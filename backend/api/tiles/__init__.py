@@ -0,0 +1,14 @@
+from tiles.cache import TileCache
+from tiles.mvt import MVT_MEDIA_TYPE, render_tile, tile_in_range, tile_query
+from tiles.registry import TILE_LAYERS, TileLayer, get_layer
+
+__all__ = [
+    "TileCache",
+    "MVT_MEDIA_TYPE",
+    "render_tile",
+    "tile_in_range",
+    "tile_query",
+    "TILE_LAYERS",
+    "TileLayer",
+    "get_layer",
+]
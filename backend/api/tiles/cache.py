@@ -0,0 +1,43 @@
+"""In-process LRU cache for rendered vector tiles."""
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional, Tuple
+
+
+class TileCache:
+    """Bounded LRU cache with a per-entry time-to-live.
+
+    Low-zoom tiles are requested by every map view and are the most expensive
+    to render, so keeping the hottest few thousand in memory removes most of
+    the tile traffic from PostgreSQL.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, bytes]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, tile = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return tile
+
+    def set(self, key: Hashable, tile: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, tile)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,99 @@
+"""Mapbox Vector Tile generation with PostGIS ``ST_AsMVT`` / ``ST_AsMVTGeom``."""
+from functools import lru_cache
+from typing import Optional
+
+from sqlalchemy import Date, DateTime, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import TextClause
+
+from config import settings
+from geo.simplify import level_for
+from tiles.registry import TileLayer
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+def tile_in_range(z: int, x: int, y: int) -> bool:
+    """Return True if (x, y) is a valid XYZ tile address at zoom ``z``."""
+    n = 1 << z
+    return 0 <= x < n and 0 <= y < n
+
+
+def _property_sql(layer: TileLayer, name: str) -> str:
+    # MVT attributes only carry strings, numbers and booleans.
+    if isinstance(layer.model.__table__.c[name].type, (Date, DateTime)):
+        return f"t.{name}::text AS {name}"
+    return f"t.{name}"
+
+
+def _geometry_column(layer: TileLayer, zoom: int) -> Optional[str]:
+    """Pre-simplified column to draw ``layer`` from at ``zoom``, if it has one."""
+    level = level_for(zoom=zoom)
+    if level is not None and level.column in layer.model.__table__.c:
+        return level.column
+    return None
+
+
+@lru_cache(maxsize=None)
+def tile_query(layer: TileLayer, simplified_column: Optional[str] = None) -> TextClause:
+    """Build the tile SQL for ``layer``.
+
+    The ``&&`` predicate compares planar 4326 bounding boxes, served by the
+    expression GiST index on ``geometry::geometry`` (migration 007), against
+    the tile envelope padded by the tile buffer so features that only reach
+    into the buffer are still rendered. It must not be a geography test: the
+    z0 envelope spans the whole antimeridian-to-antimeridian range, which is
+    degenerate as a geography, and at z1 geodesic edges bulge across the
+    tile. When ``simplified_column`` is given the tile is drawn from it
+    instead of the full geometry.
+    """
+    geometry = "t.geometry"
+    if simplified_column:
+        geometry = f"COALESCE(t.{simplified_column}, t.geometry)"
+    columns = ",\n               ".join(
+        ["t.id"] + [_property_sql(layer, p) for p in layer.properties]
+    )
+    return text(
+        f"""
+        WITH bounds AS (
+            SELECT ST_TileEnvelope(:z, :x, :y) AS geom,
+                   ST_Transform(
+                       ST_TileEnvelope(:z, :x, :y, margin => CAST(:margin AS float8)),
+                       4326
+                   ) AS filter_geom
+        ),
+        mvtgeom AS (
+            SELECT ST_AsMVTGeom(
+                       ST_Transform(({geometry})::geometry, 3857),
+                       bounds.geom,
+                       :extent,
+                       :buffer,
+                       true
+                   ) AS geom,
+               {columns}
+            FROM {layer.table} t, bounds
+            WHERE t.geometry::geometry && bounds.filter_geom
+        )
+        SELECT ST_AsMVT(mvtgeom.*, :layer, :extent, 'geom', 'id')
+        FROM mvtgeom
+        WHERE mvtgeom.geom IS NOT NULL
+        """
+    )
+
+
+async def render_tile(db: AsyncSession, layer: TileLayer, z: int, x: int, y: int) -> bytes:
+    """Render one tile of ``layer``; returns empty bytes when nothing intersects it."""
+    result = await db.execute(
+        tile_query(layer, _geometry_column(layer, z)),
+        {
+            "z": z,
+            "x": x,
+            "y": y,
+            "layer": layer.name,
+            "extent": settings.TILE_EXTENT,
+            "buffer": settings.TILE_BUFFER,
+            "margin": settings.TILE_BUFFER / settings.TILE_EXTENT,
+        },
+    )
+    tile = result.scalar_one_or_none()
+    return bytes(tile) if tile else b""
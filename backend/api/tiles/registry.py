@@ -0,0 +1,73 @@
+"""Registry of map layers that can be served as Mapbox Vector Tiles."""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from models.economy import Department, PublicContract
+from models.environment import (
+    DeforestationZone,
+    ProtectedArea,
+    MiningConcession,
+    LithiumSaltFlat,
+    ForestFire,
+)
+from models.politics import ElectionResult, SocialConflict, TIOCTerritory
+from models.security import DrugSeizure, RoadSegment, Prison, HealthcareFacility
+from models.society import HDIIndex
+from models.technology import CoverageZone
+
+
+@dataclass(frozen=True)
+class TileLayer:
+    """A tileable table: its ORM model and the columns exposed as MVT attributes.
+
+    ``id`` is always emitted as the MVT feature id, so it must not be listed in
+    ``properties``.
+    """
+
+    name: str
+    model: type
+    properties: Tuple[str, ...]
+    min_zoom: int = 0
+    max_zoom: int = 22
+
+    @property
+    def table(self) -> str:
+        return self.model.__tablename__
+
+    def __post_init__(self) -> None:
+        columns = self.model.__table__.c
+        missing = [p for p in self.properties if p not in columns]
+        if missing or "geometry" not in columns:
+            raise ValueError(f"Tile layer {self.name!r} references unknown columns: {missing}")
+
+
+_LAYERS: List[TileLayer] = [
+    # Economy
+    TileLayer("departments", Department, ("name", "code")),
+    TileLayer("contracts", PublicContract, ("title", "amount", "contractor", "department_id", "date")),
+    # Politics
+    TileLayer("elections", ElectionResult, ("year", "party", "candidate", "votes", "percentage")),
+    TileLayer("conflicts", SocialConflict, ("title", "type")),
+    TileLayer("tioc", TIOCTerritory, ("name", "ethnicity", "area_ha")),
+    # Technology
+    TileLayer("coverage", CoverageZone, ("operator", "technology")),
+    # Society
+    TileLayer("hdi", HDIIndex, ("year", "municipality", "hdi_score")),
+    # Environment
+    TileLayer("deforestation", DeforestationZone, ("year", "area_ha", "department_id")),
+    TileLayer("protected-areas", ProtectedArea, ("name", "category", "area_ha")),
+    TileLayer("mining", MiningConcession, ("name", "mineral", "company", "area_ha")),
+    TileLayer("lithium", LithiumSaltFlat, ("name", "estimated_reserves_mt")),
+    TileLayer("fires", ForestFire, ("detected_date", "confidence", "frp", "satellite")),
+    # Security
+    TileLayer("drug-seizures", DrugSeizure, ("date", "drug_type", "quantity_kg", "department_id")),
+    TileLayer("roads", RoadSegment, ("name", "road_type", "condition", "length_km")),
+    TileLayer("prisons", Prison, ("name", "department_id", "capacity", "population")),
+    TileLayer("healthcare", HealthcareFacility, ("name", "facility_type", "department_id", "beds")),
+]
+
+TILE_LAYERS: Dict[str, TileLayer] = {layer.name: layer for layer in _LAYERS}
+
+
+def get_layer(name: str) -> Optional[TileLayer]:
+    return TILE_LAYERS.get(name)
@@ -0,0 +1,6 @@
+"""Code shared by the ETL pipelines and the scraper.
+
+The ETL runs from ``backend/``; the API's ``geo`` package and
+``bolivia_scraper`` put ``backend/`` on ``sys.path`` (their images copy this
+package to ``/app/common``).
+"""
@@ -0,0 +1,45 @@
+"""Invalidation of the API's table versions by data writers.
+
+The API derives ETags and response-cache keys from the trigger-maintained
+``table_versions`` rows, mirrored in Redis for a short TTL (see
+``backend/api/conditional.py``). Deleting a table's mirror after a write
+makes the next request read its new version instead of waiting for the TTL.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+# Must match VERSION_KEY in backend/api/conditional.py.
+VERSION_KEY = "cache:version:{table}"
+
+_clients: Dict[str, redis.Redis] = {}
+_clients_lock = threading.Lock()
+
+
+def _client(url: str) -> redis.Redis:
+    """One client (and connection pool) per Redis URL for the whole process."""
+    with _clients_lock:
+        if url not in _clients:
+            _clients[url] = redis.from_url(url, socket_connect_timeout=1)
+        return _clients[url]
+
+
+def invalidate_api_cache(tables: Iterable[str], redis_url: Optional[str] = None) -> None:
+    """Drop the mirrored version of each table so the API picks up the write at once.
+
+    Failures are logged, not raised: the data is already written and the
+    mirror expires on its own within seconds.
+    """
+    tables = sorted(set(tables))
+    if not tables:
+        return
+    try:
+        client = _client(redis_url or os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+        client.delete(*(VERSION_KEY.format(table=table) for table in tables))
+    except Exception as exc:
+        logger.warning("Could not invalidate API cache for %s: %s", tables, exc)
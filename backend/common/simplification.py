@@ -0,0 +1,21 @@
+"""The precomputed geometry simplification levels.
+
+The ETL (``backend/etl/simplification.py``) fills one ``geom_*`` column per
+level; the API (``backend/api/geo/simplify.py``) picks the column for a
+request's zoom or tolerance.
+"""
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class SimplificationLevel:
+    column: str
+    tolerance: float  # degrees
+    max_zoom: int
+
+
+# Coarsest first. Zooms above the last level get the full-resolution geometry.
+SIMPLIFICATION_LEVELS = (
+    SimplificationLevel("geom_overview", tolerance=0.01, max_zoom=6),
+    SimplificationLevel("geom_simplified", tolerance=0.001, max_zoom=9),
+)
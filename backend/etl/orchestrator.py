@@ -0,0 +1,200 @@
+"""Run ETL pipelines concurrently in dependency order.
+
+Every concrete ``ETLPipeline`` subclass in the ``etl`` package is
+discovered; a pipeline may list the names of pipelines it needs in
+``depends_on``. A pipeline starts in a worker process as soon as all its
+dependencies have finished, so a full refresh takes as long as the
+critical path rather than the sum of all pipelines. Failures are retried;
+the dependents of a pipeline that keeps failing are skipped. A worker that
+dies takes the process pool down with it: the pipelines it was running
+count a failed attempt and a new pool is started. A summary with
+per-pipeline status, attempts and timings is logged at the end.
+
+Usage (from backend/):
+    python -m etl.orchestrator                      # all pipelines
+    python -m etl.orchestrator geometry_simplification --workers 4 --retries 2
+"""
+import argparse
+import importlib
+import inspect
+import logging
+import os
+import pkgutil
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import etl
+from etl.pipeline import ETLPipeline
+
+logger = logging.getLogger(__name__)
+
+LOADED = "loaded"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+@dataclass
+class PipelineResult:
+    name: str
+    status: str
+    attempts: int = 0
+    seconds: float = 0.0  # all attempts, from submission to completion
+    error: Optional[str] = None
+
+
+def discover_pipelines() -> Dict[str, type]:
+    """Pipeline name → class for every concrete ETLPipeline subclass in the etl package."""
+    for module in pkgutil.iter_modules(etl.__path__):
+        if module.name != "orchestrator":
+            importlib.import_module(f"etl.{module.name}")
+
+    pipelines: Dict[str, type] = {}
+    pending = list(ETLPipeline.__subclasses__())
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        if inspect.isabstract(cls):
+            continue
+        if cls.name in pipelines and pipelines[cls.name] is not cls:
+            raise ValueError(f"Duplicate pipeline name {cls.name!r}: {pipelines[cls.name]} and {cls}")
+        pipelines[cls.name] = cls
+    return pipelines
+
+
+def _closure(pipelines: Dict[str, type], names: Iterable[str]) -> Dict[str, type]:
+    """``names`` plus everything they depend on, transitively."""
+    selected: Dict[str, type] = {}
+    stack = list(names)
+    while stack:
+        name = stack.pop()
+        if name in selected:
+            continue
+        if name not in pipelines:
+            raise ValueError(f"Unknown pipeline {name!r}. Available: {sorted(pipelines)}")
+        selected[name] = pipelines[name]
+        stack.extend(pipelines[name].depends_on)
+    return selected
+
+
+def _check_acyclic(pipelines: Dict[str, type]) -> None:
+    visiting, done = set(), set()
+
+    def visit(name: str, path: Tuple[str, ...]) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle: {' -> '.join(path + (name,))}")
+        visiting.add(name)
+        for dep in pipelines[name].depends_on:
+            visit(dep, path + (name,))
+        visiting.discard(name)
+        done.add(name)
+
+    for name in pipelines:
+        visit(name, ())
+
+
+def _run_pipeline(module: str, qualname: str) -> bool:
+    """Worker-process entry point: instantiate and run one pipeline."""
+    cls = getattr(importlib.import_module(module), qualname)
+    return cls().run()
+
+
+def run_pipelines(
+    names: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+    retries: int = 1,
+) -> Dict[str, PipelineResult]:
+    """Run ``names`` (default: all) and their dependencies; return a result per pipeline."""
+    available = discover_pipelines()
+    pipelines = _closure(available, names if names else available)
+    _check_acyclic(pipelines)
+
+    results = {name: PipelineResult(name, SKIPPED) for name in pipelines}
+    waiting = dict(pipelines)
+    running: Dict[Future, str] = {}
+    submitted_at: Dict[Future, float] = {}
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+
+    def submit(name: str) -> None:
+        nonlocal pool
+        cls = pipelines[name]
+        results[name].attempts += 1
+        try:
+            future = pool.submit(_run_pipeline, cls.__module__, cls.__qualname__)
+        except BrokenProcessPool:
+            logger.warning("A worker process died; starting a new pool")
+            pool.shutdown(wait=False, cancel_futures=True)
+            pool = ProcessPoolExecutor(max_workers=workers)
+            future = pool.submit(_run_pipeline, cls.__module__, cls.__qualname__)
+        running[future] = name
+        submitted_at[future] = time.perf_counter()
+
+    def schedule() -> None:
+        for name, cls in list(waiting.items()):
+            if any(dep in waiting or dep in running.values() for dep in cls.depends_on):
+                continue
+            del waiting[name]
+            if all(results[dep].status in (LOADED, UNCHANGED) for dep in cls.depends_on):
+                submit(name)
+            else:
+                results[name].error = "dependency failed"
+                logger.warning("[%s] Skipped: a dependency failed", name)
+
+    try:
+        schedule()
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                result = results[name]
+                result.seconds += time.perf_counter() - submitted_at.pop(future)
+                try:
+                    changed = future.result()
+                except Exception as exc:
+                    if result.attempts <= retries:
+                        logger.warning("[%s] Attempt %d failed, retrying: %s", name, result.attempts, exc)
+                        submit(name)
+                        continue
+                    result.status, result.error = FAILED, str(exc)
+                    logger.error("[%s] Failed after %d attempts: %s", name, result.attempts, exc)
+                else:
+                    result.status = LOADED if changed else UNCHANGED
+            schedule()
+    finally:
+        pool.shutdown(cancel_futures=True)
+        _log_summary(results, time.perf_counter() - started)
+    return results
+
+
+def _log_summary(results: Dict[str, PipelineResult], wall_seconds: float) -> None:
+    lines: List[str] = [f"ETL run finished in {wall_seconds:.1f}s"]
+    for result in sorted(results.values(), key=lambda r: r.name):
+        line = f"  {result.name:<32} {result.status:<9} attempts={result.attempts} {result.seconds:8.1f}s"
+        if result.error:
+            line += f"  ({result.error})"
+        lines.append(line)
+    logger.info("\n".join(lines))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run ETL pipelines in dependency order.")
+    parser.add_argument("pipelines", nargs="*", help="pipeline names (default: all)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--retries", type=int, default=1, help="retries per failing pipeline")
+    args = parser.parse_args()
+
+    results = run_pipelines(args.pipelines, args.workers, args.retries)
+    if any(r.status in (FAILED, SKIPPED) for r in results.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
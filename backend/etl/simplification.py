@@ -0,0 +1,113 @@
+"""Precompute zoom-level geometry simplifications for the polygon layers.
+
+For every table in SIMPLIFIED_TABLES whose rows changed since the last run,
+each column of DEFAULT_SIMPLIFICATION_LEVELS is filled inside PostGIS with
+``ST_SimplifyPreserveTopology`` so the geometries never leave the database.
+
+Usage (from backend/):
+    python -m etl.simplification
+"""
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+import psycopg2
+from psycopg2 import sql
+
+from etl.geojson_processor import DEFAULT_SIMPLIFICATION_LEVELS
+from etl.pipeline import ETLPipeline, sync_dsn
+
+logger = logging.getLogger(__name__)
+
+SIMPLIFIED_TABLES = (
+    "departments",
+    "tioc_territories",
+    "protected_areas",
+    "deforestation_zones",
+    "coverage_zones",
+    "hdi_index",
+)
+
+
+_FINGERPRINT = sql.SQL(
+    "SELECT count(*), (SELECT version FROM table_versions WHERE table_name = %s) "
+    "FROM {} WHERE geometry IS NOT NULL"
+)
+_SIMPLIFY = sql.SQL(
+    "UPDATE {table} SET {column} = ST_SimplifyPreserveTopology(geometry::geometry, %s)::geography "
+    "WHERE geometry IS NOT NULL"
+)
+
+
+class GeometrySimplificationPipeline(ETLPipeline):
+    """Refresh the simplified geometry columns of the polygon tables that changed.
+
+    Each table is a partition whose fingerprint is its row count, its
+    ``table_versions`` counter (bumped by a trigger on every write, migration
+    004, so raw-SQL upserts that leave ``updated_at`` alone are still noticed)
+    and the tolerances, so changing a level forces a rebuild.
+    """
+
+    name = "geometry_simplification"
+    partitioned = True
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        tables: Iterable[str] = SIMPLIFIED_TABLES,
+        levels: Optional[Dict[str, float]] = None,
+    ):
+        super().__init__()
+        self.dsn = dsn or sync_dsn()
+        self.tables = tuple(tables)
+        self.levels = dict(levels or DEFAULT_SIMPLIFICATION_LEVELS)
+        self._loaded: Dict[str, Dict[str, Any]] = {}
+
+    def extract(self) -> Dict[str, Dict[str, Any]]:
+        """Return the fingerprint of every table."""
+        with psycopg2.connect(self.dsn) as conn, conn.cursor() as cur:
+            return {table: self._fingerprint(cur, table) for table in self.tables}
+
+    def transform(self, raw: Dict[str, Any]) -> Dict[str, Any]:
+        return raw
+
+    def load(self, data: Any) -> None:
+        raise NotImplementedError("tables are simplified one at a time by load_partition()")
+
+    def load_partition(self, key: str, data: Dict[str, Any]) -> None:
+        """Simplify every level of table ``key`` in one transaction."""
+        conn = psycopg2.connect(self.dsn)
+        try:
+            with conn.cursor() as cur:
+                if data["rows"]:
+                    for column, tolerance in self.levels.items():
+                        cur.execute(
+                            _SIMPLIFY.format(table=sql.Identifier(key), column=sql.Identifier(column)),
+                            (tolerance,),
+                        )
+                        logger.info(
+                            "[%s] %s.%s: %d rows simplified (tolerance %s)",
+                            self.name, key, column, cur.rowcount, tolerance,
+                        )
+                # Our UPDATEs locked the table's version row until commit, so
+                # the counter read here includes our writes and no one else's.
+                self._loaded[key] = self._fingerprint(cur, key)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def delete_partition(self, key: str) -> None:
+        # A table dropped from ``tables`` keeps its columns; only forget it.
+        logger.info("[%s] %s is no longer simplified", self.name, key)
+
+    def loaded_partition_hash(self, key: str, source_hash: str) -> str:
+        return self._compute_hash(self._loaded.pop(key))
+
+    def _fingerprint(self, cur: Any, table: str) -> Dict[str, Any]:
+        cur.execute(_FINGERPRINT.format(sql.Identifier(table)), (table,))
+        rows, version = cur.fetchone()
+        return {"rows": rows, "version": version, "levels": self.levels}
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    GeometrySimplificationPipeline().run()
@@ -0,0 +1,117 @@
+"""Tests for the columnar point builders of etl/geojson_processor.py."""
+import io
+import json
+
+import numpy as np
+import shapely
+
+from etl.geojson_processor import csv_to_geojson, point_columns
+
+ROWS = [
+    {"latitude": "-16.5", "longitude": "-68.15", "name": "La Paz", "tags": ["sede"], "meta": {"alt": 3640}},
+    {"latitude": -17.78, "longitude": -63.18, "name": "Santa Cruz"},
+    {"latitude": "n/a", "longitude": -65.0, "name": "skipped"},
+    {"latitude": -19.03, "longitude": -65.26, "name": "Sucre\t50%", "note": None},
+]
+
+
+def test_ewkb_matches_shapely():
+    columns = point_columns(ROWS)
+    geoms = shapely.set_srid(columns.geometries(), 4326)
+
+    assert columns.to_wkb().tolist() == shapely.to_wkb(geoms, include_srid=True, byte_order=1).tolist()
+    expected = shapely.to_wkb(geoms, hex=True, include_srid=True, byte_order=1)
+    assert columns.to_wkb(hex=True).tolist() == expected.tolist()
+
+
+def test_features_keep_per_row_keys():
+    features = csv_to_geojson(ROWS)["features"]
+
+    assert [f["properties"] for f in features] == [
+        {"name": "La Paz", "tags": ["sede"], "meta": {"alt": 3640}},
+        {"name": "Santa Cruz"},
+        {"name": "Sucre\t50%", "note": None},
+    ]
+    listed = csv_to_geojson(ROWS, properties=["name", "note"])["features"]
+    assert listed[1]["properties"] == {"name": "Santa Cruz", "note": None}
+
+
+def test_write_geojson_round_trip():
+    for rows in (ROWS, [row for row in ROWS if "note" not in row and "tags" not in row]):
+        columns = point_columns(rows)
+        out = io.StringIO()
+        columns.write_geojson(out)
+
+        assert json.loads(out.getvalue()) == {"type": "FeatureCollection", "features": columns.to_features()}
+
+
+def test_copy_buffer_encodes_json_and_nulls():
+    columns = point_columns(ROWS)
+    lines = columns.to_copy_buffer(["name", "tags", "meta", "note"]).read().splitlines()
+
+    first = lines[0].split("\t")
+    assert first[:4] == ["La Paz", '["sede"]', '{"alt": 3640}', "\\N"]
+    assert first[4] == columns.to_wkb(hex=True)[0]
+    assert lines[2].split("\t")[0] == "Sucre\\t50%"
+    assert np.array_equal(columns.lat, [-16.5, -17.78, -19.03])
+
+
+SQUARE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]]}
+BOWTIE = {"type": "Polygon", "coordinates": [[[0, 0], [1, 1], [1, 0], [0, 1], [0, 0]]]}
+
+
+def test_parse_geometries_mixes_dicts_text_and_none():
+    from etl.geojson_processor import parse_geometries
+
+    geoms = parse_geometries([SQUARE, json.dumps(BOWTIE), None, {}])
+
+    assert geoms[0].wkt == shapely.geometry.shape(SQUARE).wkt
+    assert geoms[1].wkt == shapely.geometry.shape(BOWTIE).wkt
+    assert geoms[2] is None and geoms[3] is None
+
+
+def test_validate_geometries_reports_and_repairs():
+    from etl.geojson_processor import parse_geometries, validate_geometries
+
+    geoms = parse_geometries([SQUARE, BOWTIE, None])
+    checked, reports = validate_geometries(geoms)
+    assert [(r.valid, r.repaired) for r in reports] == [(True, False), (False, False), (False, False)]
+    assert reports[1].reason.startswith("Self-intersection")
+    assert reports[2].reason == "Missing geometry"
+    assert checked is geoms
+
+    repaired, reports = validate_geometries(geoms, repair=True)
+    assert [r.repaired for r in reports] == [False, True, False]
+    assert repaired[1].is_valid and repaired[1].geom_type == "MultiPolygon"
+    assert not geoms[1].is_valid
+
+
+def test_validate_geometries_only_claims_repairs_it_made(caplog):
+    from etl.geojson_processor import parse_geometries, validate_geometries
+
+    validate_geometries(parse_geometries([SQUARE, None]), repair=True)
+
+    assert "1 missing" in caplog.text
+    assert "repaired" not in caplog.text
+
+
+def test_simplify_features_keeps_members_and_repairs():
+    from etl.geojson_processor import simplify_features
+
+    collection = {
+        "type": "FeatureCollection",
+        "name": "zones",
+        "features": [
+            {"type": "Feature", "id": 1, "geometry": BOWTIE, "properties": {"a": 1}},
+            {"type": "Feature", "id": 2, "geometry": None, "properties": {"a": 2}},
+        ],
+    }
+    simplified, reports = simplify_features(collection, tolerance=0.01)
+
+    assert simplified["name"] == "zones"
+    assert [f["id"] for f in simplified["features"]] == [1, 2]
+    assert simplified["features"][0]["properties"] == {"a": 1}
+    assert simplified["features"][0]["geometry"]["type"] == "MultiPolygon"
+    assert simplified["features"][1]["geometry"] is None
+    assert [r.repaired for r in reports] == [True, False]
+    assert collection["features"][0]["geometry"] is BOWTIE
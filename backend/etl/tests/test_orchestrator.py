@@ -0,0 +1,134 @@
+"""Tests for etl.orchestrator, run with dummy pipelines in real worker processes."""
+import logging
+import os
+import time
+
+import pytest
+
+from etl import orchestrator
+from etl.pipeline import ETLPipeline
+
+
+class DummyPipeline(ETLPipeline):
+    """Logs its start and end to ``log`` instead of extracting anything."""
+
+    log = None
+    fail = False
+    crash_once = False
+
+    def __init__(self):
+        self.hash_store_dir = self.log.parent
+        super().__init__()
+
+    def extract(self):
+        return None
+
+    def transform(self, raw):
+        return raw
+
+    def load(self, data):
+        pass
+
+    def _record(self, event):
+        with open(self.log, "a") as fp:
+            fp.write(f"{event} {self.name}\n")
+
+    def run(self):
+        self._record("start")
+        marker = self.log.parent / f"{self.name}.crashed"
+        if self.crash_once and not marker.exists():
+            marker.touch()
+            os._exit(1)
+        time.sleep(0.05)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        self._record("end")
+        return True
+
+
+class Source(DummyPipeline):
+    name = "source"
+
+
+class Boundaries(DummyPipeline):
+    name = "boundaries"
+
+
+class Joined(DummyPipeline):
+    name = "joined"
+    depends_on = ("source", "boundaries")
+
+
+class Report(DummyPipeline):
+    name = "report"
+    depends_on = ("joined",)
+
+
+DUMMIES = {cls.name: cls for cls in (Source, Boundaries, Joined, Report)}
+
+
+@pytest.fixture
+def log(tmp_path, monkeypatch):
+    path = tmp_path / "events.log"
+    monkeypatch.setattr(DummyPipeline, "log", path)
+    monkeypatch.setattr(orchestrator, "discover_pipelines", lambda: dict(DUMMIES))
+    return path
+
+
+def _events(log):
+    return [tuple(line.split()) for line in log.read_text().splitlines()]
+
+
+def test_dependencies_finish_before_dependents_start(log):
+    results = orchestrator.run_pipelines(["report"], workers=2)
+
+    assert {name: r.status for name, r in results.items()} == dict.fromkeys(DUMMIES, orchestrator.LOADED)
+    events = _events(log)
+    for cls in DUMMIES.values():
+        for dep in cls.depends_on:
+            assert events.index(("end", dep)) < events.index(("start", cls.name))
+
+
+def test_only_requested_pipelines_and_their_dependencies_run(log):
+    results = orchestrator.run_pipelines(["source"], workers=2)
+
+    assert list(results) == ["source"]
+    assert _events(log) == [("start", "source"), ("end", "source")]
+
+
+def test_dependents_of_a_failing_pipeline_are_skipped(log, monkeypatch):
+    monkeypatch.setattr(Boundaries, "fail", True)
+
+    results = orchestrator.run_pipelines(workers=2, retries=1)
+
+    assert results["source"].status == orchestrator.LOADED
+    assert (results["boundaries"].status, results["boundaries"].attempts) == (orchestrator.FAILED, 2)
+    assert results["joined"].status == results["report"].status == orchestrator.SKIPPED
+    assert results["joined"].attempts == 0
+    assert ("start", "joined") not in _events(log)
+
+
+def test_dead_worker_is_retried_on_a_new_pool(log, monkeypatch, caplog):
+    monkeypatch.setattr(Source, "crash_once", True)
+
+    with caplog.at_level(logging.INFO, logger=orchestrator.__name__):
+        results = orchestrator.run_pipelines(["report"], workers=1, retries=1)
+
+    assert all(r.status == orchestrator.LOADED for r in results.values())
+    assert results["source"].attempts == 2
+    assert "ETL run finished" in caplog.text
+
+
+def test_dependency_cycles_are_rejected(monkeypatch):
+    class First(DummyPipeline):
+        name = "first"
+        depends_on = ("second",)
+
+    class Second(DummyPipeline):
+        name = "second"
+        depends_on = ("first",)
+
+    monkeypatch.setattr(orchestrator, "discover_pipelines", lambda: {"first": First, "second": Second})
+
+    with pytest.raises(ValueError, match="Dependency cycle: first -> second -> first"):
+        orchestrator.run_pipelines(["first"])
@@ -0,0 +1,305 @@
+"""Tests for ETLPipeline's chunked and partitioned runs, with the database faked out."""
+import pytest
+
+from etl.pipeline import ETLPipeline
+
+
+class FakeDatabase:
+    """Stands in for psycopg2.connect: one transaction per connection, rows keyed by partition."""
+
+    def __init__(self):
+        self.rows: dict = {}
+        self.deleted: list = []
+        self.fail_delete = False
+        self.fail_insert = False
+
+    def connect(self, dsn):
+        return FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+        self.pending: list = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        for apply in self.pending:
+            apply()
+        self.pending = []
+
+    def close(self):
+        self.pending = []
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, query, params):
+        db = self.conn.db
+        if db.fail_delete:
+            raise RuntimeError("database unavailable")
+        (key,) = params
+        self.conn.pending.append(lambda: (db.deleted.append(key), db.rows.pop(key, None)))
+
+    def insert(self, key, data):
+        db = self.conn.db
+        if db.fail_insert:
+            raise RuntimeError("bad row")
+        self.conn.pending.append(lambda: db.rows.__setitem__(key, data))
+
+
+class PartitionedPipeline(ETLPipeline):
+    name = "partitioned"
+    tables = ("forest_fires",)
+    partitioned = True
+    partition_column = "year"
+
+    def __init__(self, hash_store_dir, raw):
+        self.hash_store_dir = hash_store_dir
+        super().__init__()
+        self.raw = raw
+
+    def extract(self):
+        return self.raw
+
+    def transform(self, raw):
+        return raw
+
+    def load(self, data):
+        raise AssertionError("partitions are loaded through load_rows()")
+
+    def load_rows(self, cur, data):
+        cur.insert(data["year"], data["rows"])
+
+    def partition(self, raw):
+        return ((year, {"year": year, "rows": rows}) for year, rows in raw.items())
+
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeDatabase()
+    monkeypatch.setattr("etl.pipeline.psycopg2.connect", db.connect)
+    return db
+
+
+def test_partitioned_pipeline_needs_a_way_to_delete(tmp_path):
+    class Unpartitionable(ETLPipeline):
+        name = "unpartitionable"
+        partitioned = True
+        hash_store_dir = tmp_path
+        extract = transform = load = lambda self, *args: None
+
+    with pytest.raises(TypeError, match="partition_column"):
+        Unpartitionable()
+
+
+def test_partition_column_needs_load_rows(tmp_path):
+    class RowlessPipeline(ETLPipeline):
+        name = "rowless"
+        partitioned = True
+        partition_column = "year"
+        hash_store_dir = tmp_path
+        extract = transform = load = lambda self, *args: None
+
+    with pytest.raises(TypeError, match="load_rows"):
+        RowlessPipeline()
+
+
+def test_changed_partitions_are_replaced(tmp_path, db):
+    pipeline = PartitionedPipeline(tmp_path, {"2022": [1], "2023": [2]})
+    assert pipeline.run()
+    assert db.deleted == ["2022", "2023"]
+    assert db.rows == {"2022": [1], "2023": [2]}
+
+    pipeline.raw = {"2022": [1], "2023": [2, 3]}
+    db.deleted = []
+    assert pipeline.run()
+    assert db.deleted == ["2023"]
+    assert db.rows == {"2022": [1], "2023": [2, 3]}
+
+
+def test_failed_load_keeps_the_old_partition_rows(tmp_path, db):
+    pipeline = PartitionedPipeline(tmp_path, {"2023": [2]})
+    pipeline.run()
+
+    pipeline.raw = {"2023": [2, 3]}
+    db.fail_insert = True
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    # The delete was rolled back with the insert.
+    assert db.rows == {"2023": [2]}
+    assert pipeline._load_manifest()["2023"] != pipeline._compute_hash({"year": "2023", "rows": [2, 3]})
+
+
+def test_removed_partition_stays_in_manifest_until_deleted(tmp_path, db):
+    pipeline = PartitionedPipeline(tmp_path, {"2022": [1], "2023": [2]})
+    pipeline.run()
+
+    pipeline.raw = {"2023": [2]}
+    db.fail_delete = True
+    with pytest.raises(RuntimeError):
+        pipeline.run()
+    assert "2022" in pipeline._load_manifest()
+
+    db.fail_delete = False
+    db.deleted = []
+    assert pipeline.run()
+    assert db.deleted == ["2022"]
+    assert db.rows == {"2023": [2]}
+    assert pipeline._load_manifest() == {"2023": pipeline._compute_hash({"year": "2023", "rows": [2]})}
+
+
+def test_bounded_reraises_producer_errors():
+    from etl.pipeline import _bounded
+
+    def chunks():
+        yield 1
+        raise ValueError("bad chunk")
+
+    consumed = []
+    with pytest.raises(ValueError, match="bad chunk"):
+        for item in _bounded(chunks(), 1):
+            consumed.append(item)
+    assert consumed == [1]
+
+
+def test_bounded_stops_producer_when_consumer_stops():
+    import itertools
+    import threading
+
+    from etl.pipeline import _bounded
+
+    produced = []
+
+    def chunks():
+        for i in itertools.count():
+            produced.append(i)
+            yield i
+
+    stream = _bounded(chunks(), 2)
+    assert [next(stream), next(stream)] == [0, 1]
+    stream.close()
+
+    assert not any(t.name == "etl-chunks" for t in threading.enumerate())
+    assert len(produced) <= 5
+
+
+class ChunkedPipeline(ETLPipeline):
+    name = "chunked"
+    chunked = True
+
+    def __init__(self, hash_store_dir, chunks, fail_on=None):
+        self.hash_store_dir = hash_store_dir
+        super().__init__()
+        self.chunks = chunks
+        self.fail_on = fail_on
+        self.loaded: list = []
+
+    def extract(self):
+        return iter(self.chunks)
+
+    def transform(self, raw):
+        if raw == self.fail_on:
+            raise ValueError(f"cannot transform {raw}")
+        return [value * 10 for value in raw]
+
+    def load(self, data):
+        for chunk in data:
+            self.loaded.append(chunk)
+
+
+def test_chunked_run_streams_chunks_and_skips_unchanged_source(tmp_path):
+    pipeline = ChunkedPipeline(tmp_path, [[1, 2], [3]])
+    assert pipeline.run()
+    assert pipeline.loaded == [[10, 20], [30]]
+
+    pipeline.loaded = []
+    assert not pipeline.run()
+    assert pipeline.loaded == []
+
+
+def test_chunked_hash_is_stable_for_the_same_chunks(tmp_path):
+    ChunkedPipeline(tmp_path, [[1, 2], [3]]).run()
+    assert not ChunkedPipeline(tmp_path, [[1, 2], [3]]).run()
+    regrouped = ChunkedPipeline(tmp_path, [[1], [2, 3]])
+    assert regrouped.run()
+    assert not ChunkedPipeline(tmp_path, [[1], [2, 3]]).run()
+
+
+def test_chunked_transform_error_reaches_load_and_keeps_hash(tmp_path):
+    pipeline = ChunkedPipeline(tmp_path, [[1], [2], [3]], fail_on=[2])
+    with pytest.raises(ValueError, match="cannot transform"):
+        pipeline.run()
+    assert pipeline.loaded == [[10]]
+
+    pipeline.fail_on = None
+    pipeline.loaded = []
+    assert pipeline.run()
+    assert pipeline.loaded == [[10], [20], [30]]
+
+
+def test_simplification_refreshes_only_changed_tables(tmp_path, monkeypatch):
+    from etl import simplification
+
+    versions = {"departments": 4, "protected_areas": 7}
+    updated: list = []
+
+    class Cursor:
+        rowcount = 9
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc_info):
+            return False
+
+        def execute(self, query, params=()):
+            table = next(t for t in versions if f"Identifier('{t}')" in repr(query))
+            if "UPDATE" in repr(query):
+                updated.append(table)
+                versions[table] += 1  # the statement-level trigger of migration 004
+            self.row = (9, versions[table])
+
+        def fetchone(self):
+            return self.row
+
+    class Connection(Cursor):
+        def cursor(self):
+            return Cursor()
+
+        def commit(self):
+            pass
+
+        def close(self):
+            pass
+
+    monkeypatch.setattr(simplification.psycopg2, "connect", lambda dsn: Connection())
+    monkeypatch.setattr(simplification.GeometrySimplificationPipeline, "hash_store_dir", tmp_path)
+
+    def pipeline(levels=None):
+        return simplification.GeometrySimplificationPipeline(dsn="-", tables=tuple(versions), levels=levels)
+
+    assert pipeline().run()
+    assert sorted(set(updated)) == ["departments", "protected_areas"]
+
+    # Its own UPDATEs are not taken for a change.
+    updated.clear()
+    assert not pipeline().run()
+
+    versions["departments"] += 1  # an upsert that leaves updated_at alone
+    assert pipeline().run()
+    assert set(updated) == {"departments"}
+
+    updated.clear()
+    assert pipeline(levels={"geom_low": 0.05}).run()
+    assert updated == ["departments", "protected_areas"]
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Benchmark del parseo de tablas de resultados electorales.
+
+Compara ``parse_election_page`` (un solo parseo lxml por página) con el
+enfoque anterior (BeautifulSoup por página, ``str(table)`` y un nuevo
+BeautifulSoup por tabla) sobre páginas sintéticas con muchas tablas, y
+comprueba que ambos extraen los mismos ítems.
+
+Ejecutar: python bench_parse.py [--tables 40] [--rows 200] [--repeat 5]
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from bolivia_scraper.spiders.oep_spider import _DEPARTMENTS, parse_election_page  # noqa: E402
+
+_DEPTS = ["La Paz", "Cochabamba", "Santa Cruz", "Oruro", "Potosí", "Chuquisaca", "Tarija", "Beni", "Pando"]
+
+
+def build_page(tables: int, rows: int) -> str:
+    parts = ["<html><head><title>Elecciones Generales 2020</title></head><body>",
+             "<h1>Resultados Elecciones Generales 2020</h1>"]
+    for t in range(tables):
+        parts.append(f"<h2>Circunscripción {t}</h2><table class='resultados'>")
+        parts.append("<tr><th>Departamento</th><th>Partido</th><th>Candidato</th>"
+                     "<th>Votos</th><th>Porcentaje %</th></tr>")
+        for r in range(rows):
+            parts.append(
+                f"<tr><td>{_DEPTS[r % len(_DEPTS)]}</td><td><b>P{r % 11}</b></td>"
+                f"<td> Candidato {t}-{r} </td><td>{(r * 7919) % 1000000:,}</td>"
+                f"<td>{(r % 100) + 0.25:.2f} %</td></tr>"
+            )
+        parts.append("</table>")
+    parts.append("<a class='page-link siguiente' href='?page=2'>Siguiente</a></body></html>")
+    return "".join(parts)
+
+
+def reference_parse(html: str, url: str, election_type: str) -> list[tuple]:
+    """The previous implementation, kept here only as the baseline."""
+    soup = BeautifulSoup(html, "lxml")
+    title_text = " ".join(t.get_text() for t in soup.find_all(["h1", "h2"]))
+    m = re.search(r"\b(19|20)\d{2}\b", url + " " + title_text)
+    year = int(m.group(0)) if m else None
+    out = []
+    for table in soup.find_all("table"):
+        rows = BeautifulSoup(str(table), "lxml").find_all("tr")
+        if not rows:
+            continue
+        headers = [c.get_text(strip=True).lower() for c in rows[0].find_all(["th", "td"])]
+        col: dict[str, int] = {}
+        for i, h in enumerate(headers):
+            if any(k in h for k in ["partido", "organización", "sigla"]):
+                col.setdefault("party", i)
+            elif any(k in h for k in ["candidato", "nombre"]):
+                col.setdefault("candidate", i)
+            elif any(k in h for k in ["votos", "total"]):
+                col.setdefault("votes", i)
+            elif "%" in h or "porcentaje" in h:
+                col.setdefault("percentage", i)
+            elif any(k in h for k in ["departamento", "circunscripción", "municipio"]):
+                col.setdefault("department", i)
+        if not col:
+            continue
+        for row in rows[1:]:
+            cells = row.find_all("td")
+            if len(cells) < 2:
+                continue
+
+            def _cell(key: str) -> Optional[str]:
+                idx = col.get(key)
+                if idx is None or idx >= len(cells):
+                    return None
+                return cells[idx].get_text(strip=True) or None
+
+            votes_raw, pct_raw = _cell("votes"), _cell("percentage")
+            try:
+                votes = int(re.sub(r"\D", "", votes_raw)) if votes_raw else None
+            except ValueError:
+                votes = None
+            try:
+                percentage = float(re.sub(r"[^\d.]", "", pct_raw)) if pct_raw else None
+            except ValueError:
+                percentage = None
+            dept_raw = _cell("department") or ""
+            department = _DEPARTMENTS.get(dept_raw.lower(), dept_raw or None)
+            out.append((year, election_type, department, _cell("party"), _cell("candidate"), votes, percentage))
+    return out
+
+
+def _best_of(repeat: int, fn, *args) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tables", type=int, default=40)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    url = "https://www.oep.org.bo/proceso-electoral/elecciones-generales/2020/"
+    html = build_page(args.tables, args.rows)
+
+    items, _ = parse_election_page(html, url, "general")
+    fast = [(i.year, i.election_type, i.department, i.party, i.candidate, i.votes, i.percentage) for i in items]
+    if fast != reference_parse(html, url, "general"):
+        print("✗ Los resultados difieren del enfoque anterior")
+        sys.exit(1)
+
+    print(f"Página: {args.tables} tablas × {args.rows} filas ({len(html) / 1024:.0f} KiB, {len(items)} ítems)")
+    old = _best_of(args.repeat, reference_parse, html, url, "general")
+    new = _best_of(args.repeat, parse_election_page, html, url, "general")
+    print(f"  BeautifulSoup por tabla : {old * 1000:8.1f} ms")
+    print(f"  lxml, un solo parseo    : {new * 1000:8.1f} ms")
+    print(f"  Aceleración             : {old / new:8.1f}×")
+
+
+if __name__ == "__main__":
+    main()
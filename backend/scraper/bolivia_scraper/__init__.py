@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# backend/ (/app in the image), home of the ``common`` package shared with the ETL.
+_BACKEND = str(Path(__file__).resolve().parents[2])
+if _BACKEND not in sys.path:
+    sys.path.append(_BACKEND)
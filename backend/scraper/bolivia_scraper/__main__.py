@@ -1,16 +1,19 @@
-"""Entry point for Crawlee-based scraper: python -m bolivia_scraper [spider_name]
+"""Entry point for Crawlee-based scraper: python -m bolivia_scraper [--worker] [spider_name]
 
 Usage:
     python -m bolivia_scraper              # run all spiders
     python -m bolivia_scraper oep_elections
+    python -m bolivia_scraper --worker     # one of several workers sharing the Redis frontier
 """
 import asyncio
 import logging
 import sys
 import os
+from typing import Optional
 
-from bolivia_scraper import settings
-from bolivia_scraper.pipelines import run_pipelines
+from bolivia_scraper import parsing, settings
+from bolivia_scraper.crawling import CrawlBudget, SharedBrowserPool
+from bolivia_scraper.streaming import StreamingPipeline
 
 # Set Crawlee storage directory
 os.environ["CRAWLEE_STORAGE_DIR"] = settings.CRAWLEE_STORAGE_DIR
@@ -32,20 +35,45 @@ except ImportError as exc:
     logger.warning("Could not import OEPElectionsSpider: %s", exc)
 
 
-async def _run_spider(name: str) -> None:
+async def _run_spider(
+    name: str,
+    browser_pool: Optional[SharedBrowserPool] = None,
+    budget: Optional[CrawlBudget] = None,
+    worker: bool = False,
+) -> None:
     cls = _SPIDERS.get(name)
     if cls is None:
         logger.error("Unknown spider: %r. Available: %s", name, list(_SPIDERS))
         sys.exit(1)
-    spider = cls()
-    items = await spider.run()
-    saved = run_pipelines(name, items)
-    logger.info("Spider %r: %d items scraped, %d saved after deduplication", name, len(items), saved)
-
-
-async def _run_all() -> None:
-    for name in _SPIDERS:
-        await _run_spider(name)
+    spider = cls(browser_pool=browser_pool, budget=budget, worker=worker)
+    async with StreamingPipeline(name) as stream:
+        await spider.run(stream)
+    logger.info(
+        "Spider %r: %d items scraped, %d saved after deduplication", name, stream.scraped, stream.saved
+    )
+
+
+async def _run_one(name: str, worker: bool = False) -> None:
+    """Run one spider; its browser rounds share a pool and crawl budget for the whole crawl."""
+    browser_pool = SharedBrowserPool.from_settings()
+    budget = CrawlBudget()
+    async with browser_pool:
+        await _run_spider(name, browser_pool, budget, worker)
+
+
+async def _run_all(names: list[str], worker: bool = False) -> None:
+    """Run ``names`` concurrently on one browser pool and crawl budget."""
+    browser_pool = SharedBrowserPool.from_settings()
+    budget = CrawlBudget()
+    # Held open across every crawler the spiders start, one per crawl round.
+    async with browser_pool:
+        results = await asyncio.gather(
+            *(_run_spider(name, browser_pool, budget, worker) for name in names),
+            return_exceptions=True,
+        )
+    for name, result in zip(names, results):
+        if isinstance(result, BaseException):
+            logger.error("Spider %r failed: %s", name, result)
 
 
 def main() -> None:
@@ -53,10 +81,16 @@ def main() -> None:
         logger.error("No spiders registered – aborting.")
         sys.exit(1)
 
-    if len(sys.argv) >= 2:
-        asyncio.run(_run_spider(sys.argv[1]))
-    else:
-        asyncio.run(_run_all())
+    args = sys.argv[1:]
+    worker = "--worker" in args
+    names = [arg for arg in args if arg != "--worker"]
+    try:
+        if len(names) == 1:
+            asyncio.run(_run_one(names[0], worker))
+        else:
+            asyncio.run(_run_all(names or list(_SPIDERS), worker))
+    finally:
+        parsing.shutdown()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+"""Small persistent Bloom filter over hex digests, used to front the Redis hash check."""
+import fcntl
+import math
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Optional, Tuple
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter; membership may be a false positive, never a false negative."""
+
+    _HEADER = struct.Struct(">d")  # creation time, so reloads do not extend its lifetime
+
+    def __init__(
+        self,
+        capacity: int,
+        error_rate: float,
+        bits: Optional[bytearray] = None,
+        created: Optional[float] = None,
+    ) -> None:
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        nbytes = (self.size + 7) // 8
+        self._bits = bits if bits is not None and len(bits) == nbytes else bytearray(nbytes)
+        self.created = created if created is not None else time.time()
+
+    def _positions(self, digest: str):
+        # Double hashing over two independent 64-bit slices of the digest.
+        h1 = int(digest[:16], 16)
+        h2 = int(digest[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, digest: str) -> None:
+        for pos in self._positions(digest):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, digest: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(digest))
+
+    @classmethod
+    def load(cls, path: Path, capacity: int, error_rate: float, max_age_secs: float) -> "BloomFilter":
+        """Load ``path`` if it was created less than ``max_age_secs`` ago, else start empty.
+
+        The age limit mirrors the Redis hash TTL so items are still re-sent
+        periodically even though bits can never be cleared individually.
+        """
+        saved = cls._read(path, max_age_secs)
+        if saved is None:
+            return cls(capacity, error_rate)
+        return cls(capacity, error_rate, *saved)
+
+    @classmethod
+    def _read(cls, path: Path, max_age_secs: float) -> Optional[Tuple[bytearray, float]]:
+        """The bits and creation time saved at ``path``, or None if missing or expired."""
+        try:
+            data = path.read_bytes()
+            (created,) = cls._HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if time.time() - created >= max_age_secs:
+            return None
+        return bytearray(data[cls._HEADER.size:]), created
+
+    def save(self, path: Path, max_age_secs: float) -> None:
+        """Write the filter to ``path``, OR-ed into the filter already saved there.
+
+        Several workers share the file; merging under a lock keeps the bits
+        of all of them instead of only the last one to exit. A saved filter
+        that has expired (or has another size) is overwritten.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            bits, created = self._bits, self.created
+            saved = self._read(path, max_age_secs)
+            if saved is not None and len(saved[0]) == len(bits):
+                bits = bytearray(a | b for a, b in zip(saved[0], bits))
+                created = min(created, saved[1])
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(self._HEADER.pack(created) + bytes(bits))
+            os.replace(tmp, path)
@@ -0,0 +1,115 @@
+"""Lean browser profile shared by all Playwright crawling.
+
+Playwright's ``Browser.new_page`` creates a throw-away context for every
+page. :class:`LeanBrowserController` instead keeps one context per browser,
+opens pages in it and installs a single route on that context which aborts
+requests for resource types (images, fonts, stylesheets, media) and hosts
+(analytics, ads) that a scraper never needs. Service workers are blocked so
+they cannot bypass the route. With ``BROWSER_DISABLE_CACHE`` the HTTP cache
+of every page is switched off (Chromium only, through CDP) so documents are
+always fetched fresh; by default the shared context keeps scripts cached
+across pages. Everything is configured from settings.
+"""
+from datetime import datetime, timezone
+from typing import Any, Mapping, Optional
+from urllib.parse import urlsplit
+
+from crawlee.browsers import PlaywrightBrowserController, PlaywrightBrowserPlugin
+from crawlee.proxy_configuration import ProxyInfo
+from playwright.async_api import Browser, BrowserContext, Page, Route, async_playwright
+
+from bolivia_scraper import settings
+
+
+def _blocking() -> bool:
+    return bool(settings.BROWSER_BLOCK_RESOURCE_TYPES or settings.BROWSER_BLOCK_HOSTS)
+
+
+def _blocked_host(host: str) -> bool:
+    return any(host == blocked or host.endswith("." + blocked) for blocked in settings.BROWSER_BLOCK_HOSTS)
+
+
+async def block_resources(route: Route) -> None:
+    """Abort non-essential requests; let documents, scripts and XHR/fetch through."""
+    request = route.request
+    if request.resource_type in settings.BROWSER_BLOCK_RESOURCE_TYPES or _blocked_host(
+        urlsplit(request.url).hostname or ""
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def disable_cache(page: Page) -> None:
+    """Turn off the HTTP cache of ``page``; a no-op outside Chromium, which lacks the CDP call."""
+    if page.context.browser is None or page.context.browser.browser_type.name != "chromium":
+        return
+    session = await page.context.new_cdp_session(page)
+    await session.send("Network.setCacheDisabled", {"cacheDisabled": True})
+
+
+class LeanBrowserController(PlaywrightBrowserController):
+    """Opens every page in one reused, resource-blocking context of its browser."""
+
+    def __init__(self, browser: Browser, *, max_open_pages_per_browser: int = 20) -> None:
+        super().__init__(browser, max_open_pages_per_browser=max_open_pages_per_browser)
+        self._browser = browser
+        self._context: Optional[BrowserContext] = None
+
+    async def _shared_context(self, page_options: Mapping[str, Any]) -> BrowserContext:
+        if self._context is None:
+            self._context = await self._browser.new_context(service_workers="block", **page_options)
+            if _blocking():
+                await self._context.route("**/*", block_resources)
+        return self._context
+
+    async def new_page(
+        self,
+        page_options: Mapping[str, Any] | None = None,
+        proxy_info: ProxyInfo | None = None,
+    ) -> Page:
+        # A proxied page needs its own context; keep the stock behaviour for it.
+        if proxy_info is not None or not settings.BROWSER_SHARED_CONTEXT:
+            page = await super().new_page(page_options, proxy_info)
+            if _blocking():
+                await page.route("**/*", block_resources)
+            if settings.BROWSER_DISABLE_CACHE:
+                await disable_cache(page)
+            return page
+
+        if not self.has_free_capacity:
+            raise ValueError("Cannot open more pages in this browser.")
+        context = await self._shared_context(page_options or {})
+        page = await context.new_page()
+        if settings.BROWSER_DISABLE_CACHE:
+            await disable_cache(page)
+        page.on(event="close", f=self._on_page_close)
+        self._pages.append(page)
+        self._last_page_opened_at = datetime.now(timezone.utc)
+        return page
+
+
+class LeanBrowserPlugin(PlaywrightBrowserPlugin):
+    """``PlaywrightBrowserPlugin`` whose browsers use :class:`LeanBrowserController`."""
+
+    @classmethod
+    def from_settings(cls) -> "LeanBrowserPlugin":
+        return cls(
+            browser_type=settings.BROWSER_TYPE,
+            browser_options={"headless": settings.HEADLESS},
+            max_open_pages_per_browser=settings.BROWSER_MAX_OPEN_PAGES,
+        )
+
+    async def __aenter__(self) -> "LeanBrowserPlugin":
+        # A Playwright context manager cannot be entered twice; use a fresh one
+        # so the plugin can be opened again after its pool was closed.
+        self._playwright_context_manager = async_playwright()
+        await super().__aenter__()
+        return self
+
+    async def new_browser(self) -> LeanBrowserController:
+        if not self._playwright:
+            raise RuntimeError("Playwright browser plugin is not initialized.")
+        launcher = getattr(self._playwright, self.browser_type)
+        browser = await launcher.launch(**self.browser_options)
+        return LeanBrowserController(browser, max_open_pages_per_browser=self.max_open_pages_per_browser)
@@ -0,0 +1,180 @@
+"""Crawler construction shared by all spiders.
+
+Spiders build their ``PlaywrightCrawler`` through :func:`make_playwright_crawler`
+so that, when several run at once, they share one browser pool and one
+:class:`CrawlBudget` (a global concurrency cap plus per-domain politeness).
+"""
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from datetime import timedelta
+from typing import Any, AsyncGenerator, AsyncIterator, Optional
+from urllib.parse import urlsplit
+
+from crawlee import ConcurrencySettings
+from crawlee.browsers import BrowserPool
+from crawlee.http_clients import HttpxHttpClient
+from crawlee.http_crawler import HttpCrawler
+from crawlee.playwright_crawler import PlaywrightCrawler
+from crawlee.storages import RequestQueue
+
+from bolivia_scraper import settings
+from bolivia_scraper.browser import LeanBrowserPlugin
+
+
+class SharedBrowserPool(BrowserPool):
+    """A :class:`BrowserPool` that several crawlers can enter concurrently.
+
+    Every crawler enters its pool when it starts and exits it when it
+    finishes; reference counting keeps the browsers alive until the last
+    crawler using the pool is done. A crawl that runs several crawlers one
+    after another should hold the pool open itself (``async with pool:``)
+    so the browsers survive between them; once fully exited the pool drops
+    its closed browsers and launches new ones on the next entry.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._users = 0
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "SharedBrowserPool":
+        return cls(plugins=[LeanBrowserPlugin.from_settings()])
+
+    async def __aenter__(self) -> "SharedBrowserPool":
+        async with self._lock:
+            if self._users == 0:
+                await super().__aenter__()
+            self._users += 1
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        async with self._lock:
+            self._users -= 1
+            if self._users == 0:
+                await super().__aexit__(*exc_info)
+                # The closed controllers would otherwise be handed out again.
+                self._active_browsers.clear()
+                self._inactive_browsers.clear()
+
+
+class CrawlBudget:
+    """Global concurrency cap plus per-domain concurrency and request spacing."""
+
+    def __init__(
+        self,
+        max_concurrency: int = settings.GLOBAL_MAX_CONCURRENCY,
+        per_domain: int = settings.DOMAIN_MAX_CONCURRENCY,
+        domain_delay_secs: float = settings.DOMAIN_DELAY_SECS,
+    ) -> None:
+        self._global = asyncio.Semaphore(max_concurrency)
+        self._per_domain = per_domain
+        self._delay = domain_delay_secs
+        self._domains: dict[str, asyncio.Semaphore] = {}
+        self._next_start: dict[str, float] = {}
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncIterator[None]:
+        """Hold a global and a per-domain slot for one page visit."""
+        host = urlsplit(url).hostname or ""
+        domain = self._domains.setdefault(host, asyncio.Semaphore(self._per_domain))
+        # Wait for the domain first so a busy host does not pin global slots.
+        async with domain, self._global:
+            loop = asyncio.get_running_loop()
+            now = loop.time()
+            start = max(now, self._next_start.get(host, now))
+            self._next_start[host] = start + self._delay
+            if start > now:
+                await asyncio.sleep(start - now)
+            yield
+
+
+class _BudgetedFetch:
+    """Crawler mixin gating every fetch on a :class:`CrawlBudget`."""
+
+    def __init__(self, *, budget: Optional[CrawlBudget] = None, **kwargs: Any) -> None:
+        self._budget = budget
+        super().__init__(**kwargs)
+
+    async def _make_http_request(self, context: Any) -> AsyncGenerator[Any, None]:
+        # The slot spans the fetch and the request handler: for Playwright the
+        # page stays open (and counts against the domain) until it finishes.
+        if self._budget is None:
+            async for enhanced in super()._make_http_request(context):
+                yield enhanced
+            return
+        async with self._budget.slot(context.request.url):
+            async for enhanced in super()._make_http_request(context):
+                yield enhanced
+
+
+class BudgetedPlaywrightCrawler(_BudgetedFetch, PlaywrightCrawler):
+    """``PlaywrightCrawler`` whose page visits are gated by a :class:`CrawlBudget`."""
+
+
+class BudgetedHttpCrawler(_BudgetedFetch, HttpCrawler):
+    """Plain-HTTP (httpx) crawler sharing the same :class:`CrawlBudget`."""
+
+
+def queue_name(name: str) -> str:
+    """``name`` qualified with ``WORKER_ID``.
+
+    Workers may share one storage directory (the compose replicas mount the
+    same ``./data``); unqualified names would make them empty and consume
+    each other's queues.
+    """
+    return re.sub(r"[^A-Za-z0-9-]", "-", f"{name}-{settings.WORKER_ID}")
+
+
+async def open_request_queue(name: str) -> RequestQueue:
+    """A fresh, empty request queue for ``name``, private to this process.
+
+    Crawlers in one process would otherwise share the default queue and take
+    each other's requests.
+    """
+    queue = await RequestQueue.open(name=queue_name(name))
+    await queue.drop()
+    return await RequestQueue.open(name=queue_name(name))
+
+
+async def drop_request_queue(name: str) -> None:
+    """Remove the queue :func:`open_request_queue` made for ``name`` from storage."""
+    queue = await RequestQueue.open(name=queue_name(name))
+    await queue.drop()
+
+
+def _crawler_options(budget: Optional[CrawlBudget]) -> dict[str, Any]:
+    return {
+        "max_requests_per_crawl": settings.MAX_REQUESTS_PER_CRAWL or None,
+        "max_request_retries": settings.MAX_REQUEST_RETRIES,
+        "concurrency_settings": ConcurrencySettings(
+            min_concurrency=settings.MIN_CONCURRENCY,
+            max_concurrency=settings.MAX_CONCURRENCY,
+        ),
+        "request_handler_timeout": timedelta(seconds=settings.REQUEST_HANDLER_TIMEOUT_SECS),
+        "budget": budget,
+    }
+
+
+async def make_http_crawler(queue_name: str, budget: Optional[CrawlBudget] = None) -> BudgetedHttpCrawler:
+    """Plain-HTTP crawler configured from settings."""
+    options = _crawler_options(budget)
+    options["request_provider"] = await open_request_queue(queue_name)
+    options["http_client"] = HttpxHttpClient(headers={"User-Agent": settings.USER_AGENT})
+    return BudgetedHttpCrawler(**options)
+
+
+async def make_playwright_crawler(
+    queue_name: str,
+    browser_pool: Optional[BrowserPool] = None,
+    budget: Optional[CrawlBudget] = None,
+) -> BudgetedPlaywrightCrawler:
+    """Crawler configured from settings, optionally on a shared pool and budget.
+
+    Without a pool it gets its own, using the same lean browser profile.
+    """
+    options = _crawler_options(budget)
+    options["request_provider"] = await open_request_queue(queue_name)
+    options["browser_pool"] = browser_pool or BrowserPool(plugins=[LeanBrowserPlugin.from_settings()])
+    return BudgetedPlaywrightCrawler(**options)
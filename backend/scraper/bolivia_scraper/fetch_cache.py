@@ -0,0 +1,136 @@
+"""Persistent per-URL fetch cache for conditional re-crawls.
+
+For every page that was parsed successfully the cache keeps the response
+validators (``ETag``/``Last-Modified``), a SHA-256 of the raw body and the
+follow-up requests the handler returned. The next crawl sends
+``If-None-Match``/``If-Modified-Since``; a ``304`` or an identical body hash
+means the page is unchanged, so parsing is skipped and the cached follow-ups
+are enqueued instead (their own pages are then revalidated the same way).
+
+With Redis the cache is one hash per spider that every worker reads and
+writes entry by entry (:class:`RedisFetchCache`); without it, one JSON file
+per spider that is written whole at the end of the crawl.
+"""
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+import redis.asyncio as redis_lib
+
+from bolivia_scraper import settings
+
+logger = logging.getLogger(__name__)
+
+
+def body_hash(body: bytes) -> str:
+    return hashlib.sha256(body).hexdigest()
+
+
+def validators(headers: dict[str, str], body: bytes) -> dict[str, Optional[str]]:
+    """Cache validators of one HTTP response (header names are matched case-insensitively)."""
+    lowered = {k.lower(): v for k, v in headers.items()}
+    return {
+        "etag": lowered.get("etag"),
+        "last_modified": lowered.get("last-modified"),
+        "hash": body_hash(body),
+    }
+
+
+class FetchCache:
+    """URL → validators, body hash and follow-up requests, stored as one JSON file per spider."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        try:
+            self._entries: dict[str, dict[str, Any]] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._entries = {}
+
+    @classmethod
+    def for_spider(cls, spider_name: str, client: Optional[redis_lib.Redis] = None) -> "FetchCache":
+        """The spider's cache: shared in Redis when a ``client`` is given, else its JSON file."""
+        if client is not None:
+            return RedisFetchCache(client, spider_name)
+        return cls(Path(settings.CRAWLEE_STORAGE_DIR) / "fetch-cache" / f"{spider_name}.json")
+
+    async def _read(self, url: str) -> Optional[dict[str, Any]]:
+        return self._entries.get(url)
+
+    async def _write(self, url: str, entry: dict[str, Any]) -> None:
+        self._entries[url] = entry
+
+    async def get(self, url: str) -> Optional[dict[str, Any]]:
+        return await self._read(url)
+
+    async def conditional_headers(self, url: str) -> dict[str, str]:
+        """``If-None-Match``/``If-Modified-Since`` for ``url``, empty if nothing is cached."""
+        entry = await self._read(url) or {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def unchanged(self, url: str, status_code: int, body: bytes) -> bool:
+        entry = await self._read(url)
+        if entry is None:
+            return False
+        if status_code == 304:
+            return True
+        return 200 <= status_code < 300 and entry.get("hash") == body_hash(body)
+
+    async def store(self, url: str, fetched: dict[str, Optional[str]], follow: list[dict[str, Any]]) -> None:
+        """Record ``url`` as parsed; the crawl calls this only once the page's items are saved."""
+        await self._write(url, {**fetched, "follow": follow})
+
+    async def refresh(self, url: str, headers: dict[str, str]) -> None:
+        """Update the validators of an unchanged page (a 304 may carry a new ``ETag``)."""
+        entry = await self._read(url)
+        if entry is None:
+            return
+        lowered = {k.lower(): v for k, v in headers.items()}
+        updated = dict(entry)
+        for key, header in (("etag", "etag"), ("last_modified", "last-modified")):
+            if lowered.get(header):
+                updated[key] = lowered[header]
+        if updated != entry:
+            await self._write(url, updated)
+
+    async def save(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self._path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._entries, sort_keys=True), encoding="utf-8")
+            os.replace(tmp, self._path)
+        except OSError as exc:
+            logger.warning("Could not persist fetch cache to %s: %s", self._path, exc)
+
+
+class RedisFetchCache(FetchCache):
+    """:class:`FetchCache` kept in the Redis hash ``fetch-cache:<spider>``, shared by all workers.
+
+    Entries are read on first use and written through as they change, so
+    concurrent workers never overwrite each other's entries.
+    """
+
+    def __init__(self, client: redis_lib.Redis, spider_name: str) -> None:
+        self._redis = client
+        self._key = f"fetch-cache:{spider_name}"
+        self._entries = {}
+
+    async def _read(self, url: str) -> Optional[dict[str, Any]]:
+        if url not in self._entries:
+            raw = await self._redis.hget(self._key, url)
+            self._entries[url] = json.loads(raw) if raw else None
+        return self._entries[url]
+
+    async def _write(self, url: str, entry: dict[str, Any]) -> None:
+        self._entries[url] = entry
+        await self._redis.hset(self._key, url, json.dumps(entry, sort_keys=True))
+
+    async def save(self) -> None:
+        pass
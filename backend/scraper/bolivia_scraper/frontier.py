@@ -0,0 +1,366 @@
+"""Durable crawl frontier: normalised-URL dedup, pending queues and resume.
+
+A frontier holds, per spider, the set of URLs ever discovered in the
+current crawl, one pending queue per fetch mode and the requests that have
+been taken but not finished. With Redis every step is persisted, so:
+
+* a crashed or killed crawl resumes where it stopped – taken-but-unfinished
+  requests go back to their queue once their leases expire – instead of
+  starting over;
+* spider processes crawling the same site share one seen-set, so a URL is
+  queued once no matter which process discovers it;
+* in worker mode several processes or containers pull from the same
+  queues: every taken request holds a lease that its worker keeps renewing;
+  leases of a worker that died expire and the requests are handed out
+  again, and a request is retried until ``FRONTIER_MAX_ATTEMPTS``.
+
+Every process running the crawl registers itself (:meth:`RedisFrontier.join`)
+and keeps the registration alive with its lease heartbeat. The state is
+cleared by the last process to leave, once nothing is queued or leased, so
+the next run starts from the start URLs again while a worker that is still
+busy – or starts late – never sees the seen-set vanish under it. Without
+Redis an in-memory frontier keeps the old behaviour (dedup within the
+process only).
+
+Every method is a coroutine: the Redis frontier is driven from the
+crawlers' request handlers and uses ``redis.asyncio`` so its round-trips
+never block the event loop.
+"""
+import json
+import logging
+from collections import deque
+from typing import Any, Optional, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import redis.asyncio as redis_lib
+
+from bolivia_scraper import settings
+
+logger = logging.getLogger(__name__)
+
+# Request spec: {"url", "label", "user_data", "mode", "revalidate", "attempts"} – JSON-serialisable;
+# a page escalated to the browser also carries the validators of its HTTP response as "fetched".
+Spec = dict[str, Any]
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid")
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of ``url`` for deduplication.
+
+    Lower-cases scheme and host, drops default ports, fragments and tracking
+    parameters, and sorts the query string. Paths keep their case and
+    trailing slash, which servers may treat as significant.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v)
+        for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+class MemoryFrontier:
+    """Process-local frontier, used when Redis is unavailable."""
+
+    def __init__(self) -> None:
+        self._seen: set[str] = set()
+        self._pending: dict[str, deque[Spec]] = {}
+        self._active: dict[str, Spec] = {}
+
+    async def add(self, spec: Spec) -> bool:
+        """Queue ``spec`` under ``spec["mode"]`` unless its URL was seen before."""
+        if spec["url"] in self._seen:
+            return False
+        self._seen.add(spec["url"])
+        await self.requeue(spec)
+        return True
+
+    async def requeue(self, spec: Spec) -> None:
+        """Queue ``spec`` again (e.g. for another fetch mode), bypassing dedup."""
+        self._pending.setdefault(spec["mode"], deque()).append(spec)
+
+    async def take(self, mode: str, limit: int) -> list[Spec]:
+        queue = self._pending.get(mode, deque())
+        specs = [queue.popleft() for _ in range(min(limit, len(queue)))]
+        for spec in specs:
+            self._active[spec["url"]] = spec
+        return specs
+
+    async def done(self, url: str) -> None:
+        self._active.pop(url, None)
+
+    async def retry(self, spec: Spec) -> bool:
+        """Queue an unfinished request again; False once it ran out of attempts."""
+        await self.done(spec["url"])
+        spec = {**spec, "attempts": spec.get("attempts", 0) + 1}
+        if spec["attempts"] >= settings.FRONTIER_MAX_ATTEMPTS:
+            return False
+        await self.requeue(spec)
+        return True
+
+    async def renew(self, urls: list[str]) -> None:
+        pass
+
+    async def reclaim(self) -> int:
+        return 0
+
+    async def resume(self) -> int:
+        return 0
+
+    async def join(self) -> None:
+        pass
+
+    async def leave(self) -> bool:
+        await self.clear()
+        return True
+
+    async def idle(self) -> bool:
+        return not any(self._pending.values()) and not self._active
+
+    async def clear(self) -> None:
+        self._seen.clear()
+        self._pending.clear()
+        self._active.clear()
+
+
+# Pop up to ARGV[1] specs from the pending list, record them as active and
+# lease them for ARGV[3] seconds of Redis server time, in one step.
+_TAKE_LUA = """
+local specs = redis.call('LPOP', KEYS[1], ARGV[1])
+if not specs then return {} end
+local deadline = tonumber(redis.call('TIME')[1]) + tonumber(ARGV[3])
+for _, spec in ipairs(specs) do
+  local url = cjson.decode(spec)['url']
+  redis.call('HSET', KEYS[2], url, spec)
+  redis.call('ZADD', KEYS[3], deadline, url)
+end
+redis.call('EXPIRE', KEYS[2], ARGV[2])
+redis.call('EXPIRE', KEYS[3], ARGV[2])
+return specs
+"""
+
+# Requeue requests whose lease expired (their worker died), counting the
+# attempt; requests out of attempts go to the failed list. ARGV: key prefix,
+# max attempts. Returns the number requeued.
+_RECLAIM_LUA = """
+local now = tonumber(redis.call('TIME')[1])
+local requeued = 0
+for _, url in ipairs(redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', now)) do
+  local raw = redis.call('HGET', KEYS[1], url)
+  redis.call('ZREM', KEYS[2], url)
+  redis.call('HDEL', KEYS[1], url)
+  if raw then
+    local spec = cjson.decode(raw)
+    spec['attempts'] = (spec['attempts'] or 0) + 1
+    if spec['attempts'] >= tonumber(ARGV[2]) then
+      redis.call('RPUSH', KEYS[3], cjson.encode(spec))
+    else
+      redis.call('RPUSH', ARGV[1] .. ':pending:' .. spec['mode'], cjson.encode(spec))
+      requeued = requeued + 1
+    end
+  end
+end
+return requeued
+"""
+
+
+# Deregister worker ARGV[1] (and workers whose registration expired); if no
+# worker is left and nothing is leased or queued, delete the crawl state.
+# ARGV[2] is the key prefix. Returns -1 if the state was kept, else the
+# number of requests that failed on every attempt.
+_LEAVE_LUA = """
+local now = tonumber(redis.call('TIME')[1])
+redis.call('ZREM', KEYS[1], ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZCARD', KEYS[1]) > 0 or redis.call('ZCARD', KEYS[2]) > 0 then
+  return -1
+end
+local modes = redis.call('SMEMBERS', KEYS[3])
+for _, mode in ipairs(modes) do
+  if redis.call('LLEN', ARGV[2] .. ':pending:' .. mode) > 0 then return -1 end
+end
+local failed = redis.call('LLEN', ARGV[2] .. ':failed')
+for _, mode in ipairs(modes) do
+  redis.call('DEL', ARGV[2] .. ':pending:' .. mode)
+end
+redis.call('DEL', KEYS[1], KEYS[2], KEYS[3], ARGV[2] .. ':seen', ARGV[2] .. ':active', ARGV[2] .. ':failed')
+return failed
+"""
+
+
+class RedisFrontier:
+    """Frontier persisted under ``frontier:<spider>:*`` keys in Redis."""
+
+    def __init__(
+        self,
+        client: redis_lib.Redis,
+        spider_name: str,
+        ttl_secs: int = settings.FRONTIER_TTL_SECS,
+        lease_secs: int = settings.FRONTIER_LEASE_SECS,
+        worker_id: str = settings.WORKER_ID,
+    ) -> None:
+        self._redis = client
+        self._prefix = f"frontier:{spider_name}"
+        self._ttl = ttl_secs
+        self.lease_secs = lease_secs
+        self.worker_id = worker_id
+        self._take = client.register_script(_TAKE_LUA)
+        self._reclaim = client.register_script(_RECLAIM_LUA)
+        self._leave = client.register_script(_LEAVE_LUA)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self._prefix, *parts))
+
+    def _pending_key(self, mode: str) -> str:
+        return self._key("pending", mode)
+
+    async def add(self, spec: Spec) -> bool:
+        """Queue ``spec`` under ``spec["mode"]`` unless its URL was seen before."""
+        seen = self._key("seen")
+        if not await self._redis.sadd(seen, spec["url"]):
+            return False
+        await self._redis.expire(seen, self._ttl)
+        await self.requeue(spec)
+        return True
+
+    async def requeue(self, spec: Spec) -> None:
+        """Queue ``spec`` again (e.g. for another fetch mode), bypassing dedup."""
+        key = self._pending_key(spec["mode"])
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.sadd(self._key("modes"), spec["mode"])
+            pipe.rpush(key, json.dumps(spec))
+            pipe.expire(key, self._ttl)
+            pipe.expire(self._key("modes"), self._ttl)
+            await pipe.execute()
+
+    async def take(self, mode: str, limit: int) -> list[Spec]:
+        """Pop and lease up to ``limit`` queued specs; they stay recorded until :meth:`done`."""
+        raw = await self._take(
+            keys=[self._pending_key(mode), self._key("active"), self._key("leases")],
+            args=[limit, self._ttl, self.lease_secs],
+        )
+        return [json.loads(spec) for spec in raw]
+
+    async def done(self, url: str) -> None:
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.hdel(self._key("active"), url)
+            pipe.zrem(self._key("leases"), url)
+            await pipe.execute()
+
+    async def retry(self, spec: Spec) -> bool:
+        """Queue an unfinished request again; False once it ran out of attempts."""
+        await self.done(spec["url"])
+        spec = {**spec, "attempts": spec.get("attempts", 0) + 1}
+        if spec["attempts"] >= settings.FRONTIER_MAX_ATTEMPTS:
+            await self._redis.rpush(self._key("failed"), json.dumps(spec))
+            await self._redis.expire(self._key("failed"), self._ttl)
+            return False
+        await self.requeue(spec)
+        return True
+
+    async def renew(self, urls: list[str]) -> None:
+        """Extend this worker's registration and the leases of requests it still holds."""
+        deadline = (await self._redis.time())[0] + self.lease_secs
+        await self._redis.zadd(self._key("workers"), {self.worker_id: deadline})
+        if urls:
+            await self._redis.zadd(self._key("leases"), {url: deadline for url in urls}, xx=True)
+
+    async def join(self) -> None:
+        """Register this worker as taking part in the crawl (kept alive by :meth:`renew`).
+
+        State of a finished crawl whose last worker died before clearing it
+        is cleared first, so the crawl starts over instead of finding every
+        start URL already seen.
+        """
+        await self.leave()
+        await self.renew([])
+        await self._redis.expire(self._key("workers"), self._ttl)
+
+    async def leave(self) -> bool:
+        """Deregister; clear the crawl state if this was the last worker and the crawl is done.
+
+        Returns whether the state was cleared.
+        """
+        failed = await self._leave(
+            keys=[self._key("workers"), self._key("leases"), self._key("modes")],
+            args=[self.worker_id, self._prefix],
+        )
+        if failed < 0:
+            return False
+        if failed:
+            logger.warning("%s: %d requests failed on every attempt", self._prefix, failed)
+        return True
+
+    async def reclaim(self) -> int:
+        """Requeue requests whose lease expired; the number requeued."""
+        return await self._reclaim(
+            keys=[self._key("active"), self._key("leases"), self._key("failed")],
+            args=[self._prefix, settings.FRONTIER_MAX_ATTEMPTS],
+        )
+
+    async def resume(self) -> int:
+        """Requeue requests of an interrupted crawl; the number of requests outstanding.
+
+        Only expired leases are reclaimed, so requests a live process still
+        holds are left alone; leases of the crashed process are picked up by
+        :meth:`reclaim` once they expire.
+        """
+        await self.reclaim()
+        outstanding = await self._redis.zcard(self._key("leases"))
+        for mode in await self._redis.smembers(self._key("modes")):
+            outstanding += await self._redis.llen(self._pending_key(mode))
+        return outstanding
+
+    async def idle(self) -> bool:
+        """Nothing queued and no request leased by any worker: the crawl is complete."""
+        if await self._redis.zcard(self._key("leases")):
+            return False
+        for mode in await self._redis.smembers(self._key("modes")):
+            if await self._redis.llen(self._pending_key(mode)):
+                return False
+        return True
+
+    async def clear(self) -> None:
+        failed = await self._redis.llen(self._key("failed"))
+        if failed:
+            logger.warning("%s: %d requests failed on every attempt", self._prefix, failed)
+        modes = await self._redis.smembers(self._key("modes"))
+        await self._redis.delete(
+            *(self._key(k) for k in ("seen", "active", "leases", "failed", "modes", "workers")),
+            *(self._pending_key(m) for m in modes),
+        )
+
+
+Frontier = Union[MemoryFrontier, RedisFrontier]
+
+
+async def open_redis(required: bool = False) -> Optional[redis_lib.Redis]:
+    """Client for the crawl state in Redis; ``None`` if Redis is unreachable.
+
+    With ``required`` (worker mode, where Redis is the only way workers
+    coordinate) an unreachable Redis raises ``RuntimeError`` instead.
+    """
+    client = redis_lib.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        await client.ping()
+    except Exception as exc:
+        await client.aclose()
+        if required:
+            raise RuntimeError(f"Redis is required for worker mode: {exc}") from exc
+        logger.warning("Redis unavailable – crawl state is kept in this process only: %s", exc)
+        return None
+    return client
+
+
+def open_frontier(spider_name: str, client: Optional[redis_lib.Redis]) -> Frontier:
+    """Redis-backed frontier for ``spider_name``, in-memory without a ``client``."""
+    if client is None:
+        return MemoryFrontier()
+    return RedisFrontier(client, spider_name)
@@ -0,0 +1,369 @@
+"""HTTP-first crawling that escalates to Playwright only where it is needed.
+
+Pages are fetched with plain httpx first. A page handler works on the HTML
+string and raises :class:`NeedsBrowser` when the markup lacks content that
+only appears after JavaScript runs (no result tables, an empty app shell);
+the request is then re-queued for Playwright. The outcome is remembered per
+URL pattern (digits collapsed, query dropped) – in Redis, shared by all
+workers, or else in the Crawlee storage dir – so later URLs of a pattern
+known to need a browser skip the HTTP attempt.
+
+Crawling alternates HTTP and browser rounds until both frontiers are empty.
+
+With ``FETCH_CACHE_ENABLED`` every page already in the spider's
+:class:`~bolivia_scraper.fetch_cache.FetchCache` is first revalidated over
+HTTP – also when its pattern needs a browser – and skipped if unchanged.
+A page's entry is stored only once the items it produced are saved (see
+:meth:`~bolivia_scraper.streaming.StreamingPipeline.after_saved`), so a
+crash in between re-parses the page instead of skipping it for good.
+
+Discovered URLs are normalised and kept in a durable
+:mod:`~bolivia_scraper.frontier`; an interrupted crawl resumes from it. In
+worker mode several processes share that frontier and lease requests
+from it; each keeps going until the whole crawl is done.
+"""
+import asyncio
+import functools
+import json
+import logging
+import re
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional, Protocol
+from urllib.parse import urlsplit
+
+import redis.asyncio as redis_lib
+from crawlee import Request
+from crawlee.browsers import BrowserPool
+from crawlee.http_crawler import HttpCrawlingContext
+from crawlee.playwright_crawler import PlaywrightCrawlingContext
+from playwright.async_api import Page
+
+from bolivia_scraper import settings
+from bolivia_scraper.crawling import CrawlBudget, drop_request_queue, make_http_crawler, make_playwright_crawler
+from bolivia_scraper.fetch_cache import FetchCache, validators
+from bolivia_scraper.frontier import Frontier, Spec, normalize_url, open_frontier, open_redis
+
+logger = logging.getLogger(__name__)
+
+HTTP = "http"
+BROWSER = "browser"
+
+# html, request → follow-up requests as {"url", "label", "user_data"} dicts
+PageHandler = Callable[[str, Request], Awaitable[list[dict[str, Any]]]]
+PagePreparer = Callable[[Page], Awaitable[None]]
+
+
+class NeedsBrowser(Exception):
+    """Raised by a page handler when the fetched HTML is incomplete without JavaScript."""
+
+
+class SavedItems(Protocol):
+    """Where the handlers' items go, able to tell when those put so far are saved."""
+
+    async def after_saved(self, callback: Callable[[], Awaitable[None]]) -> None: ...
+
+    async def drain(self) -> None: ...
+
+
+def _decode(body: bytes, headers: dict[str, str]) -> str:
+    content_type = next((v for k, v in headers.items() if k.lower() == "content-type"), "")
+    match = re.search(r"charset=([\w-]+)", content_type)
+    try:
+        return body.decode(match.group(1) if match else "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def url_pattern(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.hostname}{re.sub(r'[0-9]+', '{n}', parts.path.rstrip('/'))}"
+
+
+class FetchModeMemory:
+    """Per-URL-pattern record of which fetch mode produced usable HTML, in one JSON file per spider."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = path
+        try:
+            self._modes: dict[str, str] = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            self._modes = {}
+
+    @classmethod
+    def for_spider(cls, spider_name: str, client: Optional[redis_lib.Redis] = None) -> "FetchModeMemory":
+        """The spider's memory: shared in Redis when a ``client`` is given, else its JSON file."""
+        if client is not None:
+            return RedisFetchModeMemory(client, spider_name)
+        return cls(Path(settings.CRAWLEE_STORAGE_DIR) / "fetch-modes" / f"{spider_name}.json")
+
+    async def _read(self, pattern: str) -> Optional[str]:
+        return self._modes.get(pattern)
+
+    async def _write(self, pattern: str, mode: str) -> None:
+        self._modes[pattern] = mode
+
+    async def mode(self, url: str) -> str:
+        return await self._read(url_pattern(url)) or (HTTP if settings.HTTP_FIRST else BROWSER)
+
+    async def record(self, url: str, mode: str) -> None:
+        pattern = url_pattern(url)
+        if await self._read(pattern) != mode:
+            await self._write(pattern, mode)
+
+    async def save(self) -> None:
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._path.write_text(json.dumps(self._modes, indent=2, sort_keys=True), encoding="utf-8")
+        except OSError as exc:
+            logger.warning("Could not persist fetch modes to %s: %s", self._path, exc)
+
+
+class RedisFetchModeMemory(FetchModeMemory):
+    """:class:`FetchModeMemory` kept in the Redis hash ``fetch-modes:<spider>``, shared by all workers."""
+
+    def __init__(self, client: redis_lib.Redis, spider_name: str) -> None:
+        self._redis = client
+        self._key = f"fetch-modes:{spider_name}"
+        self._modes = {}
+
+    async def _read(self, pattern: str) -> Optional[str]:
+        if pattern not in self._modes:
+            self._modes[pattern] = await self._redis.hget(self._key, pattern)
+        return self._modes[pattern]
+
+    async def _write(self, pattern: str, mode: str) -> None:
+        self._modes[pattern] = mode
+        await self._redis.hset(self._key, pattern, mode)
+
+    async def save(self) -> None:
+        pass
+
+
+class HybridCrawl:
+    """Drive ``handlers`` (by request label; ``None`` is the default) over HTTP and Playwright."""
+
+    def __init__(
+        self,
+        spider_name: str,
+        handlers: dict[Optional[str], PageHandler],
+        prepare: Optional[PagePreparer] = None,
+        browser_pool: Optional[BrowserPool] = None,
+        budget: Optional[CrawlBudget] = None,
+        memory: Optional[FetchModeMemory] = None,
+        cache: Optional[FetchCache] = None,
+        frontier: Optional[Frontier] = None,
+        worker: bool = False,
+        sink: Optional[SavedItems] = None,
+    ) -> None:
+        self.spider_name = spider_name
+        self._handlers = handlers
+        self._prepare = prepare
+        self._browser_pool = browser_pool
+        self._budget = budget
+        # Whatever is not given is opened in run(), in Redis when it is reachable.
+        self._memory = memory
+        self._cache = cache
+        self._worker = worker
+        self._frontier: Optional[Frontier] = frontier
+        # Specs of the requests taken from the frontier and not finished yet.
+        self._specs: dict[str, Spec] = {}
+        self._sink = sink
+        # Cache entries waiting for the crawl to finish, when there is no sink.
+        self._deferred: list[Callable[[], Awaitable[None]]] = []
+        self.pages = {HTTP: 0, BROWSER: 0}
+        self.unchanged = 0
+
+    async def enqueue(self, requests: list[dict[str, Any]]) -> None:
+        for follow in requests:
+            url = normalize_url(follow["url"])
+            mode = await self._memory.mode(url)
+            # Pages whose pattern needs a browser are still revalidated over HTTP first:
+            # they are only rendered if they changed.
+            revalidate = mode == BROWSER and self._cache is not None and await self._cache.get(url) is not None
+            await self._frontier.add(
+                {
+                    "url": url,
+                    "label": follow.get("label"),
+                    "user_data": dict(follow.get("user_data") or {}),
+                    "mode": HTTP if revalidate else mode,
+                    "revalidate": revalidate,
+                }
+            )
+
+    async def run(self, start_urls: list[str]) -> None:
+        use_cache = self._cache is None and settings.FETCH_CACHE_ENABLED
+        client = None
+        if self._frontier is None or self._memory is None or use_cache:
+            client = await open_redis(required=self._worker)
+        try:
+            if self._frontier is None:
+                self._frontier = open_frontier(self.spider_name, client)
+            if self._memory is None:
+                self._memory = FetchModeMemory.for_spider(self.spider_name, client)
+            if use_cache:
+                self._cache = FetchCache.for_spider(self.spider_name, client)
+            await self._crawl(start_urls)
+        finally:
+            if client is not None:
+                await client.aclose()
+
+    async def _crawl(self, start_urls: list[str]) -> None:
+        await self._frontier.join()
+        # A joining worker is not resuming anything; expired leases are reclaimed in the loop.
+        resumed = 0 if self._worker else await self._frontier.resume()
+        if resumed:
+            logger.info("%s: resuming interrupted crawl with %d outstanding requests", self.spider_name, resumed)
+        await self.enqueue([{"url": url} for url in start_urls])
+        heartbeat = asyncio.create_task(self._renew_leases())
+        try:
+            while True:
+                reclaimed = await self._frontier.reclaim()
+                if reclaimed:
+                    logger.info("%s: requeued %d requests of a stalled worker", self.spider_name, reclaimed)
+                took = False
+                for mode, run_round in ((HTTP, self._run_http), (BROWSER, self._run_browser)):
+                    requests = await self._take(mode)
+                    if requests:
+                        took = True
+                        await run_round(requests)
+                        await self._retry_unfinished()
+                if took:
+                    continue
+                if await self._frontier.idle():
+                    break
+                # Other workers (or an interrupted run's unexpired leases) still hold requests.
+                await asyncio.sleep(settings.WORKER_POLL_SECS)
+            await self._store_deferred()
+            if not await self._frontier.leave():
+                logger.info("%s: crawl state left to the workers still running", self.spider_name)
+        finally:
+            heartbeat.cancel()
+            await self._memory.save()
+            if self._cache is not None:
+                await self._cache.save()
+            for mode in (HTTP, BROWSER):
+                await drop_request_queue(f"{self.spider_name}-{mode}")
+        logger.info(
+            "%s: %d pages over HTTP, %d rendered with Playwright, %d unchanged",
+            self.spider_name, self.pages[HTTP], self.pages[BROWSER], self.unchanged,
+        )
+
+    async def _take(self, mode: str) -> list[Request]:
+        requests = []
+        for spec in await self._frontier.take(mode, settings.FRONTIER_BATCH_SIZE):
+            self._specs[spec["url"]] = spec
+            headers = await self._cache.conditional_headers(spec["url"]) if self._cache is not None and mode == HTTP else {}
+            requests.append(
+                Request.from_url(spec["url"], label=spec["label"], user_data=dict(spec["user_data"]), headers=headers)
+            )
+        return requests
+
+    async def _finish(self, url: str) -> None:
+        self._specs.pop(url, None)
+        await self._frontier.done(url)
+
+    async def _retry_unfinished(self) -> None:
+        """Hand requests the round did not finish (failed or not reached) back to the frontier."""
+        specs, self._specs = self._specs, {}
+        for spec in specs.values():
+            if not await self._frontier.retry(spec):
+                logger.warning(
+                    "%s: giving up on %s after %d attempts",
+                    self.spider_name, spec["url"], settings.FRONTIER_MAX_ATTEMPTS,
+                )
+
+    async def _renew_leases(self) -> None:
+        interval = settings.FRONTIER_LEASE_SECS / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self._frontier.renew(list(self._specs))
+            except Exception as exc:
+                logger.warning("%s: could not renew leases: %s", self.spider_name, exc)
+
+    async def _escalate(self, request: Request, fetched: dict[str, Optional[str]]) -> None:
+        spec = self._specs.get(request.url) or {"url": request.url, "label": request.label, "user_data": {}}
+        # The validators travel with the request, to whichever worker renders it.
+        await self._frontier.requeue({**spec, "mode": BROWSER, "revalidate": False, "fetched": fetched})
+
+    async def _store(self, url: str, fetched: dict[str, Optional[str]], follow: list[dict[str, Any]]) -> None:
+        """Cache ``url`` once the items its handler emitted are saved."""
+        store = functools.partial(self._cache.store, url, fetched, follow)
+        if self._sink is not None:
+            await self._sink.after_saved(store)
+        else:
+            # The items are the caller's once the crawl returns.
+            self._deferred.append(store)
+
+    async def _store_deferred(self) -> None:
+        if self._sink is not None:
+            await self._sink.drain()
+        deferred, self._deferred = self._deferred, []
+        for store in deferred:
+            await store()
+
+    async def _handle(self, html: str, request: Request, mode: str, fetched: dict[str, Optional[str]]) -> None:
+        handler = self._handlers.get(request.label) or self._handlers[None]
+        try:
+            follow = await handler(html, request)
+        except NeedsBrowser as exc:
+            if mode == BROWSER:
+                logger.warning("%s is incomplete even after rendering: %s", request.url, exc)
+                return
+            logger.debug("Escalating %s to Playwright: %s", request.url, exc)
+            await self._memory.record(request.url, BROWSER)
+            await self._escalate(request, fetched)
+            return
+        self.pages[mode] += 1
+        if mode == HTTP:
+            await self._memory.record(request.url, HTTP)
+        if self._cache is not None:
+            await self._store(request.url, fetched, follow)
+        await self.enqueue(follow)
+
+    async def _on_http_response(self, request: Request, status_code: int, headers: dict[str, str], body: bytes) -> None:
+        url = request.url
+        cache = self._cache
+        if cache is not None and await cache.unchanged(url, status_code, body):
+            self.unchanged += 1
+            await cache.refresh(url, headers)
+            await self.enqueue((await cache.get(url))["follow"])
+            return
+        if not 200 <= status_code < 300:
+            # Only 5xx raise in the HTTP client. An error page is not the page: parsing
+            # it would escalate, and record its whole pattern as needing a browser.
+            logger.warning("%s: skipping %s (HTTP %d)", self.spider_name, url, status_code)
+            return
+        fetched = validators(headers, body)
+        if self._specs.get(url, {}).get("revalidate"):
+            await self._escalate(request, fetched)
+            return
+        await self._handle(_decode(body, headers), request, HTTP, fetched)
+
+    async def _run_http(self, requests: list[Request]) -> None:
+        crawler = await make_http_crawler(f"{self.spider_name}-http", self._budget)
+
+        @crawler.router.default_handler
+        async def handle(context: HttpCrawlingContext) -> None:
+            response = context.http_response
+            await self._on_http_response(context.request, response.status_code, response.headers, response.read())
+            await self._finish(context.request.url)
+
+        await crawler.run(requests)
+
+    async def _run_browser(self, requests: list[Request]) -> None:
+        crawler = await make_playwright_crawler(
+            f"{self.spider_name}-browser", self._browser_pool, self._budget
+        )
+
+        @crawler.router.default_handler
+        async def handle(context: PlaywrightCrawlingContext) -> None:
+            if self._prepare is not None:
+                await self._prepare(context.page)
+            # Keep the validators of the HTTP fetch this page escalated from, if any:
+            # revalidation next time compares against the raw response, not the DOM.
+            fetched = self._specs.get(context.request.url, {}).get("fetched") or {}
+            await self._handle(await context.page.content(), context.request, BROWSER, fetched)
+            await self._finish(context.request.url)
+
+        await crawler.run(requests)
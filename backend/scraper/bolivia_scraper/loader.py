@@ -0,0 +1,123 @@
+"""Bulk PostgreSQL loader: COPY into a staging table, then one merging upsert.
+
+Rows for a batch are streamed with ``COPY ... FROM STDIN`` into a session-local
+temp table shaped like the target's columns, then merged with a single
+``INSERT ... SELECT ... ON CONFLICT DO UPDATE``. One batch is one transaction,
+so a crawl costs a handful of round-trips and fsyncs instead of one per item.
+"""
+import io
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence
+
+import psycopg2
+from psycopg2 import sql
+
+
+@dataclass(frozen=True)
+class UpsertTarget:
+    """A table the loader writes to and the natural key its upserts resolve on.
+
+    ``expressions`` maps a column to the SQL applied to its staged value, for
+    columns (geometries) that are staged as text and converted in the merge.
+    ``conflict_target`` overrides the ``ON CONFLICT`` target when the unique
+    index is on expressions rather than the plain ``conflict`` columns.
+    """
+
+    table: str
+    columns: tuple[str, ...]
+    conflict: tuple[str, ...]
+    update: tuple[str, ...]
+    expressions: dict[str, str] = field(default_factory=dict, hash=False, compare=False)
+    conflict_target: str | None = None
+
+    def key(self, row: Sequence[Any]) -> tuple:
+        return tuple(row[self.columns.index(c)] for c in self.conflict)
+
+
+def psycopg2_dsn(url: str) -> str:
+    """libpq DSN from a SQLAlchemy-style URL (``postgresql+psycopg2://`` → ``postgresql://``)."""
+    return url.replace("postgresql+psycopg2://", "postgresql://", 1)
+
+
+def _copy_value(value: Any) -> str:
+    if value is None:
+        return r"\N"
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_buffer(rows: Iterable[Sequence[Any]]) -> io.StringIO:
+    buf = io.StringIO()
+    for row in rows:
+        buf.write("\t".join(_copy_value(v) for v in row))
+        buf.write("\n")
+    buf.seek(0)
+    return buf
+
+
+def _stage(target: UpsertTarget) -> sql.Identifier:
+    return sql.Identifier(f"_stage_{target.table}")
+
+
+def merge_statement(target: UpsertTarget) -> sql.Composed:
+    """The ``INSERT ... SELECT ... ON CONFLICT DO UPDATE`` merging ``target``'s staging table."""
+    merged = sql.SQL(", ").join(
+        sql.SQL(target.expressions[c]).format(sql.Identifier(c)) if c in target.expressions else sql.Identifier(c)
+        for c in target.columns
+    )
+    if target.conflict_target is not None:
+        conflict = sql.SQL(target.conflict_target)
+    else:
+        conflict = sql.SQL(", ").join(map(sql.Identifier, target.conflict))
+    return sql.SQL(
+        "INSERT INTO {table} ({columns}) SELECT {merged} FROM {stage} "
+        "ON CONFLICT ({conflict}) DO UPDATE SET {updates}"
+    ).format(
+        table=sql.Identifier(target.table),
+        columns=sql.SQL(", ").join(map(sql.Identifier, target.columns)),
+        merged=merged,
+        stage=_stage(target),
+        conflict=conflict,
+        updates=sql.SQL(", ").join(
+            sql.SQL("{col} = EXCLUDED.{col}").format(col=sql.Identifier(c)) for c in target.update
+        ),
+    )
+
+
+def copy_upsert(cur: psycopg2.extensions.cursor, target: UpsertTarget, rows: list[Sequence[Any]]) -> int:
+    """Load ``rows`` into ``target`` via COPY + merge; the caller commits.
+
+    Rows sharing a natural key are collapsed first (the last one wins), since
+    a single ``ON CONFLICT DO UPDATE`` cannot touch the same row twice.
+    Returns the number of rows merged.
+    """
+    rows = list({target.key(row): row for row in rows}.values())
+    if not rows:
+        return 0
+
+    stage = _stage(target)
+    columns = sql.SQL(", ").join(map(sql.Identifier, target.columns))
+    staged = sql.SQL(", ").join(
+        sql.SQL("NULL::text AS {}").format(sql.Identifier(c)) if c in target.expressions else sql.Identifier(c)
+        for c in target.columns
+    )
+    cur.execute(
+        sql.SQL(
+            "CREATE TEMP TABLE IF NOT EXISTS {stage} ON COMMIT DELETE ROWS AS "
+            "SELECT {staged} FROM {table} WITH NO DATA"
+        ).format(stage=stage, staged=staged, table=sql.Identifier(target.table))
+    )
+    cur.copy_expert(
+        sql.SQL("COPY {stage} ({columns}) FROM STDIN").format(stage=stage, columns=columns).as_string(cur),
+        _copy_buffer(rows),
+    )
+    cur.execute(merge_statement(target))
+    return len(rows)
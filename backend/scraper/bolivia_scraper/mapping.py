@@ -0,0 +1,248 @@
+"""Declarative item → table mapping used by the bulk DatabasePipeline.
+
+Each :class:`ItemMapping` names the item type it accepts, an optional
+predicate (e.g. on ``indicator``), the target table and one extractor per
+column. Natural keys come from the unique indexes of migration 006.
+"""
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any, Callable, Optional
+
+import psycopg2
+
+from bolivia_scraper.items import (
+    ConflictItem,
+    ContractItem,
+    EconomicDataItem,
+    ElectionResultItem,
+    EnvironmentItem,
+)
+from bolivia_scraper.loader import UpsertTarget
+
+Extractor = Callable[[Any, "DepartmentResolver"], Any]
+
+
+def _normalise(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).strip().lower()
+
+
+class DepartmentResolver:
+    """Department name (or code) → id, loaded once per connection and kept in memory."""
+
+    def __init__(self, conn: psycopg2.extensions.connection) -> None:
+        self._conn = conn
+        self._ids: dict[str, int] = {}
+
+    def __call__(self, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+        # An empty table (departments not seeded yet) is re-read on the next lookup.
+        if not self._ids:
+            self._ids = self._load()
+        return self._ids.get(_normalise(name))
+
+    def _load(self) -> dict[str, int]:
+        ids: dict[str, int] = {}
+        with self._conn.cursor() as cur:
+            cur.execute("SELECT id, name, code FROM departments")
+            for dep_id, dep_name, code in cur.fetchall():
+                ids[_normalise(dep_name)] = dep_id
+                if code:
+                    ids[_normalise(code)] = dep_id
+        self._conn.commit()
+        return ids
+
+
+# ── Extractors ───────────────────────────────────────────────────────────────
+
+def attr(name: str, default: Any = None) -> Extractor:
+    def extract(item: Any, _: Any) -> Any:
+        value = getattr(item, name)
+        return default if value is None else value
+
+    return extract
+
+
+def iso_date(name: str) -> Extractor:
+    """Parse an ISO date attribute; invalid values become NULL rather than failing the COPY."""
+
+    def extract(item: Any, _: Any) -> Optional[date]:
+        value = getattr(item, name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(str(value)[:10])
+        except ValueError:
+            return None
+
+    return extract
+
+
+def department(item: Any, resolve: DepartmentResolver) -> Optional[int]:
+    return resolve(item.department)
+
+
+def point(item: Any, _: Any) -> Optional[str]:
+    if item.latitude is None or item.longitude is None:
+        return None
+    return f"SRID=4326;POINT({item.longitude} {item.latitude})"
+
+
+def now(item: Any, _: Any) -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(frozen=True)
+class ItemMapping:
+    item_type: type
+    table: str
+    fields: dict[str, Extractor] = field(hash=False, compare=False)
+    conflict: tuple[str, ...]
+    when: Callable[[Any], bool] = field(default=lambda item: True, hash=False, compare=False)
+    expressions: dict[str, str] = field(default_factory=dict, hash=False, compare=False)
+    conflict_target: Optional[str] = None
+    target: UpsertTarget = field(init=False, hash=False, compare=False)
+
+    def __post_init__(self) -> None:
+        columns = tuple(self.fields)
+        update = tuple(c for c in columns if c not in self.conflict)
+        target = UpsertTarget(
+            self.table, columns, self.conflict, update, dict(self.expressions), self.conflict_target
+        )
+        object.__setattr__(self, "target", target)
+
+    def row(self, item: Any, resolve: DepartmentResolver) -> tuple:
+        return tuple(extract(item, resolve) for extract in self.fields.values())
+
+
+_POINT = "ST_GeogFromText({})"
+_MULTIPOLYGON = "ST_Multi(ST_GeomFromText({}, 4326))::geography"
+
+
+def _indicator(item: Any) -> str:
+    return (item.indicator or "").strip().lower()
+
+
+def _measurement(*indicators: str) -> Callable[[Any], bool]:
+    """Accept items for ``indicators`` that carry the NOT NULL year and value."""
+    return lambda item: _indicator(item) in indicators and item.year is not None and item.value is not None
+
+
+ITEM_MAPPINGS: tuple[ItemMapping, ...] = (
+    ItemMapping(
+        ElectionResultItem,
+        "election_results",
+        fields={
+            "year": attr("year"),
+            "election_type": attr("election_type"),
+            "party": attr("party", ""),
+            "candidate": attr("candidate", ""),
+            "votes": attr("votes"),
+            "percentage": attr("percentage"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("year", "election_type", "party", "candidate"),
+    ),
+    ItemMapping(
+        ConflictItem,
+        "social_conflicts",
+        fields={
+            "title": attr("title"),
+            "start_date": iso_date("start_date"),
+            "department_id": department,
+            "geometry": point,
+            "end_date": iso_date("end_date"),
+            "type": attr("type"),
+            "description": attr("description"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("title", "start_date"),
+        when=lambda item: bool(item.title),
+        expressions={"geometry": _POINT},
+    ),
+    ItemMapping(
+        EconomicDataItem,
+        "inflation",
+        fields={
+            "year": attr("year"),
+            "month": attr("month"),
+            "rate": attr("value"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("year", "month"),
+        when=_measurement("inflation", "ipc"),
+    ),
+    ItemMapping(
+        EconomicDataItem,
+        "gdp_per_capita",
+        fields={
+            "department_id": department,
+            "year": attr("year"),
+            "value_usd": attr("value"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("department_id", "year"),
+        when=_measurement("gdp_per_capita", "pib_per_capita"),
+    ),
+    ItemMapping(
+        ContractItem,
+        "public_contracts",
+        fields={
+            "sicoes_id": attr("sicoes_id"),
+            "title": attr("title"),
+            "amount": attr("amount"),
+            "contractor": attr("contractor"),
+            "department_id": department,
+            "geometry": point,
+            "date": iso_date("date"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("sicoes_id",),
+        when=lambda item: bool(item.sicoes_id and item.title),
+        expressions={"geometry": _POINT},
+    ),
+    ItemMapping(
+        EnvironmentItem,
+        "deforestation_zones",
+        fields={
+            "year": attr("year"),
+            "geometry": attr("geometry_wkt"),
+            "area_ha": attr("value"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        conflict=("year", "geometry"),
+        when=lambda item: _indicator(item) == "deforestation" and item.year is not None and bool(item.geometry_wkt),
+        expressions={"geometry": _MULTIPOLYGON},
+        conflict_target="year, md5(ST_AsEWKB(geometry::geometry))",
+    ),
+    ItemMapping(
+        EnvironmentItem,
+        "co2_emissions",
+        fields={
+            "year": attr("year"),
+            "value_mt": attr("value"),
+            "source": attr("source_url"),
+            "last_updated": now,
+        },
+        # National totals: sector stays NULL, which the NULLS NOT DISTINCT key matches.
+        conflict=("year",),
+        when=_measurement("co2", "co2_emissions"),
+        conflict_target="year, sector",
+    ),
+)
+
+
+def mapping_for(item: Any) -> Optional[ItemMapping]:
+    """First mapping accepting ``item``, or None if it has no table."""
+    for mapping in ITEM_MAPPINGS:
+        if isinstance(item, mapping.item_type) and mapping.when(item):
+            return mapping
+    return None
@@ -0,0 +1,50 @@
+"""Process pool for CPU-bound page parsing.
+
+Request handlers run on the event loop, so parsing a large page inline
+stalls every other fetch in the process. Handlers instead pass the HTML and
+a module-level parse function to :func:`parse`, which runs it in a worker
+process and returns its (picklable) result. The pool is shared by all
+spiders and sized by ``PARSE_WORKERS`` (one per CPU by default; ``0`` parses
+inline).
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from bolivia_scraper import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _executor() -> Optional[ProcessPoolExecutor]:
+    global _pool
+    if _pool is None and settings.PARSE_WORKERS > 0:
+        # spawn: forking a process that runs browser and event-loop threads is unsafe.
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PARSE_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        logger.info("Parsing pages in %d worker processes", settings.PARSE_WORKERS)
+    return _pool
+
+
+async def parse(fn: Callable[..., T], *args: Any) -> T:
+    """Run ``fn(*args)`` in the parse pool; ``fn`` and its arguments must be picklable."""
+    pool = _executor()
+    if pool is None:
+        return fn(*args)
+    return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+
+
+def shutdown() -> None:
+    """Stop the worker processes (a later :func:`parse` starts a new pool)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
@@ -2,16 +2,20 @@
 import hashlib
 import json
 import logging
+import threading
+import time
 from dataclasses import asdict
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, NamedTuple, Optional
 
 import redis as redis_lib
 import psycopg2
+from common.api_cache import invalidate_api_cache
 
 from bolivia_scraper import settings
-from bolivia_scraper.items import ElectionResultItem
+from bolivia_scraper.bloom import BloomFilter
+from bolivia_scraper.loader import UpsertTarget, copy_upsert, psycopg2_dsn
+from bolivia_scraper.mapping import DepartmentResolver, mapping_for
 
 logger = logging.getLogger(__name__)
 
@@ -29,10 +33,24 @@ def _item_hash(item: Any) -> str:
 
 
 class HashCheckPipeline:
-    """Drop items whose content hash has not changed since the last run."""
+    """Drop items whose content hash has not changed since the last run.
+
+    Items are checked in batches: one pipelined ``SET hash:<spider>:<sha> 1 NX
+    EX ttl`` round-trip claims every new hash atomically, so concurrent spider
+    processes never both accept the same item. With ``HASH_BLOOM_ENABLED`` a
+    local Bloom filter of hashes already seen answers most repeats without
+    Redis; its false positives (``HASH_BLOOM_ERROR_RATE``) drop changed items
+    until the filter expires, which is why it is off by default.
+
+    Items that claimed their hash but could not be saved are handed back
+    with :meth:`release`, so the next run saves them instead of skipping them
+    for the whole TTL.
+    """
 
     def __init__(self) -> None:
         self._redis: redis_lib.Redis | None = None
+        self._blooms: dict[str, BloomFilter] = {}
+        self._released: dict[str, set[str]] = {}
         try:
             self._redis = redis_lib.from_url(settings.REDIS_URL, decode_responses=True)
             self._redis.ping()
@@ -40,17 +58,82 @@ class HashCheckPipeline:
             logger.warning("Redis unavailable – hash check disabled: %s", exc)
             self._redis = None
 
-    def process(self, spider_name: str, item: Any) -> Any:
+    def _bloom(self, spider_name: str) -> BloomFilter | None:
+        if not settings.HASH_BLOOM_ENABLED:
+            return None
+        if spider_name not in self._blooms:
+            self._blooms[spider_name] = BloomFilter.load(
+                self._bloom_path(spider_name),
+                settings.HASH_BLOOM_CAPACITY,
+                settings.HASH_BLOOM_ERROR_RATE,
+                settings.HASH_TTL_SECONDS,
+            )
+        return self._blooms[spider_name]
+
+    @staticmethod
+    def _bloom_path(spider_name: str) -> Path:
+        return Path(settings.CRAWLEE_STORAGE_DIR) / "hash-bloom" / f"{spider_name}.bin"
+
+    def process_batch(self, spider_name: str, items: list[Any]) -> list[Any]:
+        """Return the items of ``items`` whose content is new or changed."""
         if self._redis is None:
-            return item
+            return items
+
+        bloom = self._bloom(spider_name)
+        candidates = []
+        released = self._released.get(spider_name, ())
+        for item in items:
+            digest = _item_hash(item)
+            if bloom is None or digest not in bloom or digest in released:
+                candidates.append((digest, item))
+        if not candidates:
+            return []
 
-        key = f"hash:{spider_name}:{_item_hash(item)}"
-        if self._redis.get(key):
-            raise DropItem(f"Unchanged item – skipping")
+        with self._redis.pipeline(transaction=False) as pipe:
+            for digest, _ in candidates:
+                pipe.set(f"hash:{spider_name}:{digest}", "1", nx=True, ex=settings.HASH_TTL_SECONDS)
+            claimed = pipe.execute()
 
-        self._redis.set(key, "1", ex=settings.HASH_TTL_SECONDS)
+        fresh = []
+        for (digest, item), is_new in zip(candidates, claimed):
+            if bloom is not None:
+                bloom.add(digest)
+            if is_new:
+                fresh.append(item)
+        return fresh
+
+    def process(self, spider_name: str, item: Any) -> Any:
+        if not self.process_batch(spider_name, [item]):
+            raise DropItem("Unchanged item – skipping")
         return item
 
+    def release(self, spider_name: str, items: list[Any]) -> None:
+        """Forget the claimed hashes of ``items`` (they were not saved)."""
+        if self._redis is None or not items:
+            return
+        digests = {_item_hash(item) for item in items}
+        try:
+            self._redis.delete(*(f"hash:{spider_name}:{digest}" for digest in digests))
+        except Exception as exc:
+            logger.error("Could not release %d item hashes for %s: %s", len(digests), spider_name, exc)
+        # A Bloom filter cannot forget; remember the digests so it is bypassed for them.
+        self._released.setdefault(spider_name, set()).update(digests)
+
+    def close(self) -> None:
+        for spider_name, bloom in self._blooms.items():
+            if self._released.get(spider_name):
+                logger.warning(
+                    "Not persisting hash Bloom filter for %s: it holds hashes of items that were not saved",
+                    spider_name,
+                )
+                continue
+            try:
+                bloom.save(self._bloom_path(spider_name), settings.HASH_TTL_SECONDS)
+            except OSError as exc:
+                logger.warning("Could not persist hash Bloom filter for %s: %s", spider_name, exc)
+        self._blooms.clear()
+        self._released.clear()
+
 
 class JsonExportPipeline:
     """Append each item to a JSONL file under data/raw/<spider_name>.jsonl"""
@@ -68,66 +151,195 @@ class JsonExportPipeline:
         self._handles[spider_name].write(json.dumps(d, default=str) + "\n")
         return item
 
+    def process_batch(self, spider_name: str, items: list[Any]) -> list[Any]:
+        """Append ``items`` and flush, so streamed batches land on disk as they arrive."""
+        for item in items:
+            self.process(spider_name, item)
+        if spider_name in self._handles:
+            self._handles[spider_name].flush()
+        return items
+
     def close(self) -> None:
         for fh in self._handles.values():
             fh.close()
         self._handles.clear()
 
 
+class _Row(NamedTuple):
+    values: tuple
+    spider_name: str
+    item: Any
+
+
 class DatabasePipeline:
-    """Upsert election results into PostgreSQL."""
+    """Buffer rows per target table and bulk-load them with COPY + upsert.
 
-    def __init__(self) -> None:
+    Items are routed through :data:`bolivia_scraper.mapping.ITEM_MAPPINGS`;
+    items without a mapping are logged once per type and passed through.
+    A batch is flushed when it reaches ``DB_BATCH_SIZE`` rows, on close, and
+    by a background timer every ``DB_FLUSH_INTERVAL_SECS`` – also while no
+    items arrive.
+
+    A batch is one transaction. If it fails it is retried table by table,
+    then row by row, so one bad row only loses itself; the items of rows
+    that still fail are passed to ``on_failed`` (e.g.
+    :meth:`HashCheckPipeline.release`).
+
+    ``flushes`` counts completed flushes; with :meth:`ticket` a caller can
+    tell when every item it processed so far has been written.
+    """
+
+    def __init__(self, on_failed: Optional[Callable[[str, list[Any]], None]] = None) -> None:
         self._conn: psycopg2.extensions.connection | None = None
-        self._cur: psycopg2.extensions.cursor | None = None
+        self._buffers: dict[UpsertTarget, list[_Row]] = {}
+        self._pending = 0
+        self.flushes = 0
+        self._last_flush = time.monotonic()
+        self._unmapped: set[type] = set()
+        self._on_failed = on_failed
+        # The timer thread and the pipeline's caller share the connection.
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._timer: threading.Thread | None = None
         try:
-            self._conn = psycopg2.connect(settings.DATABASE_SYNC_URL)
-            self._cur = self._conn.cursor()
+            self._conn = psycopg2.connect(psycopg2_dsn(settings.DATABASE_SYNC_URL))
+            self._departments = DepartmentResolver(self._conn)
         except Exception as exc:
             logger.warning("DB connection failed – DB pipeline disabled: %s", exc)
             self._conn = None
+            return
+        self._timer = threading.Thread(target=self._flush_periodically, name="db-flush", daemon=True)
+        self._timer.start()
+
+    def _flush_periodically(self) -> None:
+        while not self._stop.wait(settings.DB_FLUSH_INTERVAL_SECS):
+            try:
+                self.flush_if_due()
+            except Exception as exc:
+                logger.error("Timed DB flush failed: %s", exc)
 
     def process(self, spider_name: str, item: Any) -> Any:
         if self._conn is None:
             return item
 
-        if isinstance(item, ElectionResultItem):
-            try:
-                self._cur.execute(
-                    """
-                    INSERT INTO election_results
-                        (year, election_type, party, candidate, votes, percentage, source, last_updated)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                    ON CONFLICT ON CONSTRAINT uq_election_results
-                    DO UPDATE SET
-                        votes        = EXCLUDED.votes,
-                        percentage   = EXCLUDED.percentage,
-                        source       = EXCLUDED.source,
-                        last_updated = EXCLUDED.last_updated
-                    """,
-                    (
-                        item.year,
-                        item.election_type,
-                        item.party or "",
-                        item.candidate or "",
-                        item.votes,
-                        item.percentage,
-                        item.source_url,
-                        datetime.now(timezone.utc),
-                    ),
+        mapping = mapping_for(item)
+        if mapping is not None:
+            with self._lock:
+                self._add(mapping.target, _Row(mapping.row(item, self._departments), spider_name, item))
+        elif type(item) not in self._unmapped:
+            self._unmapped.add(type(item))
+            logger.warning("No table mapping for %s item from %s – not persisted", type(item).__name__, spider_name)
+
+        self.flush_if_due()
+        return item
+
+    def process_batch(self, spider_name: str, items: list[Any]) -> list[Any]:
+        for item in items:
+            self.process(spider_name, item)
+        self.flush_if_due()
+        return items
+
+    @property
+    def enabled(self) -> bool:
+        return self._conn is not None
+
+    def ticket(self) -> Optional[int]:
+        """``None`` if every processed item is written, else the flush count to wait past."""
+        with self._lock:
+            return self.flushes if self._pending else None
+
+    def written(self, ticket: Optional[int]) -> bool:
+        """Whether the items processed when ``ticket`` was taken are written (or failed)."""
+        return ticket is None or self.flushes > ticket
+
+    def flush_if_due(self) -> None:
+        """Flush when the batch is full or the flush interval has elapsed."""
+        with self._lock:
+            if (
+                self._pending >= settings.DB_BATCH_SIZE
+                or time.monotonic() - self._last_flush >= settings.DB_FLUSH_INTERVAL_SECS
+            ):
+                self.flush()
+
+    def _add(self, target: UpsertTarget, row: _Row) -> None:
+        self._buffers.setdefault(target, []).append(row)
+        self._pending += 1
+
+    def _write(self, buffers: dict[UpsertTarget, list[_Row]]) -> int:
+        """Load ``buffers`` in one transaction; rolls back and re-raises on failure."""
+        try:
+            with self._conn.cursor() as cur:
+                merged = sum(
+                    copy_upsert(cur, target, [row.values for row in rows]) for target, rows in buffers.items()
                 )
-                self._conn.commit()
+            self._conn.commit()
+        except Exception:
+            self._conn.rollback()
+            raise
+        return merged
+
+    def _write_table(self, target: UpsertTarget, rows: list[_Row], failed: list[_Row]) -> int:
+        """Load one table's rows, falling back to one transaction per row."""
+        try:
+            return self._write({target: rows})
+        except Exception as exc:
+            if len(rows) == 1:
+                logger.error("DB load of a %s row failed: %s", target.table, exc)
+                failed.extend(rows)
+                return 0
+            logger.warning("DB load of %d %s rows failed, retrying row by row: %s", len(rows), target.table, exc)
+        merged = 0
+        for row in rows:
+            try:
+                merged += self._write({target: [row]})
             except Exception as exc:
-                logger.error("DB insert error: %s", exc)
-                self._conn.rollback()
+                logger.error("DB load of a %s row failed: %s", target.table, exc)
+                failed.append(row)
+        return merged
 
-        return item
+    def flush(self) -> int:
+        """Write every buffered row, in one transaction unless it fails. Returns rows merged."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if self._conn is None or not self._pending:
+                return 0
+            buffers, self._buffers, self._pending = self._buffers, {}, 0
+            failed: list[_Row] = []
+            try:
+                merged = self._write(buffers)
+            except Exception as exc:
+                logger.warning(
+                    "DB bulk load of %d rows failed, retrying table by table: %s",
+                    sum(map(len, buffers.values())), exc,
+                )
+                merged = sum(self._write_table(target, rows, failed) for target, rows in buffers.items())
+            if failed:
+                self._handle_failed(failed)
+            self.flushes += 1
+
+        failed_ids = {id(row) for row in failed}
+        invalidate_api_cache(
+            {target.table for target, rows in buffers.items() if any(id(row) not in failed_ids for row in rows)},
+            settings.REDIS_URL,
+        )
+        return merged
+
+    def _handle_failed(self, rows: list[_Row]) -> None:
+        logger.error("%d rows could not be saved", len(rows))
+        if self._on_failed is None:
+            return
+        by_spider: dict[str, list[Any]] = {}
+        for row in rows:
+            by_spider.setdefault(row.spider_name, []).append(row.item)
+        for spider_name, items in by_spider.items():
+            self._on_failed(spider_name, items)
 
     def close(self) -> None:
+        self._stop.set()
+        if self._timer is not None:
+            self._timer.join()
         if self._conn:
-            self._conn.commit()
-            if self._cur:
-                self._cur.close()
+            self.flush()
             self._conn.close()
 
 
@@ -135,20 +347,27 @@ def run_pipelines(spider_name: str, items: list[Any]) -> int:
     """Run all pipelines over a list of items. Returns count of persisted items."""
     hash_pipe = HashCheckPipeline()
     json_pipe = JsonExportPipeline()
-    db_pipe = DatabasePipeline()
+    db_pipe = DatabasePipeline(on_failed=hash_pipe.release)
 
     saved = 0
-    for item in items:
+    for start in range(0, len(items), settings.HASH_BATCH_SIZE):
+        batch = items[start:start + settings.HASH_BATCH_SIZE]
         try:
-            item = hash_pipe.process(spider_name, item)
-            item = json_pipe.process(spider_name, item)
-            item = db_pipe.process(spider_name, item)
-            saved += 1
-        except DropItem:
-            pass
+            batch = hash_pipe.process_batch(spider_name, batch)
         except Exception as exc:
-            logger.error("Pipeline error for %s: %s", spider_name, exc)
+            logger.error("Hash check failed for %s – passing batch through: %s", spider_name, exc)
+        for item in batch:
+            try:
+                item = json_pipe.process(spider_name, item)
+                item = db_pipe.process(spider_name, item)
+                saved += 1
+            except DropItem:
+                pass
+            except Exception as exc:
+                logger.error("Pipeline error for %s: %s", spider_name, exc)
 
-    json_pipe.close()
+    # The database first: its last flush may release hashes.
     db_pipe.close()
+    hash_pipe.close()
+    json_pipe.close()
     return saved
@@ -4,14 +4,20 @@ OEP (Órgano Electoral Plurinacional) election results spider using Crawlee.
 import logging
 import re
 from datetime import datetime, timezone
-from typing import Optional
+from typing import Any, Optional, Protocol
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
-from crawlee.playwright_crawler import PlaywrightCrawler, PlaywrightCrawlingContext
+from crawlee import Request
+from crawlee.browsers import BrowserPool
+from lxml.html import HtmlElement
+from playwright.async_api import Page
 
-from bolivia_scraper import settings
+from bolivia_scraper import parsing, settings
+from bolivia_scraper.crawling import CrawlBudget
+from bolivia_scraper.hybrid import HybridCrawl, NeedsBrowser, SavedItems
 from bolivia_scraper.items import ElectionResultItem
+from bolivia_scraper.tables import YEAR, cells, parse_float, parse_html, parse_int, text
+from bolivia_scraper.waits import PageWaits
 
 logger = logging.getLogger(__name__)
 
@@ -46,6 +52,8 @@ START_URLS = [
 
 NAME = "oep_elections"
 
+_NEXT_PAGE = re.compile(r"next|siguiente")
+
 
 def _classify_election_type(text: str) -> str:
     text_lower = text.lower()
@@ -56,29 +64,15 @@ def _classify_election_type(text: str) -> str:
 
 
 def _extract_year(text: str) -> Optional[int]:
-    m = re.search(r"\b(19|20)\d{2}\b", text)
+    m = YEAR.search(text)
     return int(m.group(0)) if m else None
 
 
-def _parse_results_table(
-    table_html: str,
-    year: Optional[int],
-    election_type: str,
-    source_url: str,
-) -> list[ElectionResultItem]:
-    """Extract election-result rows from an HTML <table>."""
-    soup = BeautifulSoup(table_html, "lxml")
-    rows = soup.find_all("tr")
-    if not rows:
-        return []
-
-    # Identify columns from the first header row
-    headers = [
-        cell.get_text(strip=True).lower()
-        for cell in rows[0].find_all(["th", "td"])
-    ]
+def _column_map(header: list[HtmlElement]) -> dict[str, int]:
+    """Result column → index, identified from the header row's labels."""
     col: dict[str, int] = {}
-    for i, h in enumerate(headers):
+    for i, cell in enumerate(header):
+        h = text(cell).lower()
         if any(k in h for k in ["partido", "organización", "sigla"]):
             col.setdefault("party", i)
         elif any(k in h for k in ["candidato", "nombre"]):
@@ -89,32 +83,34 @@ def _parse_results_table(
             col.setdefault("percentage", i)
         elif any(k in h for k in ["departamento", "circunscripción", "municipio"]):
             col.setdefault("department", i)
+    return col
+
+
+def _parse_results_table(
+    table: HtmlElement,
+    year: Optional[int],
+    election_type: str,
+    source_url: str,
+) -> list[ElectionResultItem]:
+    """Extract election-result rows from a parsed ``<table>`` element."""
+    rows = list(table.iter("tr"))
+    if not rows:
+        return []
 
+    col = _column_map(cells(rows[0]))
     if not col:
         return []
 
+    scraped_at = datetime.now(timezone.utc).isoformat()
     items: list[ElectionResultItem] = []
     for row in rows[1:]:
-        cells = row.find_all("td")
-        if len(cells) < 2:
+        values = [text(cell) or None for cell in cells(row, "td")]
+        if len(values) < 2:
             continue
 
         def _cell(key: str) -> Optional[str]:
             idx = col.get(key)
-            if idx is None or idx >= len(cells):
-                return None
-            return cells[idx].get_text(strip=True) or None
-
-        votes_raw = _cell("votes")
-        pct_raw = _cell("percentage")
-        try:
-            votes = int(re.sub(r"\D", "", votes_raw)) if votes_raw else None
-        except ValueError:
-            votes = None
-        try:
-            percentage = float(re.sub(r"[^\d.]", "", pct_raw)) if pct_raw else None
-        except ValueError:
-            percentage = None
+            return values[idx] if idx is not None and idx < len(values) else None
 
         dept_raw = _cell("department") or ""
         department = _DEPARTMENTS.get(dept_raw.lower(), dept_raw or None)
@@ -126,138 +122,189 @@ def _parse_results_table(
                 department=department,
                 party=_cell("party"),
                 candidate=_cell("candidate"),
-                votes=votes,
-                percentage=percentage,
+                votes=parse_int(_cell("votes")),
+                percentage=parse_float(_cell("percentage")),
                 source_url=source_url,
-                scraped_at=datetime.now(timezone.utc).isoformat(),
+                scraped_at=scraped_at,
             )
         )
     return items
 
 
+def parse_election_page(
+    html: str, url: str, election_type: str
+) -> Optional[tuple[list[ElectionResultItem], list[str]]]:
+    """Result items and pagination URLs of an election page; None if it has no tables.
+
+    The page is parsed once; every table is read from that single tree.
+    """
+    root = parse_html(html)
+    tables = list(root.iter("table")) if root is not None else []
+    if not tables:
+        return None
+
+    # Extract year from URL and title
+    title_text = " ".join(h.text_content() for h in root.iter("h1", "h2"))
+    year = _extract_year(url + " " + title_text)
+
+    items: list[ElectionResultItem] = []
+    for table in tables:
+        items.extend(_parse_results_table(table, year, election_type, url))
+
+    next_urls = [
+        urljoin(url, a.get("href"))
+        for a in root.iter("a")
+        if a.get("href") is not None and any(_NEXT_PAGE.search(c) for c in a.get("class", "").split())
+    ]
+    return items, next_urls
+
+
+_EXPANDERS = ["button.accordion", ".tab-link", "[data-toggle='collapse']"]
+# What a rendered page is waited for: a results table with data rows under a
+# votes header, or (on index pages) a link to an election year.
+_CONTENT = (
+    'table:has(tr + tr td):text-matches("votos|total", "i"), '
+    'a[href]:text-matches("(19|20)[0-9]{2}")'
+)
+# Whether an expander's panel is open (Bootstrap collapse, tabs, accordions).
+_IS_EXPANDED = (
+    "el => el.getAttribute('aria-expanded') === 'true'"
+    " || el.classList.contains('active') || el.classList.contains('show')"
+)
+
+
+def _election_links(html: str, base_url: str) -> list[dict[str, Any]]:
+    """Election event pages linked from an index page (links mentioning a year)."""
+    root = parse_html(html)
+    if root is None:
+        return []
+    requests = []
+    for a in root.iter("a"):
+        href = a.get("href")
+        if href is None:
+            continue
+        link_text = text(a)
+        if not (YEAR.search(href) or YEAR.search(link_text)):
+            continue
+        requests.append(
+            {
+                "url": urljoin(base_url, href),
+                "label": "election_page",
+                "user_data": {"election_type": _classify_election_type(href + " " + link_text)},
+            }
+        )
+    return requests
+
+
+class ItemSink(SavedItems, Protocol):
+    async def put(self, item: Any) -> None: ...
+
+
 class OEPElectionsSpider:
-    """Crawlee-based spider for OEP election results."""
+    """Crawlee-based spider for OEP election results.
+
+    Pages are fetched over plain HTTP first and rendered with Playwright only
+    when their HTML lacks the expected links or tables (see :mod:`bolivia_scraper.hybrid`).
+    Parsing runs in the shared process pool of :mod:`bolivia_scraper.parsing`.
+    """
 
     name = NAME
 
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        browser_pool: Optional[BrowserPool] = None,
+        budget: Optional[CrawlBudget] = None,
+        worker: bool = False,
+    ) -> None:
+        self._browser_pool = browser_pool
+        self._budget = budget
+        self._worker = worker
         self.results: list[ElectionResultItem] = []
-        self._visited_election_pages: set[str] = set()
-
-    async def run(self) -> list[ElectionResultItem]:
-        """Run the crawler and return scraped items."""
-        crawler = PlaywrightCrawler(
-            max_requests_per_crawl=settings.MAX_REQUESTS_PER_CRAWL or None,
-            max_request_retries=settings.MAX_REQUEST_RETRIES,
-            max_concurrency=settings.MAX_CONCURRENCY,
-            min_concurrency=settings.MIN_CONCURRENCY,
-            request_handler_timeout_secs=settings.REQUEST_HANDLER_TIMEOUT_SECS,
-            headless=settings.HEADLESS,
-            browser_type=settings.BROWSER_TYPE,
-        )
-
-        @crawler.router.default_handler
-        async def handle_index(context: PlaywrightCrawlingContext) -> None:
-            """Handle index pages and discover election event links."""
-            await context.page.wait_for_load_state("networkidle")
-            await context.page.wait_for_timeout(1500)
-
-            # Expand collapsible sections
-            for selector in ["button.accordion", ".tab-link", "[data-toggle='collapse']"]:
-                buttons = await context.page.query_selector_all(selector)
-                for btn in buttons:
-                    try:
-                        await btn.click()
-                        await context.page.wait_for_timeout(300)
-                    except Exception:
-                        pass
-
-            html = await context.page.content()
-            soup = BeautifulSoup(html, "lxml")
-
-            logger.info(f"Processing index: {context.request.url}")
-
-            # Find election event links
-            links_added = 0
-            for a in soup.find_all("a", href=True):
-                href: str = a["href"]
-                text: str = a.get_text(strip=True)
-                combined = href + " " + text
-
-                # Only follow links that mention years
-                if not (re.search(r"\b(19|20)\d{2}\b", href) or re.search(r"\b(19|20)\d{2}\b", text)):
+        self.scraped = 0
+        self._sink: Optional[ItemSink] = None
+        self.waits = PageWaits()
+
+    async def _emit(self, items: list[ElectionResultItem]) -> None:
+        self.scraped += len(items)
+        if self._sink is None:
+            self.results.extend(items)
+            return
+        for item in items:
+            await self._sink.put(item)
+
+    async def prepare(self, page: Page) -> None:
+        """Render the page fully in Playwright: wait for content to settle and open collapsed sections.
+
+        Waits end as soon as a results table (or election link) is present and
+        the DOM stops changing, and each expander as soon as its panel reports
+        itself open, instead of fixed sleeps after load and after every click.
+        """
+        await self.waits.selector(page, _CONTENT, "content")
+        await self.waits.dom_quiet(page, "settle")
+        expanded = False
+        for selector in _EXPANDERS:
+            for btn in await page.query_selector_all(selector):
+                try:
+                    # Clicking an open panel would collapse it.
+                    if await btn.evaluate(_IS_EXPANDED):
+                        continue
+                    await btn.click()
+                except Exception:
                     continue
+                await self.waits.function(
+                    page, _IS_EXPANDED, btn, "expand", timeout_ms=settings.WAIT_DOM_QUIET_MS * 8
+                )
+                expanded = True
+        if expanded:
+            # Let the opened panels render their tables.
+            await self.waits.dom_quiet(page, "expanded")
+
+    async def handle_index(self, html: str, request: Request) -> list[dict[str, Any]]:
+        """Discover election event links on an index page."""
+        logger.info(f"Processing index: {request.url}")
+        links = await parsing.parse(_election_links, html, request.url)
+        if not links:
+            raise NeedsBrowser("no election links in static HTML")
+        logger.info(f"Found {len(links)} election page URLs on {request.url}")
+        return links
+
+    async def handle_election_page(self, html: str, request: Request) -> list[dict[str, Any]]:
+        """Extract result tables from an election event page and follow its pagination."""
+        url = request.url
+        election_type = request.user_data.get("election_type", "general")
+        parsed = await parsing.parse(parse_election_page, html, url, election_type)
+        if parsed is None:
+            raise NeedsBrowser("no result tables in static HTML")
+
+        logger.info(f"Processing election page: {url}")
+        items, next_urls = parsed
+        await self._emit(items)
+        logger.info(f"Extracted {len(items)} items from {url}")
+
+        return [
+            {"url": next_url, "label": "election_page", "user_data": {"election_type": election_type}}
+            for next_url in next_urls
+        ]
+
+    async def run(self, sink: Optional[ItemSink] = None) -> list[ElectionResultItem]:
+        """Run the crawl.
+
+        With a ``sink`` (e.g. :class:`~bolivia_scraper.streaming.StreamingPipeline`)
+        items are pushed to it as each page is parsed and nothing is retained;
+        otherwise they are collected and returned.
+        """
+        self._sink = sink
+        crawl = HybridCrawl(
+            self.name,
+            {None: self.handle_index, "election_page": self.handle_election_page},
+            prepare=self.prepare,
+            browser_pool=self._browser_pool,
+            budget=self._budget,
+            worker=self._worker,
+            sink=sink,
+        )
+        await crawl.run(START_URLS)
+        self.waits.log_summary(self.name)
 
-                full_url = urljoin(str(context.request.url), href)
-                
-                if full_url not in self._visited_election_pages:
-                    self._visited_election_pages.add(full_url)
-                    election_type = _classify_election_type(combined)
-                    
-                    # Enqueue for election page handler
-                    await context.add_requests([
-                        {
-                            "url": full_url,
-                            "label": "election_page",
-                            "user_data": {"election_type": election_type},
-                        }
-                    ])
-                    links_added += 1
-
-            logger.info(f"Added {links_added} election page URLs from {context.request.url}")
-
-        @crawler.router.handler("election_page")
-        async def handle_election_page(context: PlaywrightCrawlingContext) -> None:
-            """Handle individual election event pages and extract tables."""
-            await context.page.wait_for_load_state("networkidle")
-            await context.page.wait_for_timeout(1500)
-
-            # Expand collapsible sections
-            for selector in ["button.accordion", ".tab-link", "[data-toggle='collapse']"]:
-                buttons = await context.page.query_selector_all(selector)
-                for btn in buttons:
-                    try:
-                        await btn.click()
-                        await context.page.wait_for_timeout(300)
-                    except Exception:
-                        pass
-
-            html = await context.page.content()
-            soup = BeautifulSoup(html, "lxml")
-            
-            url = str(context.request.url)
-            election_type = context.request.user_data.get("election_type", "general")
-            
-            logger.info(f"Processing election page: {url}")
-
-            # Extract year from URL and title
-            title_text = " ".join(t.get_text() for t in soup.find_all(["h1", "h2"]))
-            year = _extract_year(url + " " + title_text)
-
-            # Extract all tables
-            items_count = 0
-            for table in soup.find_all("table"):
-                items = _parse_results_table(str(table), year, election_type, url)
-                self.results.extend(items)
-                items_count += len(items)
-
-            logger.info(f"Extracted {items_count} items from {url}")
-
-            # Follow pagination links
-            for a in soup.find_all("a", class_=re.compile(r"next|siguiente"), href=True):
-                next_url = urljoin(url, a["href"])
-                if next_url not in self._visited_election_pages:
-                    self._visited_election_pages.add(next_url)
-                    await context.add_requests([
-                        {
-                            "url": next_url,
-                            "label": "election_page",
-                            "user_data": {"election_type": election_type},
-                        }
-                    ])
-
-        # Run the crawler
-        await crawler.run(START_URLS)
-        
-        logger.info(f"OEP spider finished – {len(self.results)} items scraped")
+        logger.info(f"OEP spider finished – {self.scraped} items scraped")
         return self.results
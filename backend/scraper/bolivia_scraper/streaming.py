@@ -0,0 +1,190 @@
+"""Streaming item pipeline: spiders push items, stages consume them concurrently.
+
+Items flow through bounded queues: spider → hash check → JSONL export →
+database. Each stage drains its queue in batches and runs the blocking
+pipeline code in a worker thread, so all three make progress at once while
+the crawler keeps fetching. When a queue is full ``put`` blocks, which slows
+the spider's request handlers instead of growing memory.
+
+:meth:`StreamingPipeline.after_saved` queues a callback behind the items
+put so far; it runs once the database stage has written them, e.g. to
+record a page as crawled only when its items are safe.
+
+Usage::
+
+    async with StreamingPipeline(spider.name) as stream:
+        await spider.run(stream)
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from bolivia_scraper import settings
+from bolivia_scraper.pipelines import DatabasePipeline, HashCheckPipeline, JsonExportPipeline
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class _Saved:
+    """Stream marker: ``callback`` runs once the items queued before it are written."""
+
+    def __init__(self, callback: Callable[[], Awaitable[None]], always: bool = False) -> None:
+        self.callback = callback
+        # Run even if items were lost (drain markers); others are dropped then.
+        self.always = always
+        self.ticket: Optional[int] = None
+
+
+async def _collect(queue: asyncio.Queue, size: int, timeout: float) -> tuple[list[Any], bool]:
+    """Take up to ``size`` queued items, waiting at most ``timeout`` for the first.
+
+    Returns the batch and whether the end-of-stream marker was reached.
+    """
+    try:
+        first = await asyncio.wait_for(queue.get(), timeout)
+    except asyncio.TimeoutError:
+        return [], False
+    if first is _END:
+        return [], True
+    batch = [first]
+    while len(batch) < size:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        if item is _END:
+            return batch, True
+        batch.append(item)
+    return batch, False
+
+
+class StreamingPipeline:
+    """Bounded, concurrent hash-check → export → database pipeline for one spider."""
+
+    def __init__(
+        self,
+        spider_name: str,
+        maxsize: int = settings.ITEM_QUEUE_SIZE,
+        batch_size: int = settings.HASH_BATCH_SIZE,
+    ) -> None:
+        self.spider_name = spider_name
+        self.scraped = 0
+        self.saved = 0
+        self._batch_size = batch_size
+        self._queues = [asyncio.Queue(maxsize=maxsize) for _ in range(3)]
+        self._hash = HashCheckPipeline()
+        self._json = JsonExportPipeline()
+        self._db = DatabasePipeline(on_failed=self._release)
+        self._tasks: list[asyncio.Task] = []
+        # Markers that reached the database stage, waiting for their items' flush.
+        self._waiting: list[_Saved] = []
+        # Set once any item could not be saved; after_saved() callbacks are dropped from then on.
+        self._lost = not self._db.enabled
+
+    async def put(self, item: Any) -> None:
+        """Queue ``item``; waits while the pipeline is ``maxsize`` items behind."""
+        self.scraped += 1
+        await self._queues[0].put(item)
+
+    async def after_saved(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run ``callback`` once every item queued so far is in the database.
+
+        It is dropped if any item of the crawl could not be saved (or the
+        database is unavailable), since it may have been one of those.
+        """
+        await self._queues[0].put(_Saved(callback))
+
+    async def drain(self) -> None:
+        """Flush the database and wait until every pending :meth:`after_saved` callback has run."""
+        drained = asyncio.Event()
+
+        async def done() -> None:
+            drained.set()
+
+        await self._queues[0].put(_Saved(done, always=True))
+        await drained.wait()
+
+    def _release(self, spider_name: str, items: list[Any]) -> None:
+        self._lost = True
+        self._hash.release(spider_name, items)
+
+    async def __aenter__(self) -> "StreamingPipeline":
+        hash_q, json_q, db_q = self._queues
+        self._tasks = [
+            asyncio.create_task(self._stage("hash check", self._hash.process_batch, hash_q, json_q)),
+            asyncio.create_task(self._stage("JSONL export", self._json.process_batch, json_q, db_q)),
+            asyncio.create_task(self._stage("database", self._db.process_batch, db_q, None)),
+        ]
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self._queues[0].put(_END)
+        await asyncio.gather(*self._tasks)
+        await asyncio.to_thread(self._close)
+
+    def _close(self) -> None:
+        # The database first: its last flush may release hashes.
+        self._db.close()
+        self._hash.close()
+        self._json.close()
+
+    async def _stage(
+        self,
+        name: str,
+        process: Callable[[str, list[Any]], list[Any]],
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+    ) -> None:
+        """Run ``process`` over batches from ``inbox`` until end of stream.
+
+        A failing batch is logged and passed on unchanged (as the list-based
+        ``run_pipelines`` does), so one bad batch never stalls the spider.
+        :class:`_Saved` markers are passed on behind the batch they came
+        with; the last stage holds them until the database has written it.
+        """
+        while True:
+            batch, done = await _collect(inbox, self._batch_size, settings.ITEM_BATCH_WAIT_SECS)
+            markers = [item for item in batch if isinstance(item, _Saved)]
+            batch = [item for item in batch if not isinstance(item, _Saved)]
+            if batch:
+                try:
+                    batch = await asyncio.to_thread(process, self.spider_name, batch)
+                except Exception as exc:
+                    logger.error("%s stage failed for %s: %s", name, self.spider_name, exc)
+                    if outbox is None:
+                        self._lost = True
+                if outbox is None:
+                    self.saved += len(batch)
+                else:
+                    for item in batch:
+                        await outbox.put(item)
+            if outbox is None:
+                if done:
+                    await asyncio.to_thread(self._db.flush)
+                await self._settle(markers)
+            else:
+                for marker in markers:
+                    await outbox.put(marker)
+            if done:
+                if outbox is not None:
+                    await outbox.put(_END)
+                return
+
+    async def _settle(self, arrived: list[_Saved]) -> None:
+        """Run the callbacks of markers whose items are written, in arrival order."""
+        for marker in arrived:
+            if marker.always:
+                # A drain: write what is buffered now instead of waiting for the timer.
+                await asyncio.to_thread(self._db.flush)
+            marker.ticket = self._db.ticket()
+            self._waiting.append(marker)
+        while self._waiting and self._db.written(self._waiting[0].ticket):
+            marker = self._waiting.pop(0)
+            if self._lost and not marker.always:
+                continue
+            try:
+                await marker.callback()
+            except Exception as exc:
+                logger.error("after_saved callback failed for %s: %s", self.spider_name, exc)
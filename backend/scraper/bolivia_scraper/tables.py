@@ -0,0 +1,53 @@
+"""Single-pass HTML table extraction on lxml.
+
+Pages are parsed once with :func:`parse_html`; tables, rows and cells are
+then walked as lxml elements, without serialising them back to markup or
+building a second parse tree per table. Cell text matches BeautifulSoup's
+``get_text(strip=True)``; numeric parsing uses precompiled patterns.
+"""
+import re
+from typing import Optional
+
+import lxml.html
+from lxml import etree
+from lxml.html import HtmlElement
+
+YEAR = re.compile(r"\b(19|20)\d{2}\b")
+_NON_DIGIT = re.compile(r"\D")
+_NON_DECIMAL = re.compile(r"[^\d.]")
+
+
+def parse_html(html: str) -> Optional[HtmlElement]:
+    """Document root of ``html``, or None for an empty or unparsable page."""
+    try:
+        return lxml.html.document_fromstring(html)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def text(element: HtmlElement) -> str:
+    """Stripped text fragments joined without separator (BeautifulSoup ``get_text(strip=True)``)."""
+    return "".join(part.strip() for part in element.itertext())
+
+
+def cells(row: HtmlElement, *tags: str) -> list[HtmlElement]:
+    """Descendant cells of ``row`` (``<th>`` and ``<td>`` unless ``tags`` narrows it)."""
+    return list(row.iter(*(tags or ("th", "td"))))
+
+
+def parse_int(raw: Optional[str]) -> Optional[int]:
+    """Digits of ``raw`` as an int (``"1.234.567"`` → 1234567), None if there are none."""
+    if not raw:
+        return None
+    digits = _NON_DIGIT.sub("", raw)
+    return int(digits) if digits else None
+
+
+def parse_float(raw: Optional[str]) -> Optional[float]:
+    """``raw`` reduced to digits and dots as a float, None if that is not a number."""
+    if not raw:
+        return None
+    try:
+        return float(_NON_DECIMAL.sub("", raw))
+    except ValueError:
+        return None
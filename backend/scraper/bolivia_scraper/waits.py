@@ -0,0 +1,118 @@
+"""Adaptive Playwright waits with timing metrics.
+
+Instead of sleeping a fixed time, handlers wait for what the page needs: a
+selector to appear, or the DOM to stop changing (no mutations for a short
+quiet window), each bounded by a timeout. :class:`PageWaits` records how
+long every named wait actually took and how often it hit its timeout, and
+logs a summary at the end of a crawl.
+"""
+import logging
+import time
+from collections import defaultdict
+from typing import Optional
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Page
+
+from bolivia_scraper import settings
+
+logger = logging.getLogger(__name__)
+
+# Resolves true once no mutation happened for quietMs, false when timeoutMs elapses first.
+_DOM_QUIET_JS = """
+([quietMs, timeoutMs]) => new Promise((resolve) => {
+  let quiet, cap;
+  const observer = new MutationObserver(() => {
+    clearTimeout(quiet);
+    quiet = setTimeout(() => done(true), quietMs);
+  });
+  const done = (settled) => {
+    observer.disconnect();
+    clearTimeout(quiet);
+    clearTimeout(cap);
+    resolve(settled);
+  };
+  observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+  quiet = setTimeout(() => done(true), quietMs);
+  cap = setTimeout(() => done(false), timeoutMs);
+})
+"""
+
+
+class PageWaits:
+    """Selector and DOM-quiescence waits that record their durations per name."""
+
+    def __init__(
+        self,
+        timeout_ms: int = settings.WAIT_TIMEOUT_MS,
+        quiet_ms: int = settings.WAIT_DOM_QUIET_MS,
+    ) -> None:
+        self.timeout_ms = timeout_ms
+        self.quiet_ms = quiet_ms
+        self._durations: dict[str, list[float]] = defaultdict(list)
+        self._timeouts: dict[str, int] = defaultdict(int)
+
+    def _record(self, name: str, started: float, settled: bool) -> None:
+        self._durations[name].append(time.perf_counter() - started)
+        if not settled:
+            self._timeouts[name] += 1
+
+    async def selector(self, page: Page, selector: str, name: str, timeout_ms: Optional[int] = None) -> bool:
+        """Wait until ``selector`` is attached; False if it did not appear in time."""
+        started = time.perf_counter()
+        try:
+            await page.wait_for_selector(selector, state="attached", timeout=timeout_ms or self.timeout_ms)
+            settled = True
+        except PlaywrightError:
+            settled = False
+        self._record(name, started, settled)
+        return settled
+
+    async def function(
+        self, page: Page, expression: str, arg: object, name: str, timeout_ms: Optional[int] = None
+    ) -> bool:
+        """Wait until the JS ``expression``, called with ``arg``, returns a truthy value; False on timeout."""
+        started = time.perf_counter()
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=timeout_ms or self.timeout_ms)
+            settled = True
+        except PlaywrightError:
+            settled = False
+        self._record(name, started, settled)
+        return settled
+
+    async def dom_quiet(
+        self, page: Page, name: str, quiet_ms: Optional[int] = None, timeout_ms: Optional[int] = None
+    ) -> bool:
+        """Wait until the DOM has not changed for ``quiet_ms``; False on timeout."""
+        started = time.perf_counter()
+        try:
+            settled = await page.evaluate(
+                _DOM_QUIET_JS, [quiet_ms or self.quiet_ms, timeout_ms or self.timeout_ms]
+            )
+        except PlaywrightError:
+            # Navigation or page close while waiting.
+            settled = False
+        self._record(name, started, settled)
+        return settled
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        """Per wait name: count, mean/p95/max milliseconds and timeouts."""
+        stats = {}
+        for name, durations in self._durations.items():
+            ordered = sorted(durations)
+            stats[name] = {
+                "count": len(ordered),
+                "mean_ms": 1000 * sum(ordered) / len(ordered),
+                "p95_ms": 1000 * ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))],
+                "max_ms": 1000 * ordered[-1],
+                "timeouts": self._timeouts[name],
+            }
+        return stats
+
+    def log_summary(self, spider_name: str) -> None:
+        for name, s in sorted(self.summary().items()):
+            logger.info(
+                "%s wait %r: %d waits, mean %.0f ms, p95 %.0f ms, max %.0f ms, %d timeouts",
+                spider_name, name, s["count"], s["mean_ms"], s["p95_ms"], s["max_ms"], s["timeouts"],
+            )
@@ -0,0 +1,119 @@
+"""Tests for the shared browser pool, with a fake browser plugin instead of Playwright."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from crawlee.browsers._base_browser_controller import BaseBrowserController
+from crawlee.browsers._base_browser_plugin import BaseBrowserPlugin
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+class FakeController(BaseBrowserController):
+    def __init__(self) -> None:
+        self.closed = False
+        self._pages: list = []
+
+    @property
+    def pages(self) -> list:
+        return self._pages
+
+    @property
+    def pages_count(self) -> int:
+        return len(self._pages)
+
+    @property
+    def last_page_opened_at(self) -> datetime:
+        return datetime.now(timezone.utc)
+
+    @property
+    def idle_time(self) -> timedelta:
+        return timedelta(0)
+
+    @property
+    def has_free_capacity(self) -> bool:
+        return True
+
+    @property
+    def is_browser_connected(self) -> bool:
+        return not self.closed
+
+    async def new_page(self, page_options=None, proxy_info=None):
+        assert not self.closed, "page requested from a closed browser"
+        page = object()
+        self._pages.append(page)
+        return page
+
+    async def close(self, *, force: bool = False) -> None:
+        self.closed = True
+
+
+class FakePlugin(BaseBrowserPlugin):
+    def __init__(self) -> None:
+        self.open = False
+        self.browsers: list[FakeController] = []
+
+    @property
+    def browser_type(self):
+        return "chromium"
+
+    @property
+    def browser_options(self):
+        return {}
+
+    @property
+    def page_options(self):
+        return {}
+
+    @property
+    def max_open_pages_per_browser(self) -> int:
+        return 20
+
+    async def __aenter__(self) -> "FakePlugin":
+        assert not self.open, "plugin entered twice"
+        self.open = True
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.open = False
+
+    async def new_browser(self) -> FakeController:
+        assert self.open, "browser launched from a closed plugin"
+        self.browsers.append(FakeController())
+        return self.browsers[-1]
+
+
+async def _round(pool) -> None:
+    # What one PlaywrightCrawler does with the pool during a crawl round.
+    async with pool:
+        await pool.new_page()
+
+
+@pytest.mark.anyio
+async def test_rounds_share_browser_while_pool_is_held():
+    from bolivia_scraper.crawling import SharedBrowserPool
+
+    plugin = FakePlugin()
+    pool = SharedBrowserPool(plugins=[plugin])
+    async with pool:
+        await _round(pool)
+        await _round(pool)
+        assert plugin.open
+        assert len(plugin.browsers) == 1 and not plugin.browsers[0].closed
+    assert not plugin.open
+    assert plugin.browsers[0].closed
+
+
+@pytest.mark.anyio
+async def test_pool_reopens_with_fresh_browsers_after_full_exit():
+    from bolivia_scraper.crawling import SharedBrowserPool
+
+    plugin = FakePlugin()
+    pool = SharedBrowserPool(plugins=[plugin])
+    await _round(pool)
+    await _round(pool)
+    assert len(plugin.browsers) == 2
+    assert all(browser.closed for browser in plugin.browsers)
+    assert not pool.active_browsers and not pool.inactive_browsers
@@ -0,0 +1,148 @@
+"""Tests for the state crawl workers share: queue names, frontier and Bloom file."""
+import asyncio
+
+import pytest
+
+from bolivia_scraper import crawling, settings
+from bolivia_scraper.bloom import BloomFilter
+from bolivia_scraper.frontier import MemoryFrontier, RedisFrontier
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+def test_queue_names_are_private_to_the_worker(monkeypatch):
+    monkeypatch.setattr(settings, "WORKER_ID", "host.a-12")
+    first = crawling.queue_name("fao-http")
+    monkeypatch.setattr(settings, "WORKER_ID", "host.b-12")
+    second = crawling.queue_name("fao-http")
+
+    assert first == "fao-http-host-a-12"
+    assert first != second
+
+
+@pytest.mark.anyio
+async def test_memory_frontier_clears_when_left():
+    frontier = MemoryFrontier()
+    await frontier.join()
+    spec = {"url": "https://example.org/a", "mode": "http"}
+    assert await frontier.add(spec)
+    assert not await frontier.add(spec)
+
+    assert await frontier.leave()
+    assert await frontier.add(spec)
+
+
+def test_bloom_save_merges_with_other_workers(tmp_path):
+    path = tmp_path / "spider.bin"
+    first = BloomFilter(1000, 0.01)
+    first.add("a" * 32)
+    second = BloomFilter(1000, 0.01)
+    second.add("b" * 32)
+
+    first.save(path, 3600)
+    second.save(path, 3600)
+    merged = BloomFilter.load(path, 1000, 0.01, 3600)
+
+    assert "a" * 32 in merged and "b" * 32 in merged
+    assert merged.created == first.created
+
+
+def test_bloom_save_overwrites_expired_file(tmp_path):
+    path = tmp_path / "spider.bin"
+    old = BloomFilter(1000, 0.01, created=0.0)
+    old.add("a" * 32)
+    old.save(path, 3600)
+    fresh = BloomFilter(1000, 0.01)
+    fresh.add("b" * 32)
+    fresh.save(path, 3600)
+    loaded = BloomFilter.load(path, 1000, 0.01, 3600)
+
+    assert "a" * 32 not in loaded and "b" * 32 in loaded
+
+
+@pytest.fixture
+def redis_client():
+    # RedisFrontier's Lua scripts need fakeredis' Lua runtime.
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeAsyncRedis(decode_responses=True)
+
+
+def spec(n: int) -> dict:
+    return {"url": f"https://example.org/{n}", "label": None, "user_data": {}, "mode": "http"}
+
+
+@pytest.mark.anyio
+async def test_redis_frontier_queues_a_url_once(redis_client):
+    frontier = RedisFrontier(redis_client, "oep", worker_id="a")
+    assert await frontier.add(spec(1))
+    assert not await frontier.add(spec(1))
+    assert not await RedisFrontier(redis_client, "oep", worker_id="b").add(spec(1))
+
+    assert await frontier.take("http", 10) == [spec(1)]
+    assert await frontier.take("http", 10) == []
+
+
+@pytest.mark.anyio
+async def test_concurrent_workers_never_take_the_same_url(redis_client):
+    a = RedisFrontier(redis_client, "oep", worker_id="a")
+    b = RedisFrontier(redis_client, "oep", worker_id="b")
+    for n in range(20):
+        await a.add(spec(n))
+
+    batches = await asyncio.gather(*(worker.take("http", 3) for worker in (a, b) * 4))
+    taken = [s["url"] for batch in batches for s in batch]
+    assert len(taken) == len(set(taken)) == 20
+
+
+@pytest.mark.anyio
+async def test_expired_lease_is_reclaimed_until_out_of_attempts(redis_client, monkeypatch):
+    monkeypatch.setattr(settings, "FRONTIER_MAX_ATTEMPTS", 2)
+    stalled = RedisFrontier(redis_client, "oep", worker_id="a", lease_secs=0)
+    live = RedisFrontier(redis_client, "oep", worker_id="b", lease_secs=60)
+    await live.add(spec(1))
+
+    assert await live.take("http", 1) == [spec(1)]
+    assert await live.reclaim() == 0  # a live lease is left alone
+
+    await live.done(spec(1)["url"])
+    await live.requeue(spec(1))
+    await stalled.take("http", 1)
+    assert await live.reclaim() == 1
+    (retried,) = await live.take("http", 1)
+    assert retried["attempts"] == 1
+
+    await live.done(retried["url"])
+    await stalled.requeue(retried)
+    await stalled.take("http", 1)
+    assert await live.reclaim() == 0
+    assert await live.idle()
+    assert await redis_client.llen("frontier:oep:failed") == 1
+
+
+@pytest.mark.anyio
+async def test_worker_leaving_mid_lease_keeps_the_crawl_state(redis_client):
+    leaving = RedisFrontier(redis_client, "oep", worker_id="a", lease_secs=0)
+    staying = RedisFrontier(redis_client, "oep", worker_id="b", lease_secs=60)
+    await leaving.join()
+    await staying.join()
+    await leaving.add(spec(1))
+    await leaving.add(spec(2))
+    await leaving.take("http", 1)
+
+    assert not await leaving.leave()
+    assert not await staying.idle()
+    assert not await staying.add(spec(1))
+
+    # The leaver's lease expired: its request is handed to the remaining worker.
+    assert await staying.reclaim() == 1
+    taken = await staying.take("http", 10)
+    assert sorted(s["url"] for s in taken) == [spec(1)["url"], spec(2)["url"]]
+    for s in taken:
+        await staying.done(s["url"])
+
+    assert await staying.leave()
+    assert await staying.add(spec(1))
@@ -0,0 +1,99 @@
+"""Tests for HybridCrawl's handling of HTTP responses, with in-memory crawl state."""
+import pytest
+from crawlee import Request
+
+from bolivia_scraper.fetch_cache import FetchCache, body_hash
+from bolivia_scraper.frontier import MemoryFrontier
+from bolivia_scraper.hybrid import BROWSER, HTTP, FetchModeMemory, HybridCrawl, NeedsBrowser
+
+URL = "https://example.org/results/2020"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def crawl(tmp_path):
+    handled: list = []
+
+    async def handler(html, request):
+        handled.append(html)
+        if "<table>" not in html:
+            raise NeedsBrowser("no table")
+        return [{"url": "https://example.org/results/2021"}]
+
+    crawl = HybridCrawl(
+        "test",
+        {None: handler},
+        memory=FetchModeMemory(tmp_path / "modes.json"),
+        cache=FetchCache(tmp_path / "cache.json"),
+        frontier=MemoryFrontier(),
+    )
+    crawl.handled = handled
+    return crawl
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("status_code", [403, 404, 410])
+async def test_error_pages_are_skipped_without_escalating(crawl, status_code):
+    await crawl._on_http_response(Request.from_url(URL), status_code, {}, b"<p>Not found</p>")
+
+    assert crawl.handled == []
+    assert await crawl._memory.mode(URL) == HTTP
+    assert await crawl._frontier.take(BROWSER, 10) == []
+
+
+@pytest.mark.anyio
+async def test_not_modified_page_enqueues_its_cached_follow_ups(crawl):
+    await crawl._cache.store(URL, {"etag": '"v1"', "last_modified": None, "hash": "x"}, [{"url": URL + "/page/2"}])
+    assert await crawl._cache.conditional_headers(URL) == {"If-None-Match": '"v1"'}
+
+    await crawl._on_http_response(Request.from_url(URL), 304, {"ETag": '"v2"'}, b"")
+
+    assert crawl.handled == []
+    assert crawl.unchanged == 1
+    assert (await crawl._cache.get(URL))["etag"] == '"v2"'
+    assert [spec["url"] for spec in await crawl._frontier.take(HTTP, 10)] == [URL + "/page/2"]
+
+
+@pytest.mark.anyio
+async def test_error_page_with_the_cached_body_is_not_unchanged(crawl):
+    await crawl._cache.store(URL, {"etag": None, "last_modified": None, "hash": body_hash(b"gone")}, [])
+    assert not await crawl._cache.unchanged(URL, 404, b"gone")
+    assert await crawl._cache.unchanged(URL, 200, b"gone")
+
+
+class FakeSink:
+    def __init__(self):
+        self.callbacks: list = []
+
+    async def after_saved(self, callback):
+        self.callbacks.append(callback)
+
+    async def drain(self):
+        for callback in self.callbacks:
+            await callback()
+        self.callbacks = []
+
+
+@pytest.mark.anyio
+async def test_page_is_cached_only_after_its_items_are_saved(crawl):
+    crawl._sink = FakeSink()
+    await crawl._on_http_response(Request.from_url(URL), 200, {"ETag": '"v1"'}, b"<table></table>")
+
+    assert crawl.handled and await crawl._cache.get(URL) is None
+    await crawl._sink.drain()
+    entry = await crawl._cache.get(URL)
+    assert entry["etag"] == '"v1"'
+    assert entry["follow"] == [{"url": "https://example.org/results/2021"}]
+
+
+@pytest.mark.anyio
+async def test_escalated_request_carries_its_validators(crawl):
+    await crawl._on_http_response(Request.from_url(URL), 200, {"ETag": '"v1"'}, b"<div id=app></div>")
+
+    (spec,) = await crawl._frontier.take(BROWSER, 10)
+    assert spec["fetched"] == {"etag": '"v1"', "last_modified": None, "hash": body_hash(b"<div id=app></div>")}
+    assert await crawl._memory.mode(URL) == BROWSER
@@ -0,0 +1,125 @@
+"""Tests for the item → table mappings and the merge statements they compile to."""
+import re
+from datetime import date
+
+import pytest
+from psycopg2 import sql
+
+from bolivia_scraper.items import ConflictItem, EconomicDataItem, ElectionResultItem, EnvironmentItem
+from bolivia_scraper.loader import merge_statement
+from bolivia_scraper.mapping import ITEM_MAPPINGS, DepartmentResolver, mapping_for
+
+# The unique keys of migrations 001 and 006, as their ON CONFLICT target must spell them.
+UNIQUE_KEYS = {
+    "election_results": '"year", "election_type", "party", "candidate"',
+    "social_conflicts": '"title", "start_date"',
+    "inflation": '"year", "month"',
+    "gdp_per_capita": '"department_id", "year"',
+    "public_contracts": '"sicoes_id"',
+    "deforestation_zones": "year, md5(ST_AsEWKB(geometry::geometry))",
+    "co2_emissions": "year, sector",
+}
+
+
+def render(query) -> str:
+    """Render a psycopg2.sql composition without a connection (identifiers double-quoted)."""
+    if isinstance(query, sql.Composed):
+        return "".join(render(part) for part in query.seq)
+    if isinstance(query, sql.Identifier):
+        return ".".join('"%s"' % s.replace('"', '""') for s in query.strings)
+    if isinstance(query, sql.SQL):
+        return query.string
+    raise TypeError(query)
+
+
+class FakeConnection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def execute(self, query):
+        self.queries += 1
+
+    def fetchall(self):
+        return list(self.rows)
+
+    def commit(self):
+        pass
+
+
+@pytest.mark.parametrize("mapping", ITEM_MAPPINGS, ids=lambda m: m.table)
+def test_merge_statement_targets_the_unique_key(mapping):
+    statement = render(merge_statement(mapping.target))
+
+    conflict = re.search(r"ON CONFLICT \((.*)\) DO UPDATE SET (.*)$", statement)
+    assert conflict, statement
+    assert conflict.group(1) == UNIQUE_KEYS[mapping.table]
+    updated = re.findall(r'"(\w+)" = EXCLUDED\."\1"', conflict.group(2))
+    assert updated == [c for c in mapping.fields if c not in mapping.conflict]
+    columns = ", ".join(f'"{c}"' for c in mapping.fields)
+    assert statement.startswith(f'INSERT INTO "{mapping.table}" ({columns}) SELECT ')
+
+
+def test_merge_statement_converts_staged_geometries():
+    deforestation = next(m for m in ITEM_MAPPINGS if m.table == "deforestation_zones")
+    statement = render(merge_statement(deforestation.target))
+    assert 'SELECT "year", ST_Multi(ST_GeomFromText("geometry", 4326))::geography, "area_ha"' in statement
+    assert 'FROM "_stage_deforestation_zones"' in statement
+
+
+def test_mapping_for_applies_when_predicates():
+    assert mapping_for(EnvironmentItem(indicator=" CO2 ", year=2020, value=1.5)).table == "co2_emissions"
+    assert mapping_for(EnvironmentItem(indicator="deforestation", year=2020, geometry_wkt="POLYGON(...)")).table == (
+        "deforestation_zones"
+    )
+    assert mapping_for(EnvironmentItem(indicator="deforestation", year=2020)) is None
+    assert mapping_for(EconomicDataItem(indicator="IPC", year=2023, month=4, value=2.1)).table == "inflation"
+    assert mapping_for(EconomicDataItem(indicator="pib_per_capita", year=2023, value=3500)).table == "gdp_per_capita"
+    assert mapping_for(EconomicDataItem(indicator="inflation", year=2023)) is None
+    assert mapping_for(ConflictItem(title="")) is None
+    assert mapping_for({"title": "not an item"}) is None
+
+
+def test_row_extracts_columns_in_field_order():
+    departments = DepartmentResolver(FakeConnection([(3, "Potosí", "PT")]))
+    conflicts = mapping_for(ConflictItem(title="Bloqueo"))
+    item = ConflictItem(
+        title="Bloqueo",
+        department="potosi",
+        start_date="2023-05-02T10:00:00",
+        end_date="soon",
+        latitude=-19.6,
+        longitude=-65.7,
+        source_url="https://example.org",
+    )
+
+    row = dict(zip(conflicts.fields, conflicts.row(item, departments)))
+    assert row["start_date"] == date(2023, 5, 2)
+    assert row["end_date"] is None
+    assert row["department_id"] == 3
+    assert row["geometry"] == "SRID=4326;POINT(-65.7 -19.6)"
+    assert row["source"] == "https://example.org"
+
+    election = mapping_for(ElectionResultItem(year=2020, election_type="general", votes=10))
+    row = dict(zip(election.fields, election.row(ElectionResultItem(year=2020, votes=10), departments)))
+    assert (row["party"], row["candidate"]) == ("", "")
+
+
+def test_department_resolver_rereads_an_empty_table():
+    conn = FakeConnection([])
+    departments = DepartmentResolver(conn)
+    assert departments("La Paz") is None
+
+    conn.rows = [(2, "La Paz", "LP")]
+    assert departments("la paz") == 2
+    assert departments("LP") == 2
+    assert conn.queries == 2
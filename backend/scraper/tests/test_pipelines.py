@@ -0,0 +1,164 @@
+"""Tests for DatabasePipeline's failure handling and the streaming pipeline, with the database faked out."""
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from bolivia_scraper import pipelines, streaming
+from bolivia_scraper.loader import UpsertTarget
+
+FIRES = UpsertTarget("forest_fires", ("id", "frp"), ("id",), ("frp",))
+ROADS = UpsertTarget("road_segments", ("id", "name"), ("id",), ("name",))
+
+
+class FakeConnection:
+    def __init__(self):
+        self.committed: list = []
+        self._pending: list = []
+
+    def cursor(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def commit(self):
+        self.committed.extend(self._pending)
+        self._pending = []
+
+    def rollback(self):
+        self._pending = []
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = FakeConnection()
+
+    def copy_upsert(cur, target, rows):
+        if any("bad" in row for row in rows):
+            raise ValueError("invalid input syntax")
+        cur._pending.extend((target.table, row) for row in rows)
+        return len(rows)
+
+    def mapping_for(item):
+        target = FIRES if item["table"] == "fires" else ROADS
+        return SimpleNamespace(target=target, row=lambda item, departments: item["row"])
+
+    invalidated: list = []
+    monkeypatch.setattr(pipelines.psycopg2, "connect", lambda dsn: conn)
+    monkeypatch.setattr(pipelines, "DepartmentResolver", lambda conn: None)
+    monkeypatch.setattr(pipelines, "copy_upsert", copy_upsert)
+    monkeypatch.setattr(pipelines, "mapping_for", mapping_for)
+    monkeypatch.setattr(pipelines, "invalidate_api_cache", lambda tables, redis_url=None: invalidated.append(tables))
+    monkeypatch.setattr(pipelines.settings, "DB_BATCH_SIZE", 1000)
+    monkeypatch.setattr(pipelines.settings, "DB_FLUSH_INTERVAL_SECS", 3600)
+    return conn, invalidated
+
+
+def test_bad_row_only_loses_itself_and_releases_its_hash(db):
+    conn, invalidated = db
+    released = []
+    pipe = pipelines.DatabasePipeline(on_failed=lambda spider, items: released.append((spider, items)))
+    good_fire = {"table": "fires", "row": (1, 10.5)}
+    bad_fire = {"table": "fires", "row": (2, "bad")}
+    road = {"table": "roads", "row": (7, "Ruta 4")}
+    pipe.process_batch("fires_spider", [good_fire, bad_fire, road])
+
+    assert pipe.flush() == 2
+    assert sorted(conn.committed) == [("forest_fires", (1, 10.5)), ("road_segments", (7, "Ruta 4"))]
+    assert released == [("fires_spider", [bad_fire])]
+    assert invalidated == [{"forest_fires", "road_segments"}]
+    pipe.close()
+
+
+def test_table_whose_rows_all_fail_is_not_invalidated(db):
+    conn, invalidated = db
+    pipe = pipelines.DatabasePipeline()
+    pipe.process_batch("s", [{"table": "fires", "row": (1, "bad")}, {"table": "roads", "row": (2, "ok")}])
+    assert pipe.flush() == 1
+    assert invalidated == [{"road_segments"}]
+    pipe.close()
+
+
+def test_timer_flushes_without_new_items(db, monkeypatch):
+    conn, _ = db
+    monkeypatch.setattr(pipelines.settings, "DB_FLUSH_INTERVAL_SECS", 0.05)
+    pipe = pipelines.DatabasePipeline()
+    pipe.process("s", {"table": "roads", "row": (1, "Ruta 1")})
+    pipe._stop.wait(0.5)
+    assert conn.committed == [("road_segments", (1, "Ruta 1"))]
+    pipe.close()
+
+
+def test_release_deletes_claimed_hashes(monkeypatch):
+    deleted = []
+
+    class FakeRedis:
+        def ping(self):
+            return True
+
+        def delete(self, *keys):
+            deleted.extend(keys)
+
+    monkeypatch.setattr(pipelines.redis_lib, "from_url", lambda *a, **kw: FakeRedis())
+    hashes = pipelines.HashCheckPipeline()
+    item = {"id": 1}
+    hashes.release("s", [item])
+    assert deleted == [f"hash:s:{pipelines._item_hash(item)}"]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def stream(db, monkeypatch, tmp_path):
+    def no_redis(*args, **kwargs):
+        raise ConnectionError("no redis")
+
+    monkeypatch.setattr(pipelines.redis_lib, "from_url", no_redis)
+    monkeypatch.setattr(pipelines.settings, "DATA_RAW_DIR", str(tmp_path))
+    monkeypatch.setattr(streaming.settings, "ITEM_BATCH_WAIT_SECS", 0.01)
+    return streaming.StreamingPipeline("fires_spider")
+
+
+@pytest.mark.anyio
+async def test_after_saved_runs_once_the_items_are_flushed(db, stream):
+    conn, _ = db
+    saved: list = []
+
+    async def record():
+        saved.append(list(conn.committed))
+
+    async with stream:
+        await stream.put({"table": "fires", "row": (1, 10.5)})
+        await stream.after_saved(record)
+        await asyncio.sleep(0.1)
+        # Reached the database stage, but the row is still buffered.
+        assert saved == []
+
+        await stream.drain()
+        assert saved == [[("forest_fires", (1, 10.5))]]
+
+
+@pytest.mark.anyio
+async def test_after_saved_is_dropped_once_an_item_is_lost(db, stream):
+    saved: list = []
+
+    async def record():
+        saved.append(True)
+
+    async with stream:
+        await stream.put({"table": "fires", "row": (2, "bad")})
+        await stream.after_saved(record)
+        await stream.drain()
+        await stream.put({"table": "fires", "row": (3, 1.0)})
+        await stream.after_saved(record)
+    assert saved == []
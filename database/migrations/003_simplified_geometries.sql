@@ -0,0 +1,25 @@
+-- ============================================================
+-- 003_simplified_geometries.sql
+-- Bolivia KPIs – pre-simplified geometry levels for polygon layers
+-- ============================================================
+-- geom_overview   : tolerance 0.01°  (~1 km),   zoom <= 6
+-- geom_simplified : tolerance 0.001° (~100 m),  zoom 7–9
+-- Filled by backend/etl/simplification.py; routes fall back to the full
+-- geometry while a level is still NULL.
+
+ALTER TABLE departments         ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+
+ALTER TABLE tioc_territories    ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+ALTER TABLE tioc_territories    ADD COLUMN IF NOT EXISTS geom_simplified geography(GEOMETRY, 4326);
+
+ALTER TABLE protected_areas     ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+ALTER TABLE protected_areas     ADD COLUMN IF NOT EXISTS geom_simplified geography(GEOMETRY, 4326);
+
+ALTER TABLE deforestation_zones ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+ALTER TABLE deforestation_zones ADD COLUMN IF NOT EXISTS geom_simplified geography(GEOMETRY, 4326);
+
+ALTER TABLE coverage_zones      ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+ALTER TABLE coverage_zones      ADD COLUMN IF NOT EXISTS geom_simplified geography(GEOMETRY, 4326);
+
+ALTER TABLE hdi_index           ADD COLUMN IF NOT EXISTS geom_overview   geography(GEOMETRY, 4326);
+ALTER TABLE hdi_index           ADD COLUMN IF NOT EXISTS geom_simplified geography(GEOMETRY, 4326);
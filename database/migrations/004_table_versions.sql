@@ -0,0 +1,49 @@
+-- ============================================================
+-- 004_table_versions.sql
+-- Bolivia KPIs – per-table version counters for HTTP validators
+-- ============================================================
+-- One row per data table. A statement-level trigger bumps `version` and
+-- `updated_at` on every INSERT / UPDATE / DELETE / TRUNCATE, so the API can
+-- derive ETag / Last-Modified with a primary-key lookup instead of scanning
+-- the table (see backend/api/conditional.py). Tables without a row are served
+-- without validators.
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version    BIGINT      NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO table_versions (table_name, version, updated_at)
+    VALUES (TG_TABLE_NAME, 1, NOW())
+    ON CONFLICT (table_name) DO UPDATE
+        SET version    = table_versions.version + 1,
+            updated_at = NOW();
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DO $$
+DECLARE
+    tbl TEXT;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'departments', 'gdp_per_capita', 'inflation', 'unemployment', 'exports',
+        'public_contracts', 'election_results', 'democracy_index', 'corruption_index',
+        'social_conflicts', 'tioc_territories', 'internet_penetration', 'coverage_zones',
+        'rd_spending', 'digital_literacy', 'hdi_index', 'life_expectancy',
+        'nutrition_indicators', 'census_data', 'gender_gap_index', 'basic_services',
+        'deforestation_zones', 'protected_areas', 'mining_concessions',
+        'lithium_salt_flats', 'co2_emissions', 'forest_fires', 'crime_rates',
+        'drug_seizures', 'road_segments', 'prisons', 'healthcare_facilities'
+    ] LOOP
+        INSERT INTO table_versions (table_name) VALUES (tbl) ON CONFLICT DO NOTHING;
+        EXECUTE format('DROP TRIGGER IF EXISTS %I ON %I', tbl || '_version', tbl);
+        EXECUTE format(
+            'CREATE TRIGGER %I AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I '
+            'FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()',
+            tbl || '_version', tbl);
+    END LOOP;
+END $$;
@@ -0,0 +1,10 @@
+-- ============================================================
+-- 005_keyset_indexes.sql
+-- Bolivia KPIs – composite indexes backing keyset pagination
+-- ============================================================
+-- List endpoints page by (sort_key, id) cursors instead of OFFSET; these
+-- indexes let every page, however deep, be a single index range scan.
+-- public_contracts pages by id alone and is served by its primary key.
+
+CREATE INDEX IF NOT EXISTS idx_gdp_year_id       ON gdp_per_capita(year, id);
+CREATE INDEX IF NOT EXISTS idx_elections_year_id ON election_results(year, id);
@@ -0,0 +1,41 @@
+-- ============================================================
+-- 006_natural_keys.sql
+-- Bolivia KPIs – natural keys for the scraper's bulk upserts
+-- ============================================================
+-- The scraper merges each batch with INSERT ... ON CONFLICT on these keys
+-- (backend/scraper/bolivia_scraper/mapping.py). NULLS NOT DISTINCT (PG 15+)
+-- lets national rows (NULL department / month / sector) be upserted too.
+-- Existing duplicates are collapsed onto their newest row first.
+
+-- ── social_conflicts (title, start_date) ────────────────────────────────────
+DELETE FROM social_conflicts a USING social_conflicts b
+ WHERE a.id < b.id AND a.title = b.title AND a.start_date IS NOT DISTINCT FROM b.start_date;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_social_conflicts_title_start
+    ON social_conflicts (title, start_date) NULLS NOT DISTINCT;
+
+-- ── inflation (year, month) ─────────────────────────────────────────────────
+DELETE FROM inflation a USING inflation b
+ WHERE a.id < b.id AND a.year = b.year AND a.month IS NOT DISTINCT FROM b.month;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_inflation_year_month
+    ON inflation (year, month) NULLS NOT DISTINCT;
+
+-- ── gdp_per_capita (department_id, year) ────────────────────────────────────
+DELETE FROM gdp_per_capita a USING gdp_per_capita b
+ WHERE a.id < b.id AND a.year = b.year AND a.department_id IS NOT DISTINCT FROM b.department_id;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_gdp_department_year
+    ON gdp_per_capita (department_id, year) NULLS NOT DISTINCT;
+
+-- ── co2_emissions (year, sector) ────────────────────────────────────────────
+DELETE FROM co2_emissions a USING co2_emissions b
+ WHERE a.id < b.id AND a.year = b.year AND a.sector IS NOT DISTINCT FROM b.sector;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_co2_year_sector
+    ON co2_emissions (year, sector) NULLS NOT DISTINCT;
+
+-- ── deforestation_zones (year, geometry) ────────────────────────────────────
+-- Keyed on a digest of the exact geometry; the expression must match the
+-- scraper's ON CONFLICT target verbatim.
+DELETE FROM deforestation_zones a USING deforestation_zones b
+ WHERE a.id < b.id AND a.year = b.year
+   AND md5(ST_AsEWKB(a.geometry::geometry)) = md5(ST_AsEWKB(b.geometry::geometry));
+CREATE UNIQUE INDEX IF NOT EXISTS uq_deforestation_year_geometry
+    ON deforestation_zones (year, md5(ST_AsEWKB(geometry::geometry)));
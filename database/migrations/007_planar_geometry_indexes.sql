@@ -0,0 +1,26 @@
+-- ============================================================
+-- 007_planar_geometry_indexes.sql
+-- Bolivia KPIs – planar GiST indexes for tile and viewport filters
+-- ============================================================
+-- Tile envelopes and bbox / intersects filters are lon/lat rectangles and
+-- are tested with geometry::geometry && <4326 geometry>: as geographies a
+-- whole-world envelope is degenerate and a wide one gets geodesic edges.
+-- These expression indexes serve that predicate; the geography indexes
+-- from 001 still serve distance queries.
+
+CREATE INDEX IF NOT EXISTS idx_departments_geometry_planar         ON departments           USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_contracts_geometry_planar           ON public_contracts      USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_elections_geometry_planar           ON election_results      USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_conflicts_geometry_planar           ON social_conflicts      USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_tioc_geometry_planar                ON tioc_territories      USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_coverage_geometry_planar            ON coverage_zones        USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_hdi_geometry_planar                 ON hdi_index             USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_deforestation_geometry_planar       ON deforestation_zones   USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_protected_areas_geometry_planar     ON protected_areas       USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_mining_geometry_planar              ON mining_concessions    USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_lithium_geometry_planar             ON lithium_salt_flats    USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_fires_geometry_planar               ON forest_fires          USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_drug_seizures_geometry_planar       ON drug_seizures         USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_road_segments_geometry_planar       ON road_segments         USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_prisons_geometry_planar             ON prisons               USING GIST((geometry::geometry));
+CREATE INDEX IF NOT EXISTS idx_healthcare_geometry_planar          ON healthcare_facilities USING GIST((geometry::geometry));